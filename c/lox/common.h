@@ -5,8 +5,11 @@
 #include <stddef.h>
 #include <stdint.h>
 
+// Build with -DNDEBUG to leave out the disassembly and tracing.
+#ifndef NDEBUG
 #define DEBUG_PRINT_CODE
 #define DEBUG_TRACE_EXECUTION
+#endif
 
 #define UINT8_COUNT (UINT8_MAX + 1)
 
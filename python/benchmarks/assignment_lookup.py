@@ -0,0 +1,101 @@
+'''
+Benchmark for the Interpreter's resolution table on assignment heavy loops.
+
+Expressions used to be frozen dataclasses with structural hashing, so every
+lookup in Interpreter.locals hashed the node, and for an Assign its whole
+value subtree. They now hash by identity. This runs loops assigning
+increasingly large expressions, and times the same table lookups with keys
+hashed either way.
+
+Usage, with the package installed (pip install -e .):
+
+    python benchmarks/assignment_lookup.py
+'''
+import contextlib
+import io
+import time
+
+from lox.lox import Lox
+from lox.scanner import Scanner
+from lox.parser import Parser
+from lox.abcs.expr import Expr, Assign
+
+ITERATIONS = 20_000
+TERM_COUNTS = [1, 8, 32]
+
+def program(terms: int) -> str:
+    '''
+    A loop doing one local assignment of a sum with the given number of terms.
+    '''
+    value = ' + '.join(['y'] * terms)
+    return f'''
+fun run() {{
+    var x = 0;
+    var y = 1;
+    var i = 0;
+    while (i < {ITERATIONS}) {{
+        x = {value};
+        i = i + 1;
+    }}
+    return x;
+}}
+print run();
+'''
+
+def structural_hash(node) -> int:
+    '''
+    What the generated __hash__ of a frozen dataclass used to compute.
+    '''
+    if isinstance(node, Expr):
+        return hash(tuple(structural_hash(getattr(node, name)) for name in node.__match_args__))
+    if isinstance(node, list):
+        return hash(tuple(structural_hash(item) for item in node))
+    return hash(node)
+
+def time_program(source: str, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        lox = Lox()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            lox.run(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_lookups(source: str, repeat: int = 3) -> tuple[float, float]:
+    '''
+    Times looking up every Assign node ITERATIONS times, keyed by identity
+    and keyed by structural hash.
+    '''
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    lox = Lox()
+    lox.resolver.resolve(*statements)
+    table = lox.interpreter.locals
+    assigns = [expr for expr in table if isinstance(expr, Assign)]
+    structural_table = {structural_hash(expr): depth for expr, depth in table.items()}
+
+    identity = structural = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            for expr in assigns:
+                table.get(expr)
+        identity = min(identity, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            for expr in assigns:
+                structural_table.get(structural_hash(expr))
+        structural = min(structural, time.perf_counter() - start)
+
+    return identity, structural
+
+if __name__ == '__main__':
+    print(f'{ITERATIONS} iterations per run, best of 3.\n')
+    print(f"{'terms':>6} {'program':>10} {'identity lookups':>18} {'structural lookups':>20}")
+
+    for terms in TERM_COUNTS:
+        source = program(terms)
+        total = time_program(source)
+        identity, structural = time_lookups(source)
+        print(f'{terms:>6} {total:>9.3f}s {identity:>17.4f}s {structural:>19.4f}s')
@@ -0,0 +1,138 @@
+'''
+Benchmark for returns and breaks on call heavy programs.
+
+The tree-walker and the closure compiler used to unwind to the function
+call by raising a Return exception, which also built its message with
+str(value), and to the loop by raising Break. Statements now return a
+Completion instead. This runs programs dominated by calls, method calls
+and breaks on both backends, and times the two mechanisms on their own
+in plain Python.
+
+Usage, with the package installed (pip install -e .):
+
+    python benchmarks/control_flow.py
+'''
+import contextlib
+import io
+import time
+
+from lox.lox import Lox
+from lox.enums.backend import Backend
+from lox.enums.completion import Completion
+
+ITERATIONS = 100_000
+BACKENDS = [Backend.TREE, Backend.CLOSURE]
+
+PROGRAMS = {
+    'fib': '''
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+print fib(20);
+''',
+    'calls': f'''
+fun add(a, b) {{
+    return a + b;
+}}
+var sum = 0;
+var i = 0;
+while (i < {ITERATIONS}) {{
+    sum = add(sum, i);
+    i = i + 1;
+}}
+print sum;
+''',
+    'methods': f'''
+class Point {{
+    init(x, y) {{
+        this.x = x;
+        this.y = y;
+    }}
+    moved(dx) {{
+        return Point(this.x + dx, this.y);
+    }}
+}}
+var p = Point(0, 0);
+var i = 0;
+while (i < {ITERATIONS // 2}) {{
+    p = p.moved(1);
+    i = i + 1;
+}}
+print p.x;
+''',
+    'breaks': f'''
+var total = 0;
+var i = 0;
+while (i < {ITERATIONS // 10}) {{
+    var j = 0;
+    while (true) {{
+        j = j + 1;
+        if (j == 10) break;
+    }}
+    total = total + j;
+    i = i + 1;
+}}
+print total;
+''',
+}
+
+class Return(Exception):
+    '''
+    The exception that was raised for every return.
+    '''
+    def __init__(self, value):
+        self.value = value
+        super().__init__(str(value))
+
+def time_program(source: str, backend: Backend, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        lox = Lox(backend)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            lox.run(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_mechanisms(repeat: int = 3) -> tuple[float, float]:
+    '''
+    Times ITERATIONS returns of a value through a raised Return and
+    through a returned Completion.
+    '''
+    def raising(value):
+        raise Return(value)
+
+    def completing(holder, value):
+        holder[0] = value
+        return Completion.RETURN
+
+    raised = returned = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(ITERATIONS):
+            try:
+                raising(i)
+            except Return as ret:
+                ret.value
+        raised = min(raised, time.perf_counter() - start)
+
+        holder = [None]
+        start = time.perf_counter()
+        for i in range(ITERATIONS):
+            if completing(holder, i) is Completion.RETURN:
+                holder[0]
+        returned = min(returned, time.perf_counter() - start)
+
+    return raised, returned
+
+if __name__ == '__main__':
+    print(f'{ITERATIONS} iterations, best of 3.\n')
+    print(f"{'program':>8}" + ''.join(f'{backend.value:>10}' for backend in BACKENDS))
+
+    for name, source in PROGRAMS.items():
+        times = [time_program(source, backend) for backend in BACKENDS]
+        print(f'{name:>8}' + ''.join(f'{seconds:>9.3f}s' for seconds in times))
+
+    raised, returned = time_mechanisms()
+    print(f'\nraised Return {raised:.4f}s, returned Completion {returned:.4f}s')
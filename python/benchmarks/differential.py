@@ -0,0 +1,162 @@
+'''
+Differential harness against the C clox in c/lox. Runs Lox programs on
+the Python Lox and on clox, checks that both print the same, and reports
+how many times slower Python is per program.
+
+clox is still a subset of Lox: no functions, classes or calls. Programs
+using those are skipped, as found by scanning them with the Python
+RegexScanner. Output is compared after normalizing what the two print
+differently for the same value: numbers (clox uses %g, Python repr),
+booleans and nil.
+
+clox is built from c/lox with -O2 -DNDEBUG into a temporary directory,
+unless --clox gives a binary. Its times include starting the process.
+
+Usage, with the package installed (pip install -e .):
+
+    python benchmarks/differential.py
+    python benchmarks/differential.py --backend closure lox_scripts/*.lox
+'''
+import argparse
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from lox.lox import Lox
+from lox.regex_scanner import RegexScanner
+from lox.enums.backend import Backend
+from lox.enums.tokentype import TokenType
+
+ROOT = Path(__file__).resolve().parents[2]
+CLOX_SOURCES = ROOT / 'c' / 'lox'
+DEFAULT_PROGRAMS = sorted(
+    [
+        *(ROOT / 'python' / 'benchmarks' / 'programs').glob('*.lox'),
+        *(ROOT / 'python' / 'lox_scripts').glob('*.lox'),
+    ]
+)
+
+# Tokens of the features clox doesn't have yet.
+UNSUPPORTED_TOKENS = {
+    TokenType.FUN: 'functions',
+    TokenType.RETURN: 'functions',
+    TokenType.CLASS: 'classes',
+    TokenType.THIS: 'classes',
+    TokenType.SUPER: 'classes',
+    TokenType.DOT: 'classes',
+    TokenType.BREAK: 'break',
+}
+
+def unsupported_features(source: str) -> set[str]:
+    features = set()
+    previous = None
+    for token in RegexScanner(source).tokens():
+        if token.tokentype in UNSUPPORTED_TOKENS:
+            features.add(UNSUPPORTED_TOKENS[token.tokentype])
+        elif (
+            token.tokentype == TokenType.LEFT_PAREN
+            and previous in (TokenType.IDENTIFIER, TokenType.RIGHT_PAREN)
+        ):
+            features.add('calls')
+        previous = token.tokentype
+    return features
+
+def normalize(output: str) -> list[str]:
+    lines = []
+    for line in output.splitlines():
+        if line in ('True', 'False'):
+            line = line.lower()
+        elif line == 'None':
+            line = 'nil'
+        else:
+            try:
+                line = '%g' % float(line)
+            except ValueError:
+                pass
+        lines.append(line)
+    return lines
+
+def build_clox(directory: Path) -> Path:
+    binary = directory / 'clox'
+    subprocess.run(
+        ['cc', '-O2', '-DNDEBUG', '-o', str(binary), *map(str, sorted(CLOX_SOURCES.glob('*.c')))],
+        check=True,
+    )
+    return binary
+
+def run_python(source: str, backend: Backend) -> tuple[str, float]:
+    output = io.StringIO()
+    lox = Lox(backend)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        lox.run(source)
+    return output.getvalue(), time.perf_counter() - start
+
+def run_clox(binary: Path, path: Path) -> tuple[str, float]:
+    start = time.perf_counter()
+    result = subprocess.run([str(binary), str(path)], capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f'clox exited with {result.returncode}: {result.stderr.strip()}')
+    return result.stdout, seconds
+
+def compare(
+    binary: Path,
+    paths: list[Path],
+    backend: Backend,
+    repeat: int,
+) -> bool:
+    '''
+    Prints a line per program. Returns whether all outputs matched.
+    '''
+    all_match = True
+    print(f"{'program':<24}{'python s':>10}{'clox s':>10}{'ratio':>9}  result")
+    for path in paths:
+        source = path.read_text()
+        features = unsupported_features(source)
+        if features:
+            print(f"{path.name:<24}{'':>29}  skipped, uses {', '.join(sorted(features))}")
+            continue
+
+        python_output, python_seconds = run_python(source, backend)
+        clox_output, clox_seconds = run_clox(binary, path)
+        for _ in range(repeat - 1):
+            python_seconds = min(python_seconds, run_python(source, backend)[1])
+            clox_seconds = min(clox_seconds, run_clox(binary, path)[1])
+
+        expected, actual = normalize(clox_output), normalize(python_output)
+        if expected == actual:
+            result = 'same output'
+        else:
+            all_match = False
+            line = next(
+                (i for i, (a, b) in enumerate(zip(expected, actual)) if a != b),
+                min(len(expected), len(actual)),
+            )
+            result = f'DIFFERENT from output line {line + 1}'
+
+        ratio = python_seconds / clox_seconds if clox_seconds else float('inf')
+        print(f'{path.name:<24}{python_seconds:>10.4f}{clox_seconds:>10.4f}{ratio:>8.1f}x  {result}')
+    return all_match
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    argparser.add_argument('programs', nargs='*', type=Path, help='Lox files, all benchmarks and lox_scripts by default')
+    argparser.add_argument(
+        '--backend',
+        choices=[backend.value for backend in Backend],
+        default=Backend.TREE.value,
+    )
+    argparser.add_argument('--repeat', type=int, default=3, help='Best of this many runs')
+    argparser.add_argument('--clox', type=Path, help='clox binary to use instead of building one')
+    args = argparser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        binary = args.clox or build_clox(Path(directory))
+        matched = compare(binary, args.programs or DEFAULT_PROGRAMS, Backend(args.backend), args.repeat)
+
+    sys.exit(0 if matched else 1)
@@ -0,0 +1,206 @@
+'''
+Benchmark suite runner. Times every phase of running each program in
+programs/, plus a large generated program, separately:
+
+    scan       RegexScanner, to the list of tokens
+    parse      Parser
+    resolve    Resolver
+    interpret  the backend, including compiling for vm and closure
+
+Each program is run --repeat times after a warm-up run, and the median,
+90th percentile and extremes of every phase are reported. --json writes
+all of it, with the raw timings, to a file that can be kept per commit,
+and --compare prints the change of the medians against such a file.
+
+Usage, with the package installed (pip install -e .):
+
+    python benchmarks/run.py
+    python benchmarks/run.py --backend tree closure --repeat 20 --json HEAD.json
+    python benchmarks/run.py --compare HEAD.json
+'''
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from lox import __version__
+from lox.lox import Lox
+from lox.regex_scanner import RegexScanner
+from lox.parser import Parser
+from lox.enums.backend import Backend
+
+PROGRAMS_DIR = Path(__file__).parent / 'programs'
+PHASES = ['scan', 'parse', 'resolve', 'interpret']
+
+def large_source(functions: int = 2000) -> str:
+    '''
+    A big program for the front end: many small functions and classes,
+    each called once.
+    '''
+    parts = []
+    for i in range(functions):
+        parts.append(f'''
+fun f{i}(a, b) {{
+    var c = a * {i} + b;
+    if (c > {i}) {{ c = c - 1; }} else {{ c = c + 1; }}
+    return c;
+}}
+class C{i} {{
+    init(x) {{ this.x = x; }}
+    get() {{ return this.x + f{i}(1, 2); }}
+}}
+var v{i} = C{i}({i}).get();''')
+    parts.append(f'\nprint v{functions - 1};\n')
+    return ''.join(parts)
+
+def programs() -> dict[str, str]:
+    sources = {path.stem: path.read_text() for path in sorted(PROGRAMS_DIR.glob('*.lox'))}
+    sources['parse_large'] = large_source()
+    return sources
+
+def run_phases(source: str, backend: Backend) -> dict[str, float]:
+    '''
+    Runs source once, returning the seconds each phase took.
+    '''
+    lox = Lox(backend)
+    times = {}
+
+    start = time.perf_counter()
+    tokens = list(RegexScanner(source).tokens())
+    times['scan'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statements = Parser(tokens).parse()
+    times['parse'] = time.perf_counter() - start
+    if lox.had_error:
+        raise SystemExit('Syntax error in benchmark program')
+
+    start = time.perf_counter()
+    lox.resolver.resolve(*statements)
+    lox.resolver.infer_purity()
+    times['resolve'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = lox.execute(statements)
+    times['interpret'] = time.perf_counter() - start
+    if not ok:
+        raise SystemExit('Runtime error in benchmark program')
+
+    return times
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    if len(samples) > 1:
+        p90 = statistics.quantiles(samples, n=10, method='inclusive')[-1]
+    else:
+        p90 = samples[0]
+    return {
+        'median': statistics.median(samples),
+        'p90': p90,
+        'min': min(samples),
+        'max': max(samples),
+    }
+
+def benchmark(
+    sources: dict[str, str],
+    backends: list[Backend],
+    repeat: int,
+) -> dict[str, dict[str, dict[str, dict]]]:
+    '''
+    Results by program, backend and phase.
+    '''
+    results: dict[str, dict[str, dict[str, dict]]] = {}
+    for name, source in sources.items():
+        results[name] = {}
+        for backend in backends:
+            run_phases(source, backend)  # Warm-up.
+            samples: dict[str, list[float]] = {phase: [] for phase in PHASES}
+            for _ in range(repeat):
+                for phase, seconds in run_phases(source, backend).items():
+                    samples[phase].append(seconds)
+            results[name][backend.value] = {
+                phase: {**summarize(samples[phase]), 'samples': samples[phase]}
+                for phase in PHASES
+            }
+    return results
+
+def print_results(results: dict[str, dict[str, dict[str, dict]]]) -> None:
+    print(f"{'program':<14}{'backend':<9}" + ''.join(
+        f'{phase + " ms":>22}' for phase in PHASES
+    ))
+    print(f"{'':<23}" + ''.join(f"{'median':>12}{'p90':>10}" for _ in PHASES))
+    for name, by_backend in results.items():
+        for backend, by_phase in by_backend.items():
+            print(f'{name:<14}{backend:<9}' + ''.join(
+                f"{by_phase[phase]['median'] * 1000:>12.2f}{by_phase[phase]['p90'] * 1000:>10.2f}"
+                for phase in PHASES
+            ))
+
+def print_comparison(
+    results: dict[str, dict[str, dict[str, dict]]],
+    baseline: dict[str, dict[str, dict[str, dict]]],
+) -> None:
+    '''
+    Prints new median / old median per phase, for what's in both.
+    '''
+    print(f"\n{'program':<14}{'backend':<9}" + ''.join(f'{phase:>12}' for phase in PHASES))
+    for name, by_backend in results.items():
+        for backend, by_phase in by_backend.items():
+            old = baseline.get(name, {}).get(backend)
+            if old is None:
+                continue
+            ratios = [
+                by_phase[phase]['median'] / old[phase]['median']
+                if old[phase]['median'] else float('nan')
+                for phase in PHASES
+            ]
+            print(f'{name:<14}{backend:<9}' + ''.join(f'{ratio:>11.2f}x' for ratio in ratios))
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    argparser.add_argument(
+        '--backend',
+        nargs='+',
+        choices=[backend.value for backend in Backend],
+        default=[Backend.TREE.value],
+    )
+    argparser.add_argument('--repeat', type=int, default=5, help='Timed runs per program')
+    argparser.add_argument('--program', nargs='+', help='Only run these programs')
+    argparser.add_argument('--json', metavar='PATH', help='Write the results to PATH')
+    argparser.add_argument('--compare', metavar='PATH', help='Results to compare against')
+    args = argparser.parse_args()
+
+    sys.setrecursionlimit(10_000)
+    sources = programs()
+    if args.program:
+        unknown = set(args.program) - set(sources)
+        if unknown:
+            argparser.error(f"Unknown programs: {', '.join(sorted(unknown))}")
+        sources = {name: sources[name] for name in args.program}
+
+    results = benchmark(sources, [Backend(name) for name in args.backend], args.repeat)
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print_comparison(results, json.load(file)['results'])
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(
+                {
+                    'lox': __version__,
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'repeat': args.repeat,
+                    'results': results,
+                },
+                file,
+                indent=2,
+                sort_keys=True,
+            )
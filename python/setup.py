@@ -6,5 +6,6 @@ setup(
     packages=find_packages(where="src"),
     package_dir={"": "src"},
     install_requires=[],
+    extras_require={"numpy": ["numpy"]},  # Faster Array arithmetic.
     python_requires=">=3.12",
 ) 
\ No newline at end of file
@@ -1,3 +1,5 @@
 """
 Lox programming language implementation in Python
 """
+
+__version__ = '0.1'
@@ -1,12 +1,17 @@
+# Generated by tool/generate_ast.py, edit the definitions there instead.
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from lox.token.token import Token
+from lox.shape import PropertyCache
 
 class Expr(ABC):
     """Base class for all expression types in the Lox language."""
+    __slots__ = ()
+    tag: ClassVar[int]  # Position in the definitions, stored by the cache.
+    __match_args__: ClassVar[tuple[str, ...]]  # The fields.
+
     @abstractmethod
     def accept[T](self, visitor: Visitor[T]) -> T:
         """Accept a visitor to process this expression.
@@ -19,6 +24,12 @@ class Expr(ABC):
         """
         pass
 
+    def __repr__(self) -> str:
+        fields = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.__match_args__
+        )
+        return f'{type(self).__name__}({fields})'
+
     class Visitor[T](ABC):
         @abstractmethod
         def visit_binary_expr(self, expr: Binary) -> T:
@@ -67,10 +78,10 @@ class Expr(ABC):
 
         @abstractmethod
         def visit_logical_expr(self, expr: Logical) -> T:
-            """Process a unary expression.
+            """Process a logical expression.
             
             Args:
-                expr: The unary expression to process.
+                expr: The logical expression to process.
             """
             pass
 
@@ -94,7 +105,7 @@ class Expr(ABC):
 
         @abstractmethod
         def visit_unary_expr(self, expr: Unary) -> T:
-            """Process a unary expression.
+            """Process an unary expression.
             
             Args:
                 expr: The unary expression to process.
@@ -112,110 +123,152 @@ class Expr(ABC):
 
         @abstractmethod
         def visit_assign_expr(self, expr: Assign) -> T:
-            """Process a assign expression.
+            """Process an assign expression.
             
             Args:
                 expr: The assign expression to process.
             """
             pass
 
-#
-# Side note: NamedTuples would probably be preferrable here, but would result
-# in a clash of metaclasses.
-#
-# One would be to to combine NamedTypleMeta and ABCMeta.
-#
-@dataclass(frozen=True)
+
+
 class Binary(Expr):
     """Represents a binary operation expression."""
-    left: Expr
-    operator: Token
-    right: Expr
+    __slots__ = ('left', 'operator', 'right')
+    __match_args__ = ('left', 'operator', 'right')
+    tag = 0
+
+    def __init__(self, left: Expr, operator: Token, right: Expr):
+        self.left = left
+        self.operator = operator
+        self.right = right
 
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_binary_expr(self)
 
-@dataclass(frozen=True)
 class Call(Expr):
-    callee: Expr
-    arguments: list[Expr]
-    paren: Token  # To report potential runtime errors.
-    
+    __slots__ = ('callee', 'arguments', 'paren')
+    __match_args__ = ('callee', 'arguments', 'paren')
+    tag = 1
+
+    def __init__(self, callee: Expr, arguments: list[Expr], paren: Token):
+        self.callee = callee
+        self.arguments = arguments
+        self.paren = paren  # To report potential runtime errors.
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_call_expr(self)
 
-@dataclass(frozen=True)
 class Get(Expr):
-    obj: Expr
-    name: Token
+    __slots__ = ('obj', 'name', 'cache')
+    __match_args__ = ('obj', 'name')
+    tag = 2
+
+    def __init__(self, obj: Expr, name: Token):
+        self.obj = obj
+        self.name = name
+        self.cache: PropertyCache = PropertyCache(name.lexeme)
 
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_get_expr(self)
 
-@dataclass(frozen=True)
 class Grouping(Expr):
     """Represents a parenthesized expression."""
-    expression: Expr
-    
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)
+    tag = 3
+
+    def __init__(self, expression: Expr):
+        self.expression = expression
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_grouping_expr(self)
 
-@dataclass(frozen=True)
 class Literal(Expr):
     """Represents a literal value expression."""
-    value: Any
-    
+    __slots__ = ('value',)
+    __match_args__ = ('value',)
+    tag = 4
+
+    def __init__(self, value: Any):
+        self.value = value
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_literal_expr(self)
 
-@dataclass(frozen=True)
 class Logical(Expr):
-    """Represents a literal value expression."""
-    left: Expr
-    operator: Token
-    right: Expr
+    """Represents a logical and/or expression."""
+    __slots__ = ('left', 'operator', 'right')
+    __match_args__ = ('left', 'operator', 'right')
+    tag = 5
+
+    def __init__(self, left: Expr, operator: Token, right: Expr):
+        self.left = left
+        self.operator = operator
+        self.right = right
 
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_logical_expr(self)
 
-@dataclass(frozen=True)
 class Set(Expr):
-    obj: Expr
-    name: Token
-    value: Expr
+    __slots__ = ('obj', 'name', 'value', 'cache')
+    __match_args__ = ('obj', 'name', 'value')
+    tag = 6
+
+    def __init__(self, obj: Expr, name: Token, value: Expr):
+        self.obj = obj
+        self.name = name
+        self.value = value
+        self.cache: PropertyCache = PropertyCache(name.lexeme)
 
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_set_expr(self)
 
-@dataclass(frozen=True)
 class This(Expr):
-    keyword: Token
-    
+    __slots__ = ('keyword',)
+    __match_args__ = ('keyword',)
+    tag = 7
+
+    def __init__(self, keyword: Token):
+        self.keyword = keyword
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_this_expr(self)
 
-@dataclass(frozen=True)
 class Unary(Expr):
     """Represents a unary operation expression."""
-    operator: Token
-    right: Expr
-    
+    __slots__ = ('operator', 'right')
+    __match_args__ = ('operator', 'right')
+    tag = 8
+
+    def __init__(self, operator: Token, right: Expr):
+        self.operator = operator
+        self.right = right
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_unary_expr(self)
 
-@dataclass(frozen=True)
 class Variable(Expr):
-    """Represents a unary operation expression."""
-    name: Token
-    
+    """Represents a variable expression."""
+    __slots__ = ('name',)
+    __match_args__ = ('name',)
+    tag = 9
+
+    def __init__(self, name: Token):
+        self.name = name
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_variable_expr(self)
 
-@dataclass(frozen=True)
 class Assign(Expr):
-    """Represents a unary operation expression."""
-    name: Token
-    value: Expr
-    
+    """Represents an assignment expression."""
+    __slots__ = ('name', 'value')
+    __match_args__ = ('name', 'value')
+    tag = 10
+
+    def __init__(self, name: Token, value: Expr):
+        self.name = name
+        self.value = value
+
     def accept[T](self, visitor: Expr.Visitor[T]) -> T:
         return visitor.visit_assign_expr(self)
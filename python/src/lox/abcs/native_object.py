@@ -0,0 +1,64 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, ClassVar
+
+from lox.abcs.lox_callable import LoxCallable
+from lox.exceptions.errors import LoxException, LoxArgumentError, LoxTypeError
+if TYPE_CHECKING: from lox.interpreter import Interpreter
+
+class NativeObject:
+    '''
+    A value implemented in Python that Lox code uses through its methods,
+    like the arrays Array() makes. The backends look obj.name up here when
+    obj isn't a LoxInstance.
+    '''
+    __slots__ = ()
+
+    # Names of the methods Lox code can call, with their arity.
+    methods: ClassVar[dict[str, int]] = {}
+
+    def lookup(self, name: str) -> NativeMethod:
+        arity = self.methods.get(name)
+        if arity is None:
+            raise LoxException(f"Undefined attribute {name} on {self}")
+        return NativeMethod(name, getattr(self, name), arity)
+
+    @staticmethod
+    def integer(value: Any, what: str) -> int:
+        '''
+        The whole number a Lox number stands for, like a size or an index.
+        '''
+        if type(value) is not float and type(value) is not int:
+            raise LoxTypeError(f'{what} must be a number')
+        if not float(value).is_integer():
+            raise LoxArgumentError(f'{what} {value} is not a whole number')
+        return int(value)
+
+    def index(self, value: Any, length: int) -> int:
+        index = self.integer(value, 'Index')
+        if not 0 <= index < length:
+            raise LoxArgumentError(f'Index {value} out of range for length {length}')
+        return index
+
+class NativeMethod(LoxCallable):
+    '''
+    A method of a NativeObject, bound to it.
+    '''
+    __slots__ = ('name', 'function', 'parameters')
+
+    def __init__(self, name: str, function: Callable[..., Any], parameters: int):
+        self.name = name
+        self.function = function
+        self.parameters = parameters
+
+    def arity(self) -> int:
+        return self.parameters
+
+    def call(
+        self,
+        interpreter: Interpreter,
+        arguments: list[Any]
+    ) -> Any:
+        return self.function(*arguments)
+
+    def __str__(self):
+        return f'<native method {self.name}>'
@@ -1,32 +1,42 @@
+# Generated by tool/generate_ast.py, edit the definitions there instead.
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from lox.token.token import Token
 from lox.abcs.expr import Expr
 
 class Stmt(ABC):
-    """Base class for all expression types in the Lox language."""
+    """Base class for all statement types in the Lox language."""
+    __slots__ = ()
+    tag: ClassVar[int]  # Position in the definitions, stored by the cache.
+    __match_args__: ClassVar[tuple[str, ...]]  # The fields.
+
     @abstractmethod
     def accept[T](self, visitor: Visitor[T]) -> T:
-        """Accept a visitor to process this expression.
+        """Accept a visitor to process this statement.
         
         Args:
-            visitor: The visitor to process this expression.
+            visitor: The visitor to process this statement.
         
         Returns:
             The result of the visitor's processing.
         """
         pass
 
+    def __repr__(self) -> str:
+        fields = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.__match_args__
+        )
+        return f'{type(self).__name__}({fields})'
+
     class Visitor[T](ABC):
         @abstractmethod
         def visit_expression_stmt(self, stmt: Expression) -> T:
             """Process an expression statement.
             
             Args:
-                expr: The expression statement to process.
+                stmt: The expression statement to process.
             """
             pass
 
@@ -35,7 +45,7 @@ class Stmt(ABC):
             """Process a print statement.
             
             Args:
-                expr: The print statement to process.
+                stmt: The print statement to process.
             """
             pass
 
@@ -44,7 +54,7 @@ class Stmt(ABC):
             """Process a function statement.
             
             Args:
-                expr: The function statement to process.
+                stmt: The function statement to process.
             """
             pass
 
@@ -53,7 +63,7 @@ class Stmt(ABC):
             """Process a return statement.
             
             Args:
-                expr: The return statement to process.
+                stmt: The return statement to process.
             """
             pass
 
@@ -62,7 +72,7 @@ class Stmt(ABC):
             """Process an if statement.
             
             Args:
-                expr: The if statement to process.
+                stmt: The if statement to process.
             """
             pass
 
@@ -71,7 +81,7 @@ class Stmt(ABC):
             """Process a while statement.
             
             Args:
-                expr: The while statement to process.
+                stmt: The while statement to process.
             """
             pass
 
@@ -80,7 +90,7 @@ class Stmt(ABC):
             """Process a break statement.
             
             Args:
-                expr: The break statement to process.
+                stmt: The break statement to process.
             """
             pass
 
@@ -89,7 +99,7 @@ class Stmt(ABC):
             """Process a var statement.
             
             Args:
-                expr: The var statement to process.
+                stmt: The var statement to process.
             """
             pass
 
@@ -98,92 +108,133 @@ class Stmt(ABC):
             """Process a block statement.
             
             Args:
-                expr: The block statement to process.
+                stmt: The block statement to process.
             """
             pass
 
         @abstractmethod
         def visit_class_stmt(self, stmt: Class) -> T:
+            """Process a class statement.
+            
+            Args:
+                stmt: The class statement to process.
+            """
             pass
 
-#
-# Side note: NamedTuples would probably be preferrable here, but would result
-# in a clash of metaclasses.
-#
-# One would be to to combine NamedTypleMeta and ABCMeta.
-#
-@dataclass(frozen=True)
+
+
 class Expression(Stmt):
-    expression: Expr
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)
+    tag = 0
+
+    def __init__(self, expression: Expr):
+        self.expression = expression
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_expression_stmt(self)
 
-@dataclass(frozen=True)
 class Print(Stmt):
-    expression: Expr
+    __slots__ = ('expression',)
+    __match_args__ = ('expression',)
+    tag = 1
+
+    def __init__(self, expression: Expr):
+        self.expression = expression
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_print_stmt(self)
-    
-@dataclass(frozen=True)
+
 class Function(Stmt):
-    name: Token
-    params: list[Token]
-    body: list[Stmt]
+    __slots__ = ('name', 'params', 'body', 'pure')
+    __match_args__ = ('name', 'params', 'body')
+    tag = 2
+
+    def __init__(self, name: Token, params: list[Token], body: list[Stmt]):
+        self.name = name
+        self.params = params
+        self.body = body
+        self.pure: bool | None = None
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_function_stmt(self)
 
-@dataclass(frozen=True)
 class Return(Stmt):
-    keyword: Token
-    value: Expr | None
-    
+    __slots__ = ('keyword', 'value')
+    __match_args__ = ('keyword', 'value')
+    tag = 3
+
+    def __init__(self, keyword: Token, value: Expr | None):
+        self.keyword = keyword
+        self.value = value
+
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_return_stmt(self)
 
-@dataclass(frozen=True)
 class If(Stmt):
-    condition: Expr
-    then_branch: Stmt
-    else_branch: Stmt | None  # else statements are optional, ya know!
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+    __match_args__ = ('condition', 'then_branch', 'else_branch')
+    tag = 4
+
+    def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt | None):
+        self.condition = condition
+        self.then_branch = then_branch
+        self.else_branch = else_branch  # else statements are optional, ya know!
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_if_stmt(self)
 
-@dataclass(frozen=True)
 class While(Stmt):
-    condition: Expr
-    body: Stmt
+    __slots__ = ('condition', 'body')
+    __match_args__ = ('condition', 'body')
+    tag = 5
+
+    def __init__(self, condition: Expr, body: Stmt):
+        self.condition = condition
+        self.body = body
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_while_stmt(self)
 
-@dataclass(frozen=True)
 class Break(Stmt):
+    __slots__ = ()
+    __match_args__ = ()
+    tag = 6
+
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_break_stmt(self)
 
-@dataclass(frozen=True)
 class Var(Stmt):
-    name: Token
-    initializer: Expr
+    __slots__ = ('name', 'initializer')
+    __match_args__ = ('name', 'initializer')
+    tag = 7
+
+    def __init__(self, name: Token, initializer: Expr):
+        self.name = name
+        self.initializer = initializer
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_var_stmt(self)
 
-@dataclass(frozen=True)
 class Block(Stmt):
-    statements: list[Stmt]
+    __slots__ = ('statements',)
+    __match_args__ = ('statements',)
+    tag = 8
+
+    def __init__(self, statements: list[Stmt]):
+        self.statements = statements
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
         return visitor.visit_block_stmt(self)
 
-@dataclass(frozen=True)
 class Class(Stmt):
-    name: Token
-    methods: list[Function]
+    __slots__ = ('name', 'methods')
+    __match_args__ = ('name', 'methods')
+    tag = 9
+
+    def __init__(self, name: Token, methods: list[Function]):
+        self.name = name
+        self.methods = methods
 
     def accept[T](self, visitor: Stmt.Visitor[T]) -> T:
-        return visitor.visit_class_stmt(self)
\ No newline at end of file
+        return visitor.visit_class_stmt(self)
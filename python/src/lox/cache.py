@@ -0,0 +1,222 @@
+'''
+On-disk cache of parsed and resolved programs, so running an unchanged
+script skips the Scanner, Parser and Resolver. Like __pycache__, the
+cache lives next to the script:
+
+    fib.lox -> __loxcache__/fib.loxc
+
+A .loxc file is a fixed header followed by a zlib compressed marshal
+payload:
+
+    magic      4 bytes   b'LOXC'
+    format     2 bytes   FORMAT_VERSION, little endian
+    key       32 bytes   sha256 of the interpreter version and the source
+    checksum   4 bytes   crc32 of the compressed payload
+    length     4 bytes   compressed payload size
+
+The payload is (tokens, statements). Every distinct Token is stored once
+in tokens and referenced by its index. A node is a tuple of its kind,
+its resolution and its fields in __match_args__ order, where the kind is the
+node's tag (plus STMT_KIND for statements). The resolution is the
+(distance, slot) pair of an expression, or the (declaration slot, frame
+size, tail call, pure) tuple of a statement, or None if it has neither.
+
+Any mismatch in the header or a payload that doesn't decode makes load
+return None, and the caller parses again and overwrites the file.
+'''
+from __future__ import annotations
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+from lox import __version__
+from lox.abcs.expr import Expr
+from lox.abcs.stmt import Stmt, Function
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+if TYPE_CHECKING: from lox.interpreter import Interpreter
+
+CACHE_DIR = '__loxcache__'
+MAGIC = b'LOXC'
+FORMAT_VERSION = 3
+HEADER = struct.Struct('<4sH32sII')
+
+# Node classes in tag order, statements after expressions.
+EXPR_CLASSES = tuple(sorted(Expr.__subclasses__(), key=lambda node: node.tag))
+STMT_CLASSES = tuple(sorted(Stmt.__subclasses__(), key=lambda node: node.tag))
+STMT_KIND = len(EXPR_CLASSES)
+NODE_CLASSES = EXPR_CLASSES + STMT_CLASSES
+
+# The version of everything a payload depends on: the interpreter, the
+# node definitions and the marshal format.
+VERSION_TAG = (
+    f'lox {__version__} format {FORMAT_VERSION} '
+    f'marshal {marshal.version} python {sys.version_info[0]}.{sys.version_info[1]} '
+    f'nodes {[(node.__name__, node.__match_args__) for node in NODE_CLASSES]}'
+).encode()
+
+def cache_path(path: str) -> Path:
+    script = Path(path)
+    return script.parent / CACHE_DIR / f'{script.stem}.loxc'
+
+def source_key(source: str) -> bytes:
+    return hashlib.sha256(VERSION_TAG + source.encode()).digest()
+
+def load(path: str, source: str, interpreter: Interpreter) -> list[Stmt] | None:
+    '''
+    Returns the cached statements for source, with their resolutions
+    registered in interpreter, or None if there's no valid cache.
+    '''
+    try:
+        data = cache_path(path).read_bytes()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+
+    magic, format_version, key, checksum, length = HEADER.unpack_from(data)
+    payload = data[HEADER.size:]
+    if (
+        magic != MAGIC
+        or format_version != FORMAT_VERSION
+        or key != source_key(source)
+        or length != len(payload)
+        or checksum != zlib.crc32(payload)
+    ):
+        return None
+
+    try:
+        decoder = Decoder(*marshal.loads(zlib.decompress(payload)))
+        statements = [decoder.decode(statement) for statement in decoder.statements]
+    except Exception:
+        # Whatever a payload that isn't a program raises, it's a miss.
+        return None
+
+    decoder.register(interpreter)
+    return statements
+
+def store(path: str, source: str, statements: list[Stmt], interpreter: Interpreter) -> None:
+    '''
+    Writes the resolved statements to the cache, if the directory can be
+    written to. The file is replaced atomically, so a concurrent run never
+    sees half of it.
+    '''
+    encoder = Encoder(interpreter)
+    encoded = [encoder.encode(statement) for statement in statements]
+    payload = zlib.compress(marshal.dumps((encoder.tokens, encoded)))
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        source_key(source),
+        zlib.crc32(payload),
+        len(payload),
+    )
+
+    target = cache_path(path)
+    temporary = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+    try:
+        target.parent.mkdir(exist_ok=True)
+        temporary.write_bytes(header + payload)
+        os.replace(temporary, target)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+
+class Encoder:
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.tokens: list[tuple[int, str, Any, int]] = []
+        self.token_indices: dict[Token, int] = {}
+
+    def encode(self, value: Any) -> Any:
+        if isinstance(value, Expr):
+            return (value.tag, self.interpreter.locals.get(value), *self.fields(value))
+        if isinstance(value, Stmt):
+            return (STMT_KIND + value.tag, self.resolution(value), *self.fields(value))
+        if isinstance(value, Token):
+            return self.token(value)
+        if isinstance(value, list):
+            return [self.encode(item) for item in value]
+        return value  # Literal values and absent optional nodes.
+
+    def fields(self, node: Expr | Stmt) -> list[Any]:
+        return [self.encode(getattr(node, name)) for name in node.__match_args__]
+
+    def resolution(
+        self,
+        stmt: Stmt,
+    ) -> tuple[int | None, int | None, bool, bool | None] | None:
+        slot = self.interpreter.declarations.get(stmt)
+        size = self.interpreter.frame_sizes.get(stmt)
+        tail_call = stmt in self.interpreter.tail_calls
+        pure = stmt.pure if isinstance(stmt, Function) else None
+        if slot is None and size is None and not tail_call and pure is None:
+            return None
+        return slot, size, tail_call, pure
+
+    def token(self, token: Token) -> int:
+        index = self.token_indices.get(token)
+        if index is None:
+            index = self.token_indices[token] = len(self.tokens)
+            self.tokens.append(
+                (token.tokentype.value, token.lexeme, token.literal, token.line)
+            )
+        return index
+
+class Decoder:
+    def __init__(self, tokens: list[tuple[int, str, Any, int]], statements: list[Any]):
+        self.tokens = [
+            Token(TokenType(tokentype), lexeme, literal, line)
+            for tokentype, lexeme, literal, line in tokens
+        ]
+        self.statements = statements
+
+        # Collected first, so a corrupt payload leaves the interpreter alone.
+        self.locals: list[tuple[Expr, int, int]] = []
+        self.declarations: list[tuple[Stmt, int]] = []
+        self.frame_sizes: list[tuple[Stmt, int]] = []
+        self.tail_calls: list[Stmt] = []
+
+    def decode(self, value: Any) -> Any:
+        if type(value) is tuple:
+            return self.node(*value)
+        if type(value) is int:
+            return self.tokens[value]
+        if type(value) is list:
+            return [self.decode(item) for item in value]
+        return value
+
+    def node(self, kind: int, resolution: Any, *fields: Any) -> Expr | Stmt:
+        node = NODE_CLASSES[kind](*[self.decode(field) for field in fields])
+
+        if resolution is not None:
+            if kind < STMT_KIND:
+                distance, slot = resolution
+                self.locals.append((node, distance, slot))
+            else:
+                slot, size, tail_call, pure = resolution
+                if slot is not None:
+                    self.declarations.append((node, slot))
+                if size is not None:
+                    self.frame_sizes.append((node, size))
+                if tail_call:
+                    self.tail_calls.append(node)
+                if pure is not None:
+                    node.pure = pure
+
+        return node
+
+    def register(self, interpreter: Interpreter) -> None:
+        for expr, distance, slot in self.locals:
+            interpreter.resolve(expr, distance, slot)
+        for stmt, slot in self.declarations:
+            interpreter.resolve_declaration(stmt, slot)
+        for stmt, size in self.frame_sizes:
+            interpreter.resolve_frame(stmt, size)
+        for stmt in self.tail_calls:
+            interpreter.resolve_tail_call(stmt)
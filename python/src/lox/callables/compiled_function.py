@@ -0,0 +1,81 @@
+from __future__ import annotations
+from typing import Any, Callable, TYPE_CHECKING
+from dataclasses import dataclass
+
+from lox.abcs.lox_callable import LoxCallable
+from lox.enums.completion import Completion
+if TYPE_CHECKING:
+    from lox.callables.lox_class import LoxInstance
+
+# A frame is a plain list: the enclosing frame in slot 0, then the
+# variables of the scope in the order they were declared.
+Frame = list[Any]
+
+@dataclass(eq=False)
+class FunctionPrototype:
+    '''
+    Everything about a function that's known at compile time.
+    '''
+    name: str
+    arity: int
+    frame_size: int  # Parameters and locals declared directly in the body.
+    body: Callable[[Frame], Any]
+    is_initializer: bool
+
+class CompiledFunction(LoxCallable):
+    '''
+    Function value of the closure compiling backend. The tree-walker's
+    LoxFunction keeps a Namespace as closure, this one keeps a Frame.
+    '''
+    __slots__ = ('prototype', 'closure')
+
+    def __init__(self, prototype: FunctionPrototype, closure: Frame):
+        self.prototype = prototype
+        self.closure = closure
+
+    def arity(self) -> int:
+        return self.prototype.arity
+
+    def call(
+        self,
+        interpreter: Any,
+        arguments: list[Any]
+    ) -> Any:
+        return self.run(interpreter, self.closure, arguments)
+
+    def invoke(
+        self,
+        interpreter: Any,
+        instance: LoxInstance,
+        arguments: list[Any]
+    ) -> Any:
+        # Same layout as the class scope in the compiler: 'this' in slot 1.
+        return self.run(interpreter, [self.closure, instance], arguments)
+
+    def run(self, interpreter: Any, closure: Frame, arguments: list[Any]) -> Any:
+        prototype = self.prototype
+
+        # Tail calls come back as a Completion.TAIL_CALL and are run in
+        # this loop, in place of the function that made them.
+        while True:
+            frame = [closure, *arguments]
+            frame.extend([None] * (prototype.frame_size - prototype.arity))
+
+            # A body without return may also hand back an expression's value.
+            completion = prototype.body(frame)
+
+            if prototype.is_initializer:
+                return closure[1]
+
+            if completion is Completion.RETURN:
+                return interpreter.return_value
+            if completion is not Completion.TAIL_CALL:
+                return None
+
+            prototype, closure, arguments = interpreter.pending_call
+
+    def bind(self, instance: LoxInstance) -> CompiledFunction:
+        return CompiledFunction(self.prototype, [self.closure, instance])
+
+    def __str__(self) -> str:
+        return f'<fn {self.prototype.name}>'
@@ -1,9 +1,11 @@
 from __future__ import annotations
+import sys
 from typing import TYPE_CHECKING, Any
 from dataclasses import dataclass, field
 
 from lox.exceptions.errors import LoxException
 from lox.token.token import Token
+from lox.shape import Shape
 from lox.abcs.lox_callable import LoxCallable
 from lox.callables.lox_function import LoxFunction
 if TYPE_CHECKING: from lox.interpreter import Interpreter
@@ -12,16 +14,29 @@ if TYPE_CHECKING: from lox.interpreter import Interpreter
 class LoxClass(LoxCallable):
     name: str
     methods: dict[str, LoxFunction]
+    # Where the shapes of this class' instances start out.
+    shape: Shape = field(default_factory=Shape, repr=False, compare=False)
 
     def call(
         self,
         interpreter: Interpreter,
         arguments: list[Any],
+    ) -> Any:
+        # Only the tree-walker has a profiler.
+        profiler = getattr(interpreter, 'profiler', None)
+        if profiler is None:
+            return self.instantiate(interpreter, arguments)
+        return profiler.call_class(self, interpreter, arguments)
+
+    def instantiate(
+        self,
+        interpreter: Interpreter,
+        arguments: list[Any],
     ) -> Any:
         instance = LoxInstance(self)
         initializer = self.find_method("init")
         if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+            initializer.invoke(interpreter, instance, arguments)
         return instance
     
     def arity(self) -> int:
@@ -36,20 +51,56 @@ class LoxClass(LoxCallable):
         
         return None
 
-@dataclass
 class LoxInstance:
-    klass: LoxClass
-    fields: dict[Token, Any] = field(default_factory=dict)
+    '''
+    The field values live in a list, laid out by the instance's Shape.
+    Get and Set nodes access them through their PropertyCache, get and
+    set are the uncached way.
+    '''
+    __slots__ = ('klass', 'shape', 'values', 'bound_methods')
+
+    def __init__(self, klass: LoxClass):
+        self.klass = klass
+        self.shape = klass.shape
+        self.values: list[Any] = []
+        self.bound_methods: dict[str, Any] | None = None
+
+    @property
+    def fields(self) -> dict[str, Any]:
+        return {name: self.values[index] for name, index in self.shape.indices.items()}
+
+    def __repr__(self) -> str:
+        return f'LoxInstance(klass={self.klass!r}, fields={self.fields!r})'
 
     def get(self, name: Token) -> Any:
-        if name in self.fields:
-            return self.fields[name]
+        index = self.shape.indices.get(name.lexeme)
+        if index is not None:
+            return self.values[index]
         
         method = self.klass.find_method(name.lexeme)
         if method is not None:
-            return method.bind(self)
+            return self.bind(name.lexeme, method)
         
-        raise LoxException(f"Undefined attribute {name} on {self}")
+        raise LoxException(f"Undefined attribute {name.lexeme} on {self}")
+
+    def bind(self, name: str, method: Any) -> Any:
+        '''
+        Binds a method of the class to the instance. Bound methods are kept,
+        so getting one again, e.g. to store it somewhere, doesn't allocate.
+        Calls like instance.method() don't bind at all, see invoke.
+        '''
+        if self.bound_methods is None:
+            self.bound_methods = {}
+
+        bound = self.bound_methods.get(name)
+        if bound is None:
+            bound = self.bound_methods[name] = method.bind(self)
+        return bound
     
     def set(self, name: Token, value: Any):
-        self.fields[name] = value
+        index = self.shape.indices.get(name.lexeme)
+        if index is None:
+            self.shape = self.shape.with_field(sys.intern(name.lexeme))
+            self.values.append(value)
+        else:
+            self.values[index] = value
@@ -4,8 +4,8 @@ from dataclasses import dataclass
 
 from lox.abcs.lox_callable import LoxCallable
 from lox.abcs.stmt import Function
-from lox.namespace import Namespace
-from lox.control_flow_exceptions.return_exception import Return
+from lox.frame import Frame
+from lox.enums.completion import Completion
 if TYPE_CHECKING:
     from lox.interpreter import Interpreter
     from lox.callables.lox_class import LoxInstance
@@ -13,7 +13,7 @@ if TYPE_CHECKING:
 @dataclass
 class LoxFunction(LoxCallable):
     declaration: Final[Function]
-    closure: Final[Namespace]
+    closure: Final[Frame | None]  # None for functions declared globally.
     is_initializer: Final[bool]
 
     def arity(self) -> int:
@@ -24,37 +24,82 @@ class LoxFunction(LoxCallable):
         interpreter: Interpreter,
         arguments: list[Any]
     ) -> Any:
-        # We put the closure as the enclosing namespace.
-        namespace = Namespace(self.closure)
+        return self.run(interpreter, self.closure, arguments)
 
-        n_params = len(self.declaration.params)
-        for i in range(n_params):
-            namespace[
-                self.declaration.params[i].lexeme
-            ] = arguments[i]
+    def invoke(
+        self,
+        interpreter: Interpreter,
+        instance: LoxInstance,
+        arguments: list[Any]
+    ) -> Any:
+        '''
+        Calls the function as a method of instance, without creating the
+        bound LoxFunction that bind would.
+        '''
+        return self.run(interpreter, self.this_frame(instance), arguments)
+
+    def run(
+        self,
+        interpreter: Interpreter,
+        closure: Frame | None,
+        arguments: list[Any]
+    ) -> Any:
+        if interpreter.profiler is None:
+            return self.execute(interpreter, closure, arguments)
+        return interpreter.profiler.run_function(self, interpreter, closure, arguments)
 
-        try:
-            interpreter.execute_block(
-                self.declaration.body,
-                namespace
-            )
-        except Return as ret:
-            if self.is_initializer:
-                return self.closure["this"]
+    def execute(
+        self,
+        interpreter: Interpreter,
+        closure: Frame | None,
+        arguments: list[Any]
+    ) -> Any:
+        function = self
 
-            return ret.value
+        # Tail calls come back as a Completion.TAIL_CALL and are run in
+        # this loop, in place of the function that made them.
+        while True:
+            if interpreter.transpiler is not None:
+                compiled = interpreter.transpiler.lookup(function.declaration)
+                if compiled is not None:
+                    value = compiled(closure, *arguments)
+                    if function.is_initializer:
+                        return closure.slots[0]
+                    if value is not Completion.TAIL_CALL:
+                        return value
+                    function, closure, arguments = interpreter.pending_call
+                    if interpreter.profiler is not None:
+                        interpreter.profiler.tail_call(function)
+                    continue
 
-        if self.is_initializer:
-            return self.closure["this"]
+            # We put the closure as the enclosing frame. The parameters are
+            # the first slots of the function's scope.
+            frame = Frame(closure, interpreter.frame_sizes[function.declaration])
+            frame.slots[:len(arguments)] = arguments
 
-        return None
+            completion = interpreter.execute_block(function.declaration.body, frame)
 
-    def bind(self, instance: LoxInstance):
-        namespace = Namespace(self.closure)
-        namespace["this"] = instance
+            if function.is_initializer:
+                return closure.slots[0]  # 'this', see this_frame.
 
+            if completion is Completion.RETURN:
+                return interpreter.return_value
+            if completion is not Completion.TAIL_CALL:
+                return None
+
+            function, closure, arguments = interpreter.pending_call
+            if interpreter.profiler is not None:
+                interpreter.profiler.tail_call(function)
+
+    def this_frame(self, instance: LoxInstance) -> Frame:
+        # Same as the scope the Resolver creates for a class: just 'this'.
+        frame = Frame(self.closure, 1)
+        frame.slots[0] = instance
+        return frame
+
+    def bind(self, instance: LoxInstance):
         return LoxFunction(
             self.declaration,
-            namespace,
+            self.this_frame(instance),
             self.is_initializer
         )
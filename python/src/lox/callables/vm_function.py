@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import Any, TYPE_CHECKING
+from dataclasses import dataclass, field
+
+from lox.abcs.lox_callable import LoxCallable
+from lox.chunk import Chunk
+if TYPE_CHECKING:
+    from lox.vm import VM
+    from lox.callables.lox_class import LoxInstance
+
+@dataclass(eq=False)
+class VMFunction:
+    '''
+    A compiled function. Only the closure wrapping it is visible to
+    Lox code, this is just the code and the metadata needed to call it.
+    '''
+    name: str
+    arity: int = 0
+    chunk: Chunk = field(default_factory=Chunk)
+    upvalue_count: int = 0
+
+    def __str__(self) -> str:
+        if not self.name:
+            return '<script>'
+        return f'<fn {self.name}>'
+
+class Upvalue:
+    '''
+    A captured variable. While open it points into the VM stack, when
+    the variable goes out of scope the value is moved into a cell of its
+    own. Either way the value lives at cell[index], so reading an upvalue
+    never has to check which state it's in.
+    '''
+    __slots__ = ('cell', 'index')
+
+    def __init__(self, cell: list[Any], index: int):
+        self.cell = cell
+        self.index = index
+
+    def close(self) -> None:
+        self.cell = [self.cell[self.index]]
+        self.index = 0
+
+class VMClosure(LoxCallable):
+    __slots__ = ('function', 'upvalues')
+
+    def __init__(self, function: VMFunction, upvalues: list[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    def arity(self) -> int:
+        return self.function.arity
+
+    def call(
+        self,
+        interpreter: VM,
+        arguments: list[Any]
+    ) -> Any:
+        # Only used when called from outside the VM loop, e.g. by natives.
+        return interpreter.call(self, arguments)
+
+    def invoke(
+        self,
+        interpreter: VM,
+        instance: LoxInstance,
+        arguments: list[Any]
+    ) -> Any:
+        return interpreter.call(VMBoundMethod(instance, self), arguments)
+
+    def bind(self, instance: LoxInstance) -> VMBoundMethod:
+        return VMBoundMethod(instance, self)
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+class VMBoundMethod(LoxCallable):
+    __slots__ = ('receiver', 'method')
+
+    def __init__(self, receiver: LoxInstance, method: VMClosure):
+        self.receiver = receiver
+        self.method = method
+
+    def arity(self) -> int:
+        return self.method.function.arity
+
+    def call(
+        self,
+        interpreter: VM,
+        arguments: list[Any]
+    ) -> Any:
+        return interpreter.call(self, arguments)
+
+    def __str__(self) -> str:
+        return str(self.method)
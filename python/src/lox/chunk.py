@@ -0,0 +1,38 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+@dataclass
+class Chunk:
+    '''
+    Dynamic array of instructions, see c/lox/chunk.h. Python lists already
+    grow on their own, so there is no capacity bookkeeping.
+    '''
+    code: list[int] = field(default_factory=list)
+    lines: list[int] = field(default_factory=list)  # Line of every entry in code.
+    constants: list[Any] = field(default_factory=list)
+    strings: dict[str, int] = field(default_factory=dict, repr=False)
+    # Variable read by the GET_LOCAL or GET_UPVALUE operand at an offset,
+    # for the error when it's not initialized.
+    names: dict[int, str] = field(default_factory=dict, repr=False)
+
+    def write(self, byte: int, line: int) -> int:
+        '''
+        Writes an opcode or operand and returns its offset.
+        '''
+        self.code.append(byte)
+        self.lines.append(line)
+        return len(self.code) - 1
+
+    def add_constant(self, value: Any) -> int:
+        '''
+        Adds a constant and returns its index. Strings are deduplicated,
+        so a name used many times only takes up one slot.
+        '''
+        if type(value) is str:
+            if value not in self.strings:
+                self.strings[value] = len(self.constants)
+                self.constants.append(value)
+            return self.strings[value]
+
+        self.constants.append(value)
+        return len(self.constants) - 1
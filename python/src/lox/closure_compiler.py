@@ -0,0 +1,701 @@
+from __future__ import annotations
+from typing import Any, Callable
+
+from lox.abcs.expr import (
+    Expr,
+    Binary,
+    Grouping,
+    Logical,
+    Unary,
+    Literal,
+    Variable,
+    Assign,
+    Call,
+    Get,
+    Set,
+    This,
+)
+from lox.abcs.stmt import (
+    Stmt,
+    Print,
+    Function,
+    Return,
+    If,
+    While,
+    Expression,
+    Var,
+    Block,
+    Break,
+    Class
+)
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+from lox.callables.compiled_function import CompiledFunction, FunctionPrototype, Frame
+from lox.callables.lox_class import LoxClass, LoxInstance
+from lox.lox_globals.memo import Memo
+from lox.lox_globals.registry import NATIVES, NativeFunction
+from lox.abcs.native_object import NativeObject
+from lox.exceptions.errors import LoxException, LoxNameError, LoxTypeError
+from lox.enums.completion import Completion
+
+Evaluator = Callable[[Frame], Any]
+Executor = Callable[[Frame], Completion | None]
+
+# For every operator a closure taking two operand closures, and a closure
+# taking an operand closure and a constant right operand, e.g. n - 1.
+BINARY_CLOSURES: dict[TokenType, tuple[Callable, Callable]] = {
+    TokenType.GREATER: (
+        lambda left, right: lambda frame: left(frame) > right(frame),
+        lambda left, value: lambda frame: left(frame) > value,
+    ),
+    TokenType.GREATER_EQUAL: (
+        lambda left, right: lambda frame: left(frame) >= right(frame),
+        lambda left, value: lambda frame: left(frame) >= value,
+    ),
+    TokenType.LESS: (
+        lambda left, right: lambda frame: left(frame) < right(frame),
+        lambda left, value: lambda frame: left(frame) < value,
+    ),
+    TokenType.LESS_EQUAL: (
+        lambda left, right: lambda frame: left(frame) <= right(frame),
+        lambda left, value: lambda frame: left(frame) <= value,
+    ),
+    TokenType.BANG_EQUAL: (
+        lambda left, right: lambda frame: left(frame) != right(frame),
+        lambda left, value: lambda frame: left(frame) != value,
+    ),
+    TokenType.EQUAL_EQUAL: (
+        lambda left, right: lambda frame: left(frame) == right(frame),
+        lambda left, value: lambda frame: left(frame) == value,
+    ),
+    TokenType.MINUS: (
+        lambda left, right: lambda frame: left(frame) - right(frame),
+        lambda left, value: lambda frame: left(frame) - value,
+    ),
+    TokenType.SLASH: (
+        lambda left, right: lambda frame: left(frame) / right(frame),
+        lambda left, value: lambda frame: left(frame) / value,
+    ),
+    TokenType.STAR: (
+        lambda left, right: lambda frame: left(frame) * right(frame),
+        lambda left, value: lambda frame: left(frame) * value,
+    ),
+    TokenType.PLUS: (
+        lambda left, right: lambda frame: left(frame) + right(frame),
+        lambda left, value: lambda frame: left(frame) + value,
+    ),
+}
+
+class ClosureCompiler(Stmt.Visitor[Executor], Expr.Visitor[Evaluator]):
+    """
+    Turns resolved statements into a tree of Python closures, once. All
+    the dispatching on node and operator types, as well as figuring out
+    where each variable lives, happens here instead of on every evaluation.
+
+    Locals live in list frames (see compiled_function.Frame) and are
+    addressed by (depth, slot), globals live in a dict.
+
+    Return and break make their executor return a Completion, like in the
+    tree-walker. Only executors that contain one can complete that way,
+    and those are known here, so only they get their result checked.
+    """
+
+    def __init__(self):
+        self.globals: dict[str, Any] = {**NATIVES, 'memo': Memo()}
+        self.scopes: list[dict[str, int]] = []  # Name to slot, per scope.
+        self.jumping: set[Executor] = set()  # May return a Completion.
+        self.return_value: Any = None  # Of the last Completion.RETURN.
+        # Prototype, closure and arguments of the last Completion.TAIL_CALL.
+        self.pending_call: tuple[FunctionPrototype, Frame, list[Any]] | None = None
+
+    def interpret(self, statements: list[Stmt]) -> bool:
+        program = self.compile(statements)
+
+        try:
+            program([])
+        except ZeroDivisionError:
+            print("Division by zero not allowed! Bad stuff might happen...")
+            return False
+        return True
+
+    def compile(self, statements: list[Stmt]) -> Executor:
+        return self.sequence([self.compile_node(stmt) for stmt in statements])
+
+    def compile_node(self, node: Stmt | Expr) -> Callable[[Frame], Any]:
+        return node.accept(self)
+
+    def sequence(self, executors: list[Executor]) -> Executor:
+        if len(executors) == 1:
+            return executors[0]
+
+        if not self.jumps(executors):
+            def run_sequence(frame: Frame) -> None:
+                for executor in executors:
+                    executor(frame)
+            return run_sequence
+
+        steps = self.steps(executors)
+
+        def run_jumping_sequence(frame: Frame) -> Completion | None:
+            for executor, jumps in steps:
+                if jumps:
+                    completion = executor(frame)
+                    if completion is not None:
+                        return completion
+                else:
+                    executor(frame)
+            return None
+        return self.jump(run_jumping_sequence)
+
+    # Completions.
+
+    def jump(self, executor: Executor) -> Executor:
+        '''
+        Marks the executor as one that may return a Completion.
+        '''
+        self.jumping.add(executor)
+        return executor
+
+    def jumps(self, executors: list[Executor]) -> bool:
+        return any(executor in self.jumping for executor in executors)
+
+    def steps(self, executors: list[Executor]) -> list[tuple[Executor, bool]]:
+        '''
+        Pairs every executor with whether its result must be checked. The
+        others may return anything, expression statements their value.
+        '''
+        return [(executor, executor in self.jumping) for executor in executors]
+
+    def completing(self, executor: Executor) -> Executor:
+        '''
+        An executor whose result is always None or a Completion.
+        '''
+        if executor in self.jumping:
+            return executor
+
+        def run_completing(frame: Frame) -> None:
+            executor(frame)
+        return run_completing
+
+    # Scopes.
+
+    def begin_scope(self) -> None:
+        self.scopes.append({})
+
+    def end_scope(self) -> int:
+        '''
+        Returns the number of slots the scope needs.
+        '''
+        return len(self.scopes.pop())
+
+    def declare(self, name: Token) -> int | None:
+        '''
+        Returns the slot of the new variable, or None if it's a global.
+        '''
+        if not self.scopes:
+            return None
+
+        scope = self.scopes[-1]
+        if name.lexeme not in scope:  # Redeclaring reuses the old slot.
+            scope[name.lexeme] = len(scope) + 1
+        return scope[name.lexeme]
+
+    def resolve(self, name: Token) -> tuple[int, int] | None:
+        '''
+        The (depth, slot) of a local, or None for globals.
+        '''
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name.lexeme in scope:
+                return depth, scope[name.lexeme]
+        return None
+
+    def declares(self, statements: list[Stmt]) -> bool:
+        return any(isinstance(stmt, (Var, Function, Class)) for stmt in statements)
+
+    # Variable access.
+
+    def getter(self, name: Token) -> Evaluator:
+        location = self.resolve(name)
+
+        if location is None:
+            lox_globals = self.globals
+            lexeme = name.lexeme
+
+            def get_global(frame: Frame) -> Any:
+                try:
+                    value = lox_globals[lexeme]
+                except KeyError:
+                    raise LoxNameError(f"Variable '{lexeme}' not defined") from None
+                if value is None:
+                    raise LoxNameError(f"Variable '{lexeme}' not initialized")
+                return value
+            return get_global
+
+        # Like the tree-walker, reading a variable that holds nil is an error.
+        message = f"Variable '{name.lexeme}' not initialized"
+        depth, slot = location
+        if depth == 0:
+            def get_local(frame: Frame) -> Any:
+                value = frame[slot]
+                if value is None:
+                    raise LoxNameError(message)
+                return value
+        elif depth == 1:
+            def get_local(frame: Frame) -> Any:
+                value = frame[0][slot]
+                if value is None:
+                    raise LoxNameError(message)
+                return value
+        else:
+            def get_local(frame: Frame) -> Any:
+                for _ in range(depth):
+                    frame = frame[0]
+                value = frame[slot]
+                if value is None:
+                    raise LoxNameError(message)
+                return value
+        return get_local
+
+    def setter(self, name: Token, value: Evaluator) -> Evaluator:
+        location = self.resolve(name)
+
+        if location is None:
+            lox_globals = self.globals
+            lexeme = name.lexeme
+
+            def set_global(frame: Frame) -> Any:
+                result = value(frame)
+                if lexeme not in lox_globals:
+                    raise LoxNameError(f"Variable '{lexeme}' not defined")
+                lox_globals[lexeme] = result
+                return result
+            return set_global
+
+        depth, slot = location
+        if depth == 0:
+            def set_local(frame: Frame) -> Any:
+                frame[slot] = result = value(frame)
+                return result
+            return set_local
+
+        def set_enclosing(frame: Frame) -> Any:
+            result = value(frame)
+            for _ in range(depth):
+                frame = frame[0]
+            frame[slot] = result
+            return result
+        return set_enclosing
+
+    def definer(self, name: Token, value: Evaluator) -> Executor:
+        slot = self.declare(name)
+
+        if slot is None:
+            lox_globals = self.globals
+            lexeme = name.lexeme
+
+            def define_global(frame: Frame) -> None:
+                lox_globals[lexeme] = value(frame)
+            return define_global
+
+        def define_local(frame: Frame) -> None:
+            frame[slot] = value(frame)
+        return define_local
+
+    # Functions.
+
+    def prototype(self, stmt: Function, is_initializer: bool) -> FunctionPrototype:
+        self.begin_scope()
+        for param in stmt.params:
+            self.declare(param)
+        body = self.sequence([self.compile_node(s) for s in stmt.body])
+        frame_size = self.end_scope()
+
+        return FunctionPrototype(
+            stmt.name.lexeme,
+            len(stmt.params),
+            frame_size,
+            body,
+            is_initializer,
+        )
+
+    # Statements.
+
+    def visit_block_stmt(self, stmt: Block) -> Executor:
+        if not self.declares(stmt.statements):
+            # Nothing can be stored in the scope, so skip creating it.
+            return self.sequence([self.compile_node(s) for s in stmt.statements])
+
+        self.begin_scope()
+        executors = [self.compile_node(s) for s in stmt.statements]
+        padding = [None] * self.end_scope()
+
+        if not self.jumps(executors):
+            def run_block(frame: Frame) -> None:
+                block_frame = [frame, *padding]
+                for executor in executors:
+                    executor(block_frame)
+            return run_block
+
+        steps = self.steps(executors)
+
+        def run_jumping_block(frame: Frame) -> Completion | None:
+            block_frame = [frame, *padding]
+            for executor, jumps in steps:
+                if jumps:
+                    completion = executor(block_frame)
+                    if completion is not None:
+                        return completion
+                else:
+                    executor(block_frame)
+            return None
+        return self.jump(run_jumping_block)
+
+    def visit_class_stmt(self, stmt: Class) -> Executor:
+        name = stmt.name.lexeme
+        # Declare first so methods can reference the class.
+        slot = self.declare(stmt.name)
+
+        # Methods are closed over a scope with 'this', like in the Resolver.
+        self.begin_scope()
+        self.scopes[-1]['this'] = 1
+        prototypes = [
+            self.prototype(method, method.name.lexeme == 'init')
+            for method in stmt.methods
+        ]
+        self.end_scope()
+
+        def make_class(frame: Frame) -> LoxClass:
+            return LoxClass(
+                name,
+                {p.name: CompiledFunction(p, frame) for p in prototypes},
+            )
+
+        if slot is None:
+            lox_globals = self.globals
+
+            def define_global_class(frame: Frame) -> None:
+                lox_globals[name] = make_class(frame)
+            return define_global_class
+
+        def define_local_class(frame: Frame) -> None:
+            frame[slot] = make_class(frame)
+        return define_local_class
+
+    def visit_expression_stmt(self, stmt: Expression) -> Executor:
+        return self.compile_node(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function) -> Executor:
+        slot = self.declare(stmt.name)  # Before the body, for recursion.
+        prototype = self.prototype(stmt, False)
+
+        if slot is None:
+            lox_globals = self.globals
+            name = stmt.name.lexeme
+
+            def define_global_function(frame: Frame) -> None:
+                lox_globals[name] = CompiledFunction(prototype, frame)
+            return define_global_function
+
+        def define_local_function(frame: Frame) -> None:
+            frame[slot] = CompiledFunction(prototype, frame)
+        return define_local_function
+
+    def visit_if_stmt(self, stmt: If) -> Executor:
+        condition = self.compile_node(stmt.condition)
+        then_branch = self.compile_node(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            if then_branch in self.jumping:
+                def run_jumping_if(frame: Frame) -> Completion | None:
+                    if condition(frame):
+                        return then_branch(frame)
+                    return None
+                return self.jump(run_jumping_if)
+
+            def run_if(frame: Frame) -> None:
+                if condition(frame):
+                    then_branch(frame)
+            return run_if
+
+        else_branch = self.compile_node(stmt.else_branch)
+
+        if self.jumps([then_branch, else_branch]):
+            then_branch = self.completing(then_branch)
+            else_branch = self.completing(else_branch)
+
+            def run_jumping_if_else(frame: Frame) -> Completion | None:
+                if condition(frame):
+                    return then_branch(frame)
+                return else_branch(frame)
+            return self.jump(run_jumping_if_else)
+
+        def run_if_else(frame: Frame) -> None:
+            if condition(frame):
+                then_branch(frame)
+            else:
+                else_branch(frame)
+        return run_if_else
+
+    def visit_print_stmt(self, stmt: Print) -> Executor:
+        expression = self.compile_node(stmt.expression)
+
+        def run_print(frame: Frame) -> None:
+            print(expression(frame))
+        return run_print
+
+    def visit_return_stmt(self, stmt: Return) -> Executor:
+        runtime = self
+        RETURN = Completion.RETURN
+
+        if stmt.value is None:
+            def run_return_nil(frame: Frame) -> Completion:
+                runtime.return_value = None
+                return RETURN
+            return self.jump(run_return_nil)
+
+        if isinstance(stmt.value, Call):
+            return self.jump(self.tail_call(stmt.value))
+
+        value = self.compile_node(stmt.value)
+
+        def run_return(frame: Frame) -> Completion:
+            runtime.return_value = value(frame)
+            return RETURN
+        return self.jump(run_return)
+
+    def visit_break_stmt(self, stmt: Break) -> Executor:
+        def run_break(frame: Frame) -> Completion:
+            return Completion.BREAK
+        return self.jump(run_break)
+
+    def visit_var_stmt(self, stmt: Var) -> Executor:
+        # The initializer is compiled before the name is in scope.
+        initializer = self.compile_node(stmt.initializer)
+        return self.definer(stmt.name, initializer)
+
+    def visit_while_stmt(self, stmt: While) -> Executor:
+        condition = self.compile_node(stmt.condition)
+        body = self.compile_node(stmt.body)
+
+        if body not in self.jumping:
+            def run_while(frame: Frame) -> None:
+                while condition(frame):
+                    body(frame)
+            return run_while
+
+        BREAK = Completion.BREAK
+
+        def run_jumping_while(frame: Frame) -> Completion | None:
+            while condition(frame):
+                completion = body(frame)
+                if completion is not None:
+                    if completion is BREAK:
+                        break
+                    return completion  # A return, for the enclosing call.
+            return None
+        return self.jump(run_jumping_while)
+
+    # Expressions.
+
+    def visit_assign_expr(self, expr: Assign) -> Evaluator:
+        return self.setter(expr.name, self.compile_node(expr.value))
+
+    def visit_binary_expr(self, expr: Binary) -> Evaluator:
+        left = self.compile_node(expr.left)
+        both, constant_right = BINARY_CLOSURES[expr.operator.tokentype]
+
+        if isinstance(expr.right, Literal):
+            return constant_right(left, expr.right.value)
+        return both(left, self.compile_node(expr.right))
+
+    def visit_call_expr(self, expr: Call) -> Evaluator:
+        callee = self.compile_node(expr.callee)
+        arguments = [self.compile_node(argument) for argument in expr.arguments]
+        argc = len(arguments)
+        runtime = self
+
+        def call(function: Any, values: list[Any]) -> Any:
+            if type(function) is NativeFunction:
+                if argc != function.parameters:
+                    raise LoxTypeError(f'Expected {function.parameters} arguments but got {argc}')
+                return function.function(*values)
+
+            try:
+                arity = function.arity()
+            except AttributeError:
+                raise LoxTypeError('Can only call functions and classes') from None
+
+            if argc != arity:
+                raise LoxTypeError(f'Expected {arity} arguments but got {argc}')
+
+            return function.call(runtime, values)
+
+        if isinstance(expr.callee, Get):
+            return self.invoke(expr.callee, arguments, call)
+
+        # Spelled out for the common argument counts to avoid the list comprehension.
+        if argc == 0:
+            return lambda frame: call(callee(frame), [])
+        if argc == 1:
+            argument, = arguments
+            return lambda frame: call(callee(frame), [argument(frame)])
+        if argc == 2:
+            first, second = arguments
+            return lambda frame: call(callee(frame), [first(frame), second(frame)])
+
+        return lambda frame: call(
+            callee(frame),
+            [argument(frame) for argument in arguments],
+        )
+
+    def invoke(
+        self,
+        get: Get,
+        arguments: list[Evaluator],
+        call: Callable[[Any, list[Any]], Any],
+    ) -> Evaluator:
+        '''
+        Calls like obj.method() run the method with obj as 'this' right
+        away, without making a bound method first.
+        '''
+        obj = self.compile_node(get.obj)
+        find_method = get.cache.find_method
+        load = get.cache.get
+        name = get.cache.name
+        argc = len(arguments)
+        runtime = self
+
+        def invoke_method(frame: Frame) -> Any:
+            instance = obj(frame)
+            if not isinstance(instance, LoxInstance):
+                callee = instance.lookup(name) if isinstance(instance, NativeObject) else None
+                return call(callee, [argument(frame) for argument in arguments])
+
+            method = find_method(instance)
+            if method is None:
+                callee = load(instance)
+                return call(callee, [argument(frame) for argument in arguments])
+
+            values = [argument(frame) for argument in arguments]
+            if argc != method.arity():
+                raise LoxTypeError(f'Expected {method.arity()} arguments but got {argc}')
+            return method.invoke(runtime, instance, values)
+        return invoke_method
+
+    def tail_call(self, expr: Call) -> Executor:
+        '''
+        Compiles a returned call. Like Interpreter.tail_call, a Lox function
+        isn't called here but handed to CompiledFunction.run of the
+        returning function, which runs it in its place.
+        '''
+        arguments = [self.compile_node(argument) for argument in expr.arguments]
+        argc = len(arguments)
+        runtime = self
+        RETURN = Completion.RETURN
+        TAIL_CALL = Completion.TAIL_CALL
+
+        def complete(function: Any, closure: Frame | None, values: list[Any]) -> Completion:
+            try:
+                arity = function.arity()
+            except AttributeError:
+                raise LoxTypeError('Can only call functions and classes') from None
+
+            if argc != arity:
+                raise LoxTypeError(f'Expected {arity} arguments but got {argc}')
+
+            if type(function) is CompiledFunction:
+                if closure is None:
+                    closure = function.closure
+                runtime.pending_call = (function.prototype, closure, values)
+                return TAIL_CALL
+
+            runtime.return_value = function.call(runtime, values)
+            return RETURN
+
+        if not isinstance(expr.callee, Get):
+            callee = self.compile_node(expr.callee)
+
+            def run_tail_call(frame: Frame) -> Completion:
+                function = callee(frame)
+                return complete(function, None, [argument(frame) for argument in arguments])
+            return run_tail_call
+
+        obj = self.compile_node(expr.callee.obj)
+        find_method = expr.callee.cache.find_method
+        load = expr.callee.cache.get
+        name = expr.callee.cache.name
+
+        def run_tail_invoke(frame: Frame) -> Completion:
+            instance = obj(frame)
+            if not isinstance(instance, LoxInstance):
+                function = instance.lookup(name) if isinstance(instance, NativeObject) else None
+                return complete(function, None, [argument(frame) for argument in arguments])
+
+            method = find_method(instance)
+            if method is None:
+                function = load(instance)
+                return complete(function, None, [argument(frame) for argument in arguments])
+
+            # Same closure as CompiledFunction.invoke makes.
+            values = [argument(frame) for argument in arguments]
+            return complete(method, [method.closure, instance], values)
+        return run_tail_invoke
+
+    def visit_get_expr(self, expr: Get) -> Evaluator:
+        obj = self.compile_node(expr.obj)
+        load = expr.cache.get
+        name = expr.cache.name
+
+        def get_field(frame: Frame) -> Any:
+            instance = obj(frame)
+            if isinstance(instance, LoxInstance):
+                return load(instance)
+            if isinstance(instance, NativeObject):
+                return instance.lookup(name)
+            return None
+        return get_field
+
+    def visit_grouping_expr(self, expr: Grouping) -> Evaluator:
+        # Groupings only matter to the parser.
+        return self.compile_node(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> Evaluator:
+        value = expr.value
+        return lambda frame: value
+
+    def visit_logical_expr(self, expr: Logical) -> Evaluator:
+        # Same semantics as Interpreter.visit_logical_expr.
+        left = self.compile_node(expr.left)
+        right = self.compile_node(expr.right)
+
+        if expr.operator.tokentype == TokenType.OR:
+            return lambda frame: True if left(frame) else right(frame)
+        return lambda frame: right(frame) if left(frame) else False
+
+    def visit_set_expr(self, expr: Set) -> Evaluator:
+        obj = self.compile_node(expr.obj)
+        value = self.compile_node(expr.value)
+        store = expr.cache.set
+
+        def set_field(frame: Frame) -> Any:
+            instance = obj(frame)
+            if not isinstance(instance, LoxInstance):
+                raise LoxException("Only instances have fields!")
+            result = value(frame)
+            store(instance, result)
+            return result
+        return set_field
+
+    def visit_this_expr(self, expr: This) -> Evaluator:
+        return self.getter(expr.keyword)
+
+    def visit_unary_expr(self, expr: Unary) -> Evaluator:
+        right = self.compile_node(expr.right)
+
+        if expr.operator.tokentype == TokenType.MINUS:
+            return lambda frame: -right(frame)
+        # Interpreter.is_truthy only considers true to be truthy.
+        return lambda frame: right(frame) is not True
+
+    def visit_variable_expr(self, expr: Variable) -> Evaluator:
+        return self.getter(expr.name)
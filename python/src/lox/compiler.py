@@ -0,0 +1,440 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+from lox.abcs.expr import (
+    Expr,
+    Binary,
+    Grouping,
+    Logical,
+    Unary,
+    Literal,
+    Variable,
+    Assign,
+    Call,
+    Get,
+    Set,
+    This,
+)
+from lox.abcs.stmt import (
+    Stmt,
+    Print,
+    Function,
+    Return,
+    If,
+    While,
+    Expression,
+    Var,
+    Block,
+    Break,
+    Class
+)
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+from lox.enums.opcode import OpCode
+from lox.enums.functiontype import FunctionType
+from lox.callables.vm_function import VMFunction
+from lox.exceptions.errors import LoxException
+
+BINARY_OPCODES: dict[TokenType, OpCode] = {
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.PLUS: OpCode.ADD,
+}
+
+@dataclass
+class Local:
+    name: str
+    depth: int
+    is_captured: bool = False
+
+@dataclass
+class Loop:
+    scope_depth: int  # Locals deeper than this are popped on break.
+    breaks: list[int] = field(default_factory=list)  # Jumps to patch.
+
+class FunctionState:
+    '''
+    Book-keeping for the function currently being compiled. The
+    equivalent of the Compiler struct in c/lox/compiler.c.
+    '''
+    def __init__(
+        self,
+        enclosing: FunctionState | None,
+        function: VMFunction,
+        functiontype: FunctionType,
+    ):
+        self.enclosing = enclosing
+        self.function = function
+        self.functiontype = functiontype
+        self.upvalues: list[tuple[bool, int]] = []  # (is_local, index)
+        self.scope_depth = 0
+        self.loops: list[Loop] = []
+
+        # Slot zero holds the callee, which is the receiver for methods.
+        if functiontype in (FunctionType.METHOD, FunctionType.INITIALIZER):
+            self.locals = [Local('this', 0)]
+        else:
+            self.locals = [Local('', 0)]
+
+class Compiler(Stmt.Visitor[None], Expr.Visitor[None]):
+    """
+    Compiles resolved statements into bytecode for the VM. Scoping and
+    static errors are already handled by the Resolver, so this is a single
+    pass over the syntax tree that only has to figure out where variables
+    live: on the stack, in an upvalue or in the globals table.
+    """
+
+    def __init__(self):
+        self.current: FunctionState
+        self.line = 0
+
+    def compile(self, statements: list[Stmt]) -> VMFunction:
+        self.current = FunctionState(None, VMFunction(''), FunctionType.NONE)
+
+        for statement in statements:
+            self.compile_node(statement)
+
+        self.emit_return()
+        return self.current.function
+
+    def compile_node(self, node: Stmt | Expr) -> None:
+        node.accept(self)
+
+    # Emitting.
+
+    def emit(self, *bytes: int) -> int:
+        chunk = self.current.function.chunk
+        for byte in bytes:
+            offset = chunk.write(byte, self.line)
+        return offset
+
+    def emit_constant(self, opcode: OpCode, value) -> None:
+        self.emit(opcode, self.current.function.chunk.add_constant(value))
+
+    def emit_jump(self, opcode: OpCode) -> int:
+        '''
+        Emits a jump with a placeholder target, returns the operand offset.
+        '''
+        return self.emit(opcode, -1)
+
+    def patch_jump(self, offset: int) -> None:
+        # Jumps are absolute, so the target is just the end of the code.
+        chunk = self.current.function.chunk
+        chunk.code[offset] = len(chunk.code)
+
+    def emit_loop(self, loop_start: int) -> None:
+        self.emit(OpCode.LOOP, loop_start)
+
+    def emit_return(self) -> None:
+        if self.current.functiontype == FunctionType.INITIALIZER:
+            self.emit(OpCode.GET_LOCAL, 0)
+        else:
+            self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    # Variables.
+
+    def begin_scope(self) -> None:
+        self.current.scope_depth += 1
+
+    def end_scope(self) -> None:
+        current = self.current
+        current.scope_depth -= 1
+
+        while current.locals and current.locals[-1].depth > current.scope_depth:
+            self.emit_pop_local(current.locals.pop())
+
+    def emit_pop_local(self, local: Local) -> None:
+        if local.is_captured:
+            self.emit(OpCode.CLOSE_UPVALUE)
+        else:
+            self.emit(OpCode.POP)
+
+    def add_local(self, name: str) -> None:
+        self.current.locals.append(Local(name, self.current.scope_depth))
+
+    def define_variable(self, name: Token) -> None:
+        '''
+        The value to bind is on top of the stack. For locals it simply
+        stays there, globals are moved into the globals table.
+        '''
+        if self.current.scope_depth > 0:
+            self.add_local(name.lexeme)
+            return
+
+        self.emit_constant(OpCode.DEFINE_GLOBAL, name.lexeme)
+
+    def resolve_local(self, state: FunctionState, name: str) -> int | None:
+        for i in range(len(state.locals) - 1, -1, -1):
+            if state.locals[i].name == name:
+                return i
+        return None
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> int | None:
+        if state.enclosing is None:
+            return None
+
+        local = self.resolve_local(state.enclosing, name)
+        if local is not None:
+            state.enclosing.locals[local].is_captured = True
+            return self.add_upvalue(state, True, local)
+
+        upvalue = self.resolve_upvalue(state.enclosing, name)
+        if upvalue is not None:
+            return self.add_upvalue(state, False, upvalue)
+
+        return None
+
+    def add_upvalue(self, state: FunctionState, is_local: bool, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue in state.upvalues:
+            return state.upvalues.index(upvalue)
+
+        state.upvalues.append(upvalue)
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def named_variable(self, name: Token, assign: bool) -> None:
+        self.line = name.line
+
+        slot = self.resolve_local(self.current, name.lexeme)
+        if slot is not None:
+            offset = self.emit(OpCode.SET_LOCAL if assign else OpCode.GET_LOCAL, slot)
+            self.current.function.chunk.names[offset] = name.lexeme
+            return
+
+        upvalue = self.resolve_upvalue(self.current, name.lexeme)
+        if upvalue is not None:
+            offset = self.emit(OpCode.SET_UPVALUE if assign else OpCode.GET_UPVALUE, upvalue)
+            self.current.function.chunk.names[offset] = name.lexeme
+            return
+
+        self.emit_constant(
+            OpCode.SET_GLOBAL if assign else OpCode.GET_GLOBAL,
+            name.lexeme,
+        )
+
+    # Functions.
+
+    def function(self, stmt: Function, functiontype: FunctionType) -> None:
+        self.line = stmt.name.line
+        function = VMFunction(stmt.name.lexeme, len(stmt.params))
+        self.current = FunctionState(self.current, function, functiontype)
+
+        # Parameters and body share a single scope, just like in the Resolver.
+        self.begin_scope()
+        for param in stmt.params:
+            self.add_local(param.lexeme)
+
+        for statement in stmt.body:
+            self.compile_node(statement)
+        self.emit_return()
+
+        state = self.current
+        self.current = state.enclosing
+
+        self.emit_constant(OpCode.CLOSURE, function)
+        for is_local, index in state.upvalues:
+            self.emit(int(is_local), index)
+
+    # Statements.
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        self.begin_scope()
+        for statement in stmt.statements:
+            self.compile_node(statement)
+        self.end_scope()
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        self.line = stmt.name.line
+        self.emit_constant(OpCode.CLASS, stmt.name.lexeme)
+        self.define_variable(stmt.name)
+
+        # Load the class again so methods can be attached to it.
+        self.named_variable(stmt.name, False)
+        for method in stmt.methods:
+            if method.name.lexeme == 'init':
+                functiontype = FunctionType.INITIALIZER
+            else:
+                functiontype = FunctionType.METHOD
+
+            self.function(method, functiontype)
+            self.emit_constant(OpCode.METHOD, method.name.lexeme)
+        self.emit(OpCode.POP)
+
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.POP)
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        # Declare before compiling the body, so the function can recurse.
+        if self.current.scope_depth > 0:
+            self.add_local(stmt.name.lexeme)
+            self.function(stmt, FunctionType.FUNCTION)
+        else:
+            self.function(stmt, FunctionType.FUNCTION)
+            self.define_variable(stmt.name)
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        self.compile_node(stmt.condition)
+
+        then_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.compile_node(stmt.then_branch)
+
+        else_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(then_jump)
+        self.emit(OpCode.POP)
+
+        if stmt.else_branch is not None:
+            self.compile_node(stmt.else_branch)
+        self.patch_jump(else_jump)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.PRINT)
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        self.line = stmt.keyword.line
+
+        if stmt.value is None:
+            self.emit_return()
+            return
+
+        self.compile_node(stmt.value)
+        self.emit(OpCode.RETURN)
+
+    def visit_break_stmt(self, stmt: Break) -> None:
+        if not self.current.loops:
+            raise LoxException("Can't break outside of a loop")
+
+        # Pop the locals declared inside the loop, but keep them in the
+        # compiler since the code after the break is still in their scope.
+        loop = self.current.loops[-1]
+        for local in reversed(self.current.locals):
+            if local.depth <= loop.scope_depth:
+                break
+            self.emit_pop_local(local)
+
+        loop.breaks.append(self.emit_jump(OpCode.JUMP))
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        self.compile_node(stmt.initializer)
+        self.define_variable(stmt.name)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        loop_start = len(self.current.function.chunk.code)
+        self.compile_node(stmt.condition)
+
+        exit_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+
+        loop = Loop(self.current.scope_depth)
+        self.current.loops.append(loop)
+        self.compile_node(stmt.body)
+        self.current.loops.pop()
+
+        self.emit_loop(loop_start)
+        self.patch_jump(exit_jump)
+        self.emit(OpCode.POP)  # The condition.
+
+        for offset in loop.breaks:
+            self.patch_jump(offset)
+
+    # Expressions.
+
+    def visit_assign_expr(self, expr: Assign) -> None:
+        self.compile_node(expr.value)
+        self.named_variable(expr.name, True)
+
+    def visit_binary_expr(self, expr: Binary) -> None:
+        self.compile_node(expr.left)
+        self.compile_node(expr.right)
+        self.line = expr.operator.line
+        self.emit(BINARY_OPCODES[expr.operator.tokentype])
+
+    def visit_call_expr(self, expr: Call) -> None:
+        if isinstance(expr.callee, Get):
+            # obj.method() doesn't need a bound method, see OP_INVOKE.
+            self.compile_node(expr.callee.obj)
+            for argument in expr.arguments:
+                self.compile_node(argument)
+            self.line = expr.paren.line
+            cache = self.current.function.chunk.add_constant(expr.callee.cache)
+            self.emit(OpCode.INVOKE, cache, len(expr.arguments))
+            return
+
+        self.compile_node(expr.callee)
+        for argument in expr.arguments:
+            self.compile_node(argument)
+        self.line = expr.paren.line
+        self.emit(OpCode.CALL, len(expr.arguments))
+
+    def visit_get_expr(self, expr: Get) -> None:
+        self.compile_node(expr.obj)
+        self.line = expr.name.line
+        # The site's inline cache is the operand, see PropertyCache.
+        self.emit(OpCode.GET_PROPERTY, self.current.function.chunk.add_constant(expr.cache))
+
+    def visit_grouping_expr(self, expr: Grouping) -> None:
+        self.compile_node(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> None:
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit_constant(OpCode.CONSTANT, expr.value)
+
+    def visit_logical_expr(self, expr: Logical) -> None:
+        # Same semantics as the Interpreter: 'or' gives true if the left
+        # operand is truthy and 'and' gives false if it's falsey.
+        self.compile_node(expr.left)
+        left_false = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+
+        if expr.operator.tokentype == TokenType.OR:
+            self.emit(OpCode.TRUE)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(left_false)
+            self.emit(OpCode.POP)
+            self.compile_node(expr.right)
+        else:
+            self.compile_node(expr.right)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(left_false)
+            self.emit(OpCode.POP)
+            self.emit(OpCode.FALSE)
+
+        self.patch_jump(end_jump)
+
+    def visit_set_expr(self, expr: Set) -> None:
+        self.compile_node(expr.obj)
+        self.compile_node(expr.value)
+        self.line = expr.name.line
+        self.emit(OpCode.SET_PROPERTY, self.current.function.chunk.add_constant(expr.cache))
+
+    def visit_this_expr(self, expr: This) -> None:
+        self.named_variable(expr.keyword, False)
+
+    def visit_unary_expr(self, expr: Unary) -> None:
+        self.compile_node(expr.right)
+        self.line = expr.operator.line
+
+        if expr.operator.tokentype == TokenType.MINUS:
+            self.emit(OpCode.NEGATE)
+        else:
+            self.emit(OpCode.NOT)
+
+    def visit_variable_expr(self, expr: Variable) -> None:
+        self.named_variable(expr.name, False)
@@ -0,0 +1,91 @@
+from lox.chunk import Chunk
+from lox.enums.opcode import OpCode
+from lox.callables.vm_function import VMFunction
+
+# Instructions taking a single operand, which is either a constant index,
+# a stack slot, an upvalue index, an argument count or a jump target.
+CONSTANT_INSTRUCTIONS = {
+    OpCode.CONSTANT,
+    OpCode.GET_GLOBAL,
+    OpCode.DEFINE_GLOBAL,
+    OpCode.SET_GLOBAL,
+    OpCode.GET_PROPERTY,
+    OpCode.SET_PROPERTY,
+    OpCode.CLASS,
+    OpCode.METHOD,
+}
+# Instructions with a constant index and an argument count.
+INVOKE_INSTRUCTIONS = {
+    OpCode.INVOKE,
+}
+BYTE_INSTRUCTIONS = {
+    OpCode.GET_LOCAL,
+    OpCode.SET_LOCAL,
+    OpCode.GET_UPVALUE,
+    OpCode.SET_UPVALUE,
+    OpCode.CALL,
+}
+JUMP_INSTRUCTIONS = {
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.LOOP,
+}
+
+def disassemble_chunk(chunk: Chunk, name: str) -> str:
+    lines = [f'== {name} ==']
+
+    offset = 0
+    while offset < len(chunk.code):
+        text, offset = disassemble_instruction(chunk, offset)
+        lines.append(text)
+
+    # Nested functions live in the constant table.
+    for constant in chunk.constants:
+        if isinstance(constant, VMFunction):
+            lines.append(disassemble_chunk(constant.chunk, constant.name))
+
+    return '\n'.join(lines)
+
+def disassemble_instruction(chunk: Chunk, offset: int) -> tuple[str, int]:
+    '''
+    Returns the text of the instruction at offset and the offset of
+    the beginning of the next instruction.
+    '''
+    if offset > 0 and chunk.lines[offset] == chunk.lines[offset - 1]:
+        prefix = f'{offset:04d}    | '
+    else:
+        prefix = f'{offset:04d} {chunk.lines[offset]:4d} '
+
+    instruction = OpCode(chunk.code[offset])
+    name = f'OP_{instruction.name}'
+
+    if instruction in CONSTANT_INSTRUCTIONS:
+        constant = chunk.code[offset + 1]
+        value = chunk.constants[constant]
+        return f"{prefix}{name:<16} {constant:4d} '{value}'", offset + 2
+
+    if instruction in INVOKE_INSTRUCTIONS:
+        constant, argc = chunk.code[offset + 1], chunk.code[offset + 2]
+        value = chunk.constants[constant]
+        return f"{prefix}{name:<16} ({argc} args) {constant:4d} '{value}'", offset + 3
+
+    if instruction in BYTE_INSTRUCTIONS:
+        return f'{prefix}{name:<16} {chunk.code[offset + 1]:4d}', offset + 2
+
+    if instruction in JUMP_INSTRUCTIONS:
+        return f'{prefix}{name:<16} {offset:4d} -> {chunk.code[offset + 1]}', offset + 2
+
+    if instruction == OpCode.CLOSURE:
+        constant = chunk.code[offset + 1]
+        function: VMFunction = chunk.constants[constant]
+        text = [f'{prefix}{name:<16} {constant:4d} {function}']
+        offset += 2
+        for _ in range(function.upvalue_count):
+            is_local, index = chunk.code[offset], chunk.code[offset + 1]
+            text.append(
+                f"{offset:04d}    |                     {'local' if is_local else 'upvalue'} {index}"
+            )
+            offset += 2
+        return '\n'.join(text), offset
+
+    return f'{prefix}{name}', offset + 1
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class Backend(Enum):
+    TREE = 'tree'  # The tree-walking Interpreter.
+    VM = 'vm'  # Bytecode compiler + stack VM.
+    CLOSURE = 'closure'  # AST compiled into nested Python closures.
@@ -0,0 +1,13 @@
+from enum import Enum, auto
+
+class Completion(Enum):
+    '''
+    How a statement that didn't run to its end completed. Executing a
+    statement returns one of these, or None if it completed normally, and
+    blocks and loops pass it on until a loop or function call consumes it.
+    The value of a return is handed over in the runtime's return_value,
+    the function to call for a tail call in its pending_call.
+    '''
+    BREAK = auto()
+    RETURN = auto()
+    TAIL_CALL = auto()
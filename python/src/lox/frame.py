@@ -0,0 +1,23 @@
+from __future__ import annotations
+from typing import Any
+
+class Frame:
+    '''
+    Local scope of the tree-walking Interpreter. The Resolver gives every
+    local a slot, so variables are plain list indexing instead of string
+    keyed lookups. Globals still live in a dict backed Namespace.
+    '''
+    __slots__ = ('enclosing', 'slots')
+
+    def __init__(self, enclosing: Frame | None, size: int):
+        self.enclosing = enclosing  # None when enclosed by the global scope.
+        self.slots: list[Any] = [None] * size
+
+    def ancestor(self, distance: int) -> Frame:
+        '''
+        Gets the ancestor at distance from self.
+        '''
+        frame = self
+        for _ in range(distance):
+            frame = frame.enclosing
+        return frame
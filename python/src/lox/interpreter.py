@@ -1,31 +1,53 @@
 from typing import Any, Final
-from collections import defaultdict
 
 from lox.token.token import Token
 from lox.enums.tokentype import TokenType
 from lox.abcs.expr import Expr, Binary, Grouping, Literal, Logical, This, Unary, Variable, Assign, Call, Get, Set
 from lox.abcs.stmt import Block, Stmt, Expression, If, Print, Var, While, Break, Function, Return
 from lox.namespace import Namespace
+from lox.frame import Frame
 from lox.abcs.lox_callable import LoxCallable
 from lox.callables.lox_function import LoxFunction
 from lox.callables.lox_class import LoxClass, LoxInstance
-from lox.lox_globals.clock import Clock
-from lox.exceptions.errors import LoxTypeError, LoxException
-from lox.control_flow_exceptions.return_exception import Return as ReturnException
-from lox.control_flow_exceptions.break_exception import Break as BreakException
+from lox.lox_globals.memo import Memo
+from lox.lox_globals.registry import NATIVES, NativeFunction
+from lox.abcs.native_object import NativeObject
+from lox.exceptions.errors import LoxTypeError, LoxException, LoxNameError
+from lox.enums.completion import Completion
 from lox.abcs.stmt import Class
+from lox.transpiler import Transpiler
+from lox.profiler import Profiler
 
-class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
+class Interpreter(Expr.Visitor[Any], Stmt.Visitor[Completion | None]):
 
     lox_globals: Final = Namespace()
-    namespace = lox_globals  # Changes depending on scope.
-    locals: defaultdict[Expr, int | None]
-
-    def __init__(self):
-        self.lox_globals['clock'] = Clock()
-        self.locals = defaultdict(lambda: None)
-
-    def interpret(self, statements: list[Stmt]):
+    frame: Frame | None = None  # Changes depending on scope, None is global.
+    locals: dict[Expr, tuple[int, int]]  # (distance, slot), globals are missing.
+    declarations: dict[Stmt, int]  # Slots of local var, fun and class.
+    frame_sizes: dict[Stmt, int]  # Slots needed by blocks and functions.
+    tail_calls: dict[Return, Call]  # Returns of a call, see tail_call.
+    transpiler: Transpiler | None
+    profiler: Profiler | None
+    return_value: Any = None  # Of the last Completion.RETURN.
+    # Function, closure and arguments of the last Completion.TAIL_CALL.
+    pending_call: tuple[LoxFunction, Frame | None, list[Any]] | None = None
+
+    def __init__(self, transpile: bool = False, profiler: Profiler | None = None):
+        self.profiler = profiler
+        for name, function in NATIVES.items():
+            self.lox_globals[name] = function if profiler is None else profiler.native(function)
+        self.lox_globals['memo'] = Memo() if profiler is None else profiler.callable('memo', Memo())
+        self.locals = {}
+        self.declarations = {}
+        self.frame_sizes = {}
+        self.tail_calls = {}
+        # Hot functions are turned into Python functions if enabled.
+        self.transpiler = Transpiler(self) if transpile else None
+
+    def interpret(self, statements: list[Stmt]) -> bool:
+        '''
+        Returns False if the statements were cut short by an error.
+        '''
         try:
             for statement in statements:
                 self.execute(statement)
@@ -33,6 +55,8 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
         #    print("The following Python error occured: ", e)
         except ZeroDivisionError:
             print("Division by zero not allowed! Bad stuff might happen...")
+            return False
+        return True
 
     def visit_binary_expr(self, expr: Binary) -> Any:
         """Process a binary expression.
@@ -71,8 +95,18 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
         return None
 
     def visit_call_expr(self, expr: Call) -> Any:
+        if isinstance(expr.callee, Get):
+            return self.invoke(expr, expr.callee)
+
         callee = self.evaluate(expr.callee)
 
+        if type(callee) is NativeFunction:
+            if len(expr.arguments) != callee.parameters:
+                raise LoxTypeError(
+                    f'Expected {callee.parameters} arguments but got {len(expr.arguments)}'
+                )
+            return callee.function(*[self.evaluate(argument) for argument in expr.arguments])
+
         arguments = [self.evaluate(argument) for argument in expr.arguments]
 
         function: LoxCallable = callee
@@ -89,11 +123,52 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
 
         return call_value
 
+    def invoke(self, expr: Call, get: Get) -> Any:
+        '''
+        Calls like obj.method() run the method with obj as 'this' right
+        away, without making a bound method first. Everything else is
+        called like visit_call_expr does.
+        '''
+        obj = self.evaluate(get.obj)
+
+        if isinstance(obj, LoxInstance):
+            method = get.cache.find_method(obj)
+            callee = get.cache.get(obj) if method is None else method
+        elif isinstance(obj, NativeObject):
+            method, callee = None, self.native_method(obj, get.cache.name)
+        else:
+            method = callee = None
+
+        arguments = [self.evaluate(argument) for argument in expr.arguments]
+
+        function: LoxCallable = callee
+
+        if len(arguments) != function.arity():
+            raise LoxTypeError(
+                f'Expected {function.arity()} arguments but got {len(arguments)}'
+            )
+
+        try:
+            if method is not None:
+                return method.invoke(self, obj, arguments)
+            return function.call(self, arguments)
+        except TypeError:
+            raise LoxTypeError('Can only call functions and classes')
+
     def visit_get_expr(self, expr: Get) -> Any:
         obj = self.evaluate(expr.obj)
 
         if isinstance(obj, LoxInstance):
-            return obj.get(expr.name)
+            return expr.cache.get(obj)
+        if isinstance(obj, NativeObject):
+            return self.native_method(obj, expr.cache.name)
+
+    def native_method(self, obj: NativeObject, name: str) -> LoxCallable:
+        method = obj.lookup(name)
+        if self.profiler is None:
+            return method
+        label = f"{type(obj).__name__.removeprefix('Lox')}.{name}"
+        return self.profiler.callable(label, method)
 
     def visit_grouping_expr(self, expr: Grouping) -> Any:
         """Process a grouping expression.
@@ -132,7 +207,7 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
             )
         
         value = self.evaluate(expr.value)
-        obj.set(expr.name, value)
+        expr.cache.set(obj, value)
         return value
 
     def visit_this_expr(self, expr: This) -> Any:
@@ -158,47 +233,105 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
         return self.look_up_variable(expr.name, expr)
 
     def look_up_variable(self, name: Token, expr: Expr) -> Any:
-        distance = self.locals[expr]
+        location = self.locals.get(expr)
 
-        if distance is not None:
-            ancestor = self.namespace.ancestor(distance)
-            return ancestor[name.lexeme]
-        else:
+        if location is None:
             return self.lox_globals[name.lexeme]
 
+        distance, slot = location
+        frame = self.frame
+        for _ in range(distance):
+            frame = frame.enclosing
+
+        value = frame.slots[slot]
+        if value is None:
+            raise LoxNameError(f"Variable '{name.lexeme}' not initialized")
+        return value
+
     def evaluate(self, expr: Expr) -> Any:
         return expr.accept(self)
 
-    def execute(self, stmt: Stmt):
-        stmt.accept(self)
+    def execute(self, stmt: Stmt) -> Completion | None:
+        return stmt.accept(self)
+
+    def mark(self) -> tuple[int, int, int, int]:
+        '''
+        The sizes of the resolution tables, to release back to later.
+        '''
+        return (
+            len(self.locals),
+            len(self.declarations),
+            len(self.frame_sizes),
+            len(self.tail_calls),
+        )
+
+    def release(self, mark: tuple[int, int, int, int]):
+        '''
+        Drops everything resolved since mark was taken. The tables are
+        insertion ordered, so those are the last entries. Only safe once
+        the code they belong to can't run again.
+        '''
+        tables = (self.locals, self.declarations, self.frame_sizes, self.tail_calls)
+        for table, size in zip(tables, mark):
+            while len(table) > size:
+                table.popitem()
+
+    def resolve(self, expr: Expr, depth: int, slot: int):
+        self.locals[expr] = (depth, slot)
+
+    def resolve_declaration(self, stmt: Stmt, slot: int):
+        self.declarations[stmt] = slot
+
+    def resolve_frame(self, stmt: Block | Function, size: int):
+        self.frame_sizes[stmt] = size
 
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+    def resolve_tail_call(self, stmt: Return):
+        self.tail_calls[stmt] = stmt.value
+
+    def define(self, stmt: Stmt, name: Token, value: Any):
+        '''
+        Binds a declared name in the current scope.
+        '''
+        slot = self.declarations.get(stmt)
+        if slot is None:
+            self.lox_globals[name.lexeme] = value
+        else:
+            self.frame.slots[slot] = value
 
-    def execute_block(self, stmts: list[Stmt], namespace: Namespace):
-        previous = self.namespace
+    def execute_block(self, stmts: list[Stmt], frame: Frame) -> Completion | None:
+        previous = self.frame
         try:
-            self.namespace = namespace
+            self.frame = frame
 
             for stmt in stmts:
-                self.execute(stmt)
+                completion = stmt.accept(self)
+                if completion is not None:
+                    return completion
         finally:
-            self.namespace = previous
+            self.frame = previous
+        return None
 
-    def visit_block_stmt(self, stmt: Block) -> None:
-        self.execute_block(stmt.statements, Namespace(self.namespace))
+    def visit_block_stmt(self, stmt: Block) -> Completion | None:
+        return self.execute_block(
+            stmt.statements,
+            Frame(self.frame, self.frame_sizes[stmt]),
+        )
 
     def visit_class_stmt(self, stmt: Class) -> None:
         # First setting None lets us reference the class inside itself.
-        self.namespace[stmt.name.lexeme] = None
+        self.define(stmt, stmt.name, None)
 
         methods = {
-            method.name.lexeme: LoxFunction(method, self.namespace, True)
+            method.name.lexeme: LoxFunction(
+                method,
+                self.frame,
+                method.name.lexeme == 'init',
+            )
             for method in stmt.methods
         }
 
         klass = LoxClass(stmt.name.lexeme, methods)
-        self.namespace[stmt.name.lexeme] = klass
+        self.define(stmt, stmt.name, klass)
 
     def visit_expression_stmt(self, stmt: Expression) -> None:
         value = self.evaluate(stmt.expression)
@@ -207,45 +340,99 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
     def visit_function_stmt(self, stmt: Function) -> None:
         function = LoxFunction(
             stmt,
-            self.namespace,
+            self.frame,
             False,    
         )
-        self.namespace[stmt.name.lexeme] = function
+        self.define(stmt, stmt.name, function)
 
         return None
 
-    def visit_if_stmt(self, stmt: If) -> None:
+    def visit_if_stmt(self, stmt: If) -> Completion | None:
         value = self.evaluate(stmt.condition)
 
         if value:
-            self.execute(stmt.then_branch)
-        else:
-            if stmt.else_branch is not None:
-                self.execute(stmt.else_branch)
+            return self.execute(stmt.then_branch)
+        if stmt.else_branch is not None:
+            return self.execute(stmt.else_branch)
+        return None
 
-    def visit_while_stmt(self, stmt: While) -> None:
+    def visit_while_stmt(self, stmt: While) -> Completion | None:
         while self.evaluate(stmt.condition):
-            try:
-                self.execute(stmt.body)
-            except BreakException:
-                break
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                if completion is Completion.BREAK:
+                    break
+                return completion  # A return, for the enclosing call.
+        return None
 
-    def visit_break_stmt(self, stmt: Break) -> None:
-        raise BreakException 
+    def visit_break_stmt(self, stmt: Break) -> Completion:
+        return Completion.BREAK
 
     def visit_print_stmt(self, stmt: Print) -> None:
         ''' Same as above, but we don't discard the value but print it. '''
         value = self.evaluate(stmt.expression)
         print(value)
 
-    def visit_return_stmt(self, stmt: Return) -> None:
+    def visit_return_stmt(self, stmt: Return) -> Completion:
+        call = self.tail_calls.get(stmt)
+        if call is not None:
+            return self.tail_call(call)
+
         value = None
         if stmt.value is not None:
             value = self.evaluate(stmt.value)
-        
-        # We raise an Exception for control flow to unwind the interpeter stack to
-        # to the corresponding function call.
-        raise ReturnException(value)
+
+        # Every statement up to the corresponding function call returns
+        # the completion, and the call picks up the value. Cheaper than
+        # raising an exception to unwind the interpreter stack.
+        self.return_value = value
+        return Completion.RETURN
+
+    def tail_call(self, expr: Call) -> Completion:
+        '''
+        Evaluates the callee and arguments of a call in tail position. A
+        Lox function isn't called here but handed to LoxFunction.run of
+        the returning function, which runs it in its place. So a chain of
+        tail calls doesn't grow the Python stack. Anything else is called
+        and returned right away.
+        '''
+        closure = None
+        if isinstance(expr.callee, Get):
+            # Like invoke, the method runs with obj as 'this'.
+            obj = self.evaluate(expr.callee.obj)
+            if isinstance(obj, LoxInstance):
+                callee = expr.callee.cache.find_method(obj)
+                if callee is None:
+                    callee = expr.callee.cache.get(obj)
+                else:
+                    closure = callee.this_frame(obj)
+            elif isinstance(obj, NativeObject):
+                callee = self.native_method(obj, expr.callee.cache.name)
+            else:
+                callee = None
+        else:
+            callee = self.evaluate(expr.callee)
+
+        arguments = [self.evaluate(argument) for argument in expr.arguments]
+
+        function: LoxCallable = callee
+
+        if len(arguments) != function.arity():
+            raise LoxTypeError(
+                f'Expected {function.arity()} arguments but got {len(arguments)}'
+            )
+
+        if type(function) is LoxFunction:
+            if closure is None:
+                closure = function.closure
+            self.pending_call = (function, closure, arguments)
+            return Completion.TAIL_CALL
+
+        try:
+            self.return_value = function.call(self, arguments)
+        except TypeError:
+            raise LoxTypeError('Can only call functions and classes')
+        return Completion.RETURN
 
     def visit_var_stmt(self, stmt: Var) -> None:
         value = None
@@ -253,16 +440,16 @@ class Interpreter(Expr.Visitor[Any], Stmt.Visitor[None]):
         if (stmt.initializer is not None):
             value = self.evaluate(stmt.initializer)
 
-        self.namespace[stmt.name.lexeme] = value
+        self.define(stmt, stmt.name, value)
 
     def visit_assign_expr(self, expr: Assign) -> Any:
         value = self.evaluate(expr.value)
 
-        distance = self.locals[expr]
+        location = self.locals.get(expr)
 
-        if distance is not None:
-            ancestor = self.namespace.ancestor(distance)
-            ancestor.assign(expr.name.lexeme, value)
+        if location is not None:
+            distance, slot = location
+            self.frame.ancestor(distance).slots[slot] = value
         else:
             self.lox_globals.assign(expr.name.lexeme, value)
 
@@ -1,49 +1,223 @@
 
+import argparse
 import logging
+import signal
 import sys
 
-from lox.scanner import Scanner
+from lox.regex_scanner import RegexScanner
 from lox.token.token import Token
+from lox.abcs.stmt import Stmt
 from lox.enums.tokentype import TokenType
 from lox.parser import Parser
 from lox.astprinter import AstPrinter
 from lox.interpreter import Interpreter
 from lox.resolver import Resolver
+from lox.optimizer import Optimizer
+from lox.profiler import Profiler
+from lox.sampler import Sampler
+from lox.memstats import MemStats
+from lox.vm import VM
+from lox.closure_compiler import ClosureCompiler
 from lox.exceptions.errors import LoxException
+from lox.enums.backend import Backend
+from lox import cache
 
 logger = logging.getLogger(__name__)
 
 class Lox:
     had_error: bool = False
 
-    def __init__(self):
-        self.interpreter = Interpreter()
+    def __init__(
+        self,
+        backend: Backend = Backend.TREE,
+        transpile: bool = False,
+        stream: bool = False,
+        optimization: int = 0,
+        profile: bool = False,
+        sample_interval: float | None = None,
+        memstats: bool = False,
+    ):
+        # Started first, to count what the Interpreter creates.
+        self.memstats = MemStats() if memstats else None
+        if self.memstats is not None:
+            self.memstats.start()
+
+        self.backend = backend
+        self.stream = stream
+        # Profiles the tree-walker, the other backends don't use LoxFunction.
+        self.profiler = Profiler() if profile else None
+        self.interpreter = Interpreter(transpile, self.profiler)
+        self.sampler = None if sample_interval is None else Sampler(sample_interval)
         self.resolver = Resolver(self.interpreter)
+        # A stream is optimized a declaration at a time.
+        self.optimizer = Optimizer(self.interpreter, optimization, not stream)
+        # The Interpreter holds the resolutions, so it's there for every backend.
+        self.vm = VM() if backend == Backend.VM else None
+        self.closure_compiler = ClosureCompiler() if backend == Backend.CLOSURE else None
 
     def run(self, source: str):
-        scanner = Scanner(source)
-        tokens = scanner.scan_tokens()
+        if self.stream:
+            self.run_stream(Parser(RegexScanner(source).tokens()))
+            self.phase('stream')
+            return
+
+        statements = self.front_end(source)
+        if statements is not None:
+            statements = self.optimizer.optimize(statements)
+            self.phase('optimize')
+            self.execute(statements)
+            self.phase('interpret')
 
-        parser = Parser(tokens)
+        #ast_printer = AstPrinter()
+        #print(ast_printer.print(expression))
+
+    def front_end(self, source: str) -> list[Stmt] | None:
+        '''
+        Scans, parses and resolves source. Returns None on errors.
+        '''
+        scanner = RegexScanner(source)
+        parser = Parser(scanner.tokens())
         statements = parser.parse()
+        # The parser pulls tokens from the scanner as it goes.
+        self.phase('parse')
 
         if self.had_error:
-            return
+            return None
         
         self.resolver.resolve(*statements)
-        self.interpreter.interpret(statements)
+        self.resolver.infer_purity()
+        self.phase('resolve')
+        return statements
 
-        #ast_printer = AstPrinter()
-        #print(ast_printer.print(expression))
+    def phase(self, name: str):
+        '''
+        Marks the end of phase name for --memstats.
+        '''
+        if self.memstats is not None:
+            self.memstats.phase(name)
+
+    def run_stream(self, parser: Parser):
+        '''
+        Resolves and executes each top-level declaration as soon as it's
+        parsed, so output starts right away and memory is bounded by the
+        largest declaration rather than the whole program. A syntax error
+        is only reported once everything before it has run.
+        '''
+        for statement in parser.declarations():
+            if self.had_error:
+                return
+
+            mark = self.interpreter.mark()
+            function_count = self.resolver.function_count
+            self.resolver.resolve(statement)
+            self.resolver.infer_purity()
+
+            if not self.execute(self.optimizer.optimize([statement])):
+                return
+
+            # Without functions nothing can run the statement again, so
+            # its resolutions can go along with it.
+            if self.resolver.function_count == function_count:
+                self.interpreter.release(mark)
 
-    def run_file(self, path: str):
+    def execute(self, statements: list[Stmt]) -> bool:
+        if self.vm is not None:
+            return self.vm.interpret(statements)
+        elif self.closure_compiler is not None:
+            return self.closure_compiler.interpret(statements)
+        elif self.sampler is not None:
+            with self.sampler:
+                return self.interpreter.interpret(statements)
+        else:
+            return self.interpreter.interpret(statements)
+
+    def run_file(self, path: str, use_cache: bool = True):
         with open(path, 'r') as file:
-            self.run(file.read())
+            source = file.read()
+
+        if not use_cache or self.stream:
+            self.run(source)
+        else:
+            self.run_cached(path, source)
 
         if self.had_error:
             sys.exit(65)
 
+    def run_cached(self, path: str, source: str):
+        '''
+        Runs source, reusing the parsed and resolved program from the
+        __loxcache__ directory next to path when it's still valid.
+        '''
+        statements = cache.load(path, source, self.interpreter)
+        if statements is None:
+            statements = self.front_end(source)
+            if statements is None:
+                return
+            cache.store(path, source, statements, self.interpreter)
+        else:
+            self.phase('load cache')
+
+        # Optimized after storing, so the cache doesn't depend on the level.
+        statements = self.optimizer.optimize(statements)
+        self.phase('optimize')
+        self.execute(statements)
+        self.phase('interpret')
+
+    def report_purity(self, path: str):
+        '''
+        Prints which functions and methods of the script are pure, without
+        running it.
+        '''
+        with open(path, 'r') as file:
+            source = file.read()
+
+        if self.front_end(source) is None:
+            sys.exit(65)
+
+        for line in self.resolver.purity_report():
+            print(line)
+
+    def write_profile(self, folded_path: str | None = None):
+        '''
+        Prints the profile report to stderr, and writes the folded stacks
+        to folded_path if given.
+        '''
+        if self.profiler is None:
+            return
+
+        print(self.profiler.report(), file=sys.stderr)
+        if folded_path is not None:
+            with open(folded_path, 'w') as file:
+                file.writelines(line + '\n' for line in self.profiler.folded())
+
+    def write_samples(self, path: str | None = None):
+        '''
+        Prints the sampled hits per line of the script at path to stderr.
+        '''
+        if self.sampler is None:
+            return
+
+        source = None
+        if path is not None:
+            with open(path, 'r') as file:
+                source = file.read()
+        print(self.sampler.report(source), file=sys.stderr)
+
+    def write_memstats(self):
+        '''
+        Stops counting and prints the objects and memory after each phase
+        to stderr.
+        '''
+        if self.memstats is None:
+            return
+
+        self.memstats.stop()
+        print(self.memstats.report(), file=sys.stderr)
+
     def run_prompt(self):
+        # Later lines can assign any global.
+        self.optimizer.whole_program = False
+
         while True:
             line = input('> ')
             if line is None:
@@ -80,9 +254,102 @@ class Lox:
         self.had_error = True
 
 if __name__ == '__main__':
-    lox = Lox()
+    argparser = argparse.ArgumentParser(prog='lox')
+    argparser.add_argument('path', nargs='?', help='Script to run, starts a REPL if omitted')
+    argparser.add_argument(
+        '--backend',
+        choices=[backend.value for backend in Backend],
+        default=Backend.TREE.value,
+        help='Execution backend',
+    )
+    argparser.add_argument(
+        '--transpile',
+        action='store_true',
+        help='Run hot functions as generated Python code (tree backend)',
+    )
+    argparser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Execute each top-level declaration as soon as it is parsed',
+    )
+    argparser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Neither read nor write the __loxcache__ directory',
+    )
+    argparser.add_argument(
+        '-O',
+        '--optimize',
+        type=int,
+        choices=[0, 1, 2, 3],
+        default=0,
+        help='Optimization level: 1 folds constants and drops dead branches, '
+             '2 also propagates constant variables, 3 also inlines small functions',
+    )
+    argparser.add_argument(
+        '--purity',
+        action='store_true',
+        help='Print which functions are pure instead of running the script',
+    )
+    argparser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print calls and time per Lox function to stderr (tree backend)',
+    )
+    argparser.add_argument(
+        '--profile-folded',
+        metavar='PATH',
+        help='With --profile, also write folded stacks for flamegraph tools to PATH',
+    )
+    argparser.add_argument(
+        '--sample',
+        action='store_true',
+        help='Print how often each line was found running by a sampling '
+             'profiler to stderr (tree backend, Unix)',
+    )
+    argparser.add_argument(
+        '--sample-interval',
+        type=float,
+        default=1.0,
+        metavar='MS',
+        help='Milliseconds of CPU time between samples, 1 by default',
+    )
+    argparser.add_argument(
+        '--memstats',
+        action='store_true',
+        help='Print the tokens, AST nodes, frames, functions and instances '
+             'created and live, and the traced memory, after each phase to stderr',
+    )
+    args = argparser.parse_args()
+    if args.profile and args.backend != Backend.TREE.value:
+        argparser.error('--profile needs the tree backend')
+    if args.sample and args.backend != Backend.TREE.value:
+        argparser.error('--sample needs the tree backend')
+    if args.sample and not hasattr(signal, 'setitimer'):
+        argparser.error('--sample needs signal.setitimer, which this platform lacks')
+    if args.purity and args.path is None:
+        argparser.error('--purity needs a path')
+    if args.profile_folded is not None and not args.profile:
+        argparser.error('--profile-folded needs --profile')
 
-    if len(sys.argv) == 2:  # Assume second argument is file path.
-        lox.run_file(sys.argv[1])
-    else:
-        lox.run_prompt()
\ No newline at end of file
+    lox = Lox(
+        Backend(args.backend),
+        args.transpile,
+        args.stream,
+        args.optimize,
+        args.profile,
+        args.sample_interval / 1000 if args.sample else None,
+        args.memstats,
+    )
+
+    try:
+        if args.purity:
+            lox.report_purity(args.path)
+        elif args.path is not None:
+            lox.run_file(args.path, use_cache=not args.no_cache)
+        else:
+            lox.run_prompt()
+    finally:
+        lox.write_profile(args.profile_folded)
+        lox.write_samples(args.path)
+        lox.write_memstats()
\ No newline at end of file
@@ -0,0 +1,2 @@
+# Importing the modules registers their natives.
+from lox.lox_globals import array, clock, list, map
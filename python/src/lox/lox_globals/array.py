@@ -0,0 +1,208 @@
+from __future__ import annotations
+import math
+import operator
+from array import array
+from itertools import repeat
+from typing import Any, Callable
+
+from lox.abcs.native_object import NativeObject
+from lox.lox_globals.registry import native
+from lox.exceptions.errors import LoxArgumentError, LoxTypeError
+
+try:
+    import numpy
+except ImportError:  # Optional, pip install lox[numpy].
+    numpy = None
+
+# Below this length, going through NumPy costs more than it saves.
+NUMPY_THRESHOLD = 256
+
+NUMPY_OPERATORS: dict[Callable[[Any, Any], Any], Any] = {}
+if numpy is not None:
+    NUMPY_OPERATORS = {
+        operator.add: numpy.add,
+        operator.sub: numpy.subtract,
+        operator.mul: numpy.multiply,
+        operator.truediv: numpy.divide,
+    }
+
+@native('Array')
+def new_array(size: Any) -> LoxArray:
+    '''
+    Array(size) returns an array of size numbers, all zero. Arrays do
+    arithmetic on all their elements at once, with + - * / between two
+    arrays of the same length or an array and a number, and -array:
+
+        var xs = Array(1000).fill(2);
+        print (xs * xs + 1).sum();
+
+    which runs in C instead of a Lox loop per element.
+    '''
+    length = NativeObject.integer(size, 'Array size')
+    if length < 0:
+        raise LoxArgumentError(f'Array size {size} is negative')
+    return LoxArray(array('d', bytes(length * 8)))
+
+class LoxArray(NativeObject):
+    '''
+    A fixed size array of numbers, stored unboxed in an array('d').
+
+    Element-wise operations go through NumPy when it's installed and the
+    array is long enough, otherwise through map with the operator module,
+    which doesn't run any Python code per element either. Both give the
+    same results. Reductions use the builtins only, as NumPy would sum in
+    a different order.
+    '''
+    __slots__ = ('values',)
+
+    methods = {
+        'get': 1,
+        'set': 2,
+        'len': 0,
+        'fill': 1,
+        'slice': 2,
+        'sum': 0,
+        'min': 0,
+        'max': 0,
+        'dot': 1,
+    }
+
+    def __init__(self, values: array[float]):
+        self.values = values
+
+    def number(self, value: Any) -> float:
+        if type(value) is not float and type(value) is not int:
+            raise LoxTypeError('Arrays can only hold numbers')
+        return value
+
+    # Methods callable from Lox.
+
+    def get(self, index: Any) -> float:
+        return self.values[self.index(index, len(self.values))]
+
+    def set(self, index: Any, value: Any) -> Any:
+        self.values[self.index(index, len(self.values))] = self.number(value)
+        return value
+
+    def len(self) -> float:
+        return float(len(self.values))
+
+    def fill(self, value: Any) -> LoxArray:
+        self.values[:] = array('d', repeat(self.number(value), len(self.values)))
+        return self
+
+    def slice(self, start: Any, end: Any) -> LoxArray:
+        '''
+        A copy of the elements from start up to, but not including, end.
+        '''
+        first = self.integer(start, 'Slice start')
+        last = self.integer(end, 'Slice end')
+        if not 0 <= first <= last <= len(self.values):
+            raise LoxArgumentError(
+                f'Slice {start} to {end} out of range for length {len(self.values)}'
+            )
+        return LoxArray(self.values[first:last])
+
+    def sum(self) -> float:
+        return float(sum(self.values))
+
+    def min(self) -> float:
+        if not self.values:
+            raise LoxArgumentError('min of an empty array')
+        return min(self.values)
+
+    def max(self) -> float:
+        if not self.values:
+            raise LoxArgumentError('max of an empty array')
+        return max(self.values)
+
+    def dot(self, other: Any) -> float:
+        return math.sumprod(self.values, self.same_length(other).values)
+
+    # Arithmetic, which the backends reach through Python's operators.
+
+    def same_length(self, other: Any) -> LoxArray:
+        if not isinstance(other, LoxArray):
+            raise LoxTypeError('Operand must be an array')
+        if len(other.values) != len(self.values):
+            raise LoxArgumentError(
+                f'Arrays of different lengths, {len(self.values)} and {len(other.values)}'
+            )
+        return other
+
+    def elementwise(
+        self,
+        op: Callable[[Any, Any], Any],
+        other: Any,
+        reverse: bool = False,
+    ) -> Any:
+        if isinstance(other, LoxArray):
+            right = self.same_length(other).values
+        elif type(other) is float or type(other) is int:
+            right = other
+        else:
+            return NotImplemented
+
+        if numpy is not None and len(self.values) >= NUMPY_THRESHOLD:
+            return self.numpy_elementwise(op, right, reverse)
+
+        operands = (self.values, right if type(right) is array else repeat(right))
+        if reverse:
+            operands = operands[::-1]
+        try:
+            return LoxArray(array('d', map(op, *operands)))
+        except ZeroDivisionError:
+            raise LoxArgumentError('Division by zero') from None
+
+    def numpy_elementwise(
+        self,
+        op: Callable[[Any, Any], Any],
+        right: array[float] | float,
+        reverse: bool,
+    ) -> LoxArray:
+        # Views of the same memory, no copies on the way in.
+        operands = [
+            numpy.frombuffer(self.values),
+            numpy.frombuffer(right) if type(right) is array else right,
+        ]
+        if reverse:
+            operands.reverse()
+
+        if op is operator.truediv and not numpy.all(operands[1]):
+            raise LoxArgumentError('Division by zero')
+        with numpy.errstate(all='ignore'):
+            result = NUMPY_OPERATORS[op](*operands)
+        return LoxArray(array('d', result.tobytes()))
+
+    def __add__(self, other: Any) -> Any:
+        return self.elementwise(operator.add, other)
+
+    def __radd__(self, other: Any) -> Any:
+        return self.elementwise(operator.add, other, reverse=True)
+
+    def __sub__(self, other: Any) -> Any:
+        return self.elementwise(operator.sub, other)
+
+    def __rsub__(self, other: Any) -> Any:
+        return self.elementwise(operator.sub, other, reverse=True)
+
+    def __mul__(self, other: Any) -> Any:
+        return self.elementwise(operator.mul, other)
+
+    def __rmul__(self, other: Any) -> Any:
+        return self.elementwise(operator.mul, other, reverse=True)
+
+    def __truediv__(self, other: Any) -> Any:
+        return self.elementwise(operator.truediv, other)
+
+    def __rtruediv__(self, other: Any) -> Any:
+        return self.elementwise(operator.truediv, other, reverse=True)
+
+    def __neg__(self) -> LoxArray:
+        if numpy is not None and len(self.values) >= NUMPY_THRESHOLD:
+            result = numpy.negative(numpy.frombuffer(self.values))
+            return LoxArray(array('d', result.tobytes()))
+        return LoxArray(array('d', map(operator.neg, self.values)))
+
+    def __str__(self):
+        return '[' + ', '.join(map(str, self.values)) + ']'
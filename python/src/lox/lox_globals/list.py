@@ -0,0 +1,53 @@
+from __future__ import annotations
+from typing import Any
+
+from lox.abcs.native_object import NativeObject
+from lox.lox_globals.registry import native
+from lox.exceptions.errors import LoxArgumentError
+
+@native('List')
+def new_list() -> LoxList:
+    '''
+    List() returns an empty list, which grows with append:
+
+        var names = List();
+        names.append("lox");
+        print names.get(names.len() - 1);
+    '''
+    return LoxList([])
+
+class LoxList(NativeObject):
+    __slots__ = ('values',)
+
+    methods = {
+        'get': 1,
+        'set': 2,
+        'append': 1,
+        'pop': 0,
+        'len': 0,
+    }
+
+    def __init__(self, values: list[Any]):
+        self.values = values
+
+    def get(self, index: Any) -> Any:
+        return self.values[self.index(index, len(self.values))]
+
+    def set(self, index: Any, value: Any) -> Any:
+        self.values[self.index(index, len(self.values))] = value
+        return value
+
+    def append(self, value: Any) -> Any:
+        self.values.append(value)
+        return value
+
+    def pop(self) -> Any:
+        if not self.values:
+            raise LoxArgumentError('pop from an empty list')
+        return self.values.pop()
+
+    def len(self) -> float:
+        return float(len(self.values))
+
+    def __str__(self):
+        return '[' + ', '.join(map(str, self.values)) + ']'
@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import Any
+
+from lox.abcs.native_object import NativeObject
+from lox.lox_globals.registry import native
+from lox.lox_globals.list import LoxList
+from lox.exceptions.errors import LoxTypeError
+
+@native('Map')
+def new_map() -> LoxMap:
+    '''
+    Map() returns an empty hash map. Keys can be numbers, strings,
+    booleans, nil and instances, values anything.
+
+        var ages = Map();
+        ages.set("lox", 1);
+        print ages.get("lox");
+    '''
+    return LoxMap({})
+
+class LoxMap(NativeObject):
+    '''
+    Keys are stored along with their type, as true == 1 in Python but
+    they're different keys in Lox.
+    '''
+    __slots__ = ('entries',)
+
+    methods = {
+        'get': 1,
+        'set': 2,
+        'has': 1,
+        'remove': 1,
+        'keys': 0,
+        'len': 0,
+    }
+
+    def __init__(self, entries: dict[tuple[Any, type], Any]):
+        self.entries = entries
+
+    @staticmethod
+    def key(key: Any) -> tuple[Any, type]:
+        entry_key = (key, type(key))
+        try:
+            hash(entry_key)
+        except TypeError:
+            raise LoxTypeError(f"Can't use {key} as a map key") from None
+        return entry_key
+
+    def get(self, key: Any) -> Any:
+        '''
+        The value for key, nil if there is none.
+        '''
+        return self.entries.get(self.key(key))
+
+    def set(self, key: Any, value: Any) -> Any:
+        self.entries[self.key(key)] = value
+        return value
+
+    def has(self, key: Any) -> bool:
+        return self.key(key) in self.entries
+
+    def remove(self, key: Any) -> Any:
+        '''
+        Removes key and returns its value, nil if there was none.
+        '''
+        return self.entries.pop(self.key(key), None)
+
+    def keys(self) -> LoxList:
+        return LoxList([key for key, _ in self.entries])
+
+    def len(self) -> float:
+        return float(len(self.entries))
+
+    def __str__(self):
+        return '{' + ', '.join(
+            f'{key}: {value}' for (key, _), value in self.entries.items()
+        ) + '}'
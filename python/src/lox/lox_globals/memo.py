@@ -0,0 +1,92 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from lox.abcs.lox_callable import LoxCallable
+from lox.exceptions.errors import LoxTypeError
+if TYPE_CHECKING: from lox.interpreter import Interpreter
+
+class Memo(LoxCallable):
+    '''
+    memo(fn) returns fn with its results cached by arguments. Only for
+    functions whose result depends on nothing but their arguments. To
+    memoize the recursive calls as well, replace the function:
+
+        fun fib(n) { ... }
+        fib = memo(fib);
+
+    The first call still recurses all the way down, so on the tree-walker
+    fib(70) is fine but fib(90) runs out of Python stack. It doesn't check
+    the Resolver's purity inference, which counts fib as impure once it
+    is reassigned like this, so it's up to the caller.
+    '''
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+
+    def arity(self) -> int:
+        return 1
+
+    def call(
+        self,
+        interpreter: Interpreter,
+        arguments: list[Any]
+    ) -> Any:
+        function = arguments[0]
+        if not isinstance(function, LoxCallable):
+            raise LoxTypeError('Can only memoize functions')
+        return MemoizedFunction(function, self.maxsize)
+
+    def __str__(self):
+        return '<native fn>'
+
+class MemoizedFunction(LoxCallable):
+    '''
+    Keeps the results of the last maxsize distinct argument lists,
+    dropping the least recently used one when full.
+    '''
+    __slots__ = ('function', 'maxsize', 'results', 'hits', 'misses')
+
+    def __init__(self, function: LoxCallable, maxsize: int):
+        self.function = function
+        self.maxsize = maxsize
+        self.results: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def arity(self) -> int:
+        return self.function.arity()
+
+    def call(
+        self,
+        interpreter: Interpreter,
+        arguments: list[Any]
+    ) -> Any:
+        # With the types, as true == 1 in Python.
+        key = (*arguments, *map(type, arguments))
+        try:
+            value = self.results[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Classes and functions of the tree-walker aren't hashable.
+            return self.function.call(interpreter, arguments)
+        else:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = self.function.call(interpreter, arguments)
+
+        # A recursive call may have stored the key in the meantime.
+        self.results[key] = value
+        self.results.move_to_end(key)
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+        return value
+
+    def __str__(self):
+        return (
+            f'<memo fn, {len(self.results)} cached, '
+            f'{self.hits} hits, {self.misses} misses>'
+        )
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import inspect
+from typing import TYPE_CHECKING, Any, Callable
+
+from lox.abcs.lox_callable import LoxCallable
+if TYPE_CHECKING: from lox.interpreter import Interpreter
+
+class NativeFunction(LoxCallable):
+    '''
+    A plain Python function exposed to Lox. The backends check for this
+    type before anything else and call function directly, with the
+    arguments unpacked and only the arity check in between.
+    '''
+    __slots__ = ('name', 'function', 'parameters')
+
+    def __init__(self, name: str, function: Callable[..., Any], parameters: int):
+        self.name = name
+        self.function = function
+        self.parameters = parameters
+
+    def arity(self) -> int:
+        return self.parameters
+
+    def call(
+        self,
+        interpreter: Interpreter,
+        arguments: list[Any]
+    ) -> Any:
+        return self.function(*arguments)
+
+    def __str__(self):
+        return '<native fn>'
+
+# Globals of every backend, filled in by the native decorator.
+NATIVES: dict[str, NativeFunction] = {}
+
+def native(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    '''
+    Registers the decorated function as the global name. Its arity is
+    the number of parameters, which must all be positional.
+
+        @native('sqrt')
+        def sqrt(x: float) -> float:
+            return math.sqrt(x)
+    '''
+    def register(function: Callable[..., Any]) -> Callable[..., Any]:
+        if name in NATIVES:
+            raise ValueError(f'Native {name} is already registered')
+
+        parameters = inspect.signature(function).parameters.values()
+        if any(
+            parameter.kind not in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+            for parameter in parameters
+        ):
+            raise ValueError(f'Native {name} can only take positional parameters')
+
+        NATIVES[name] = NativeFunction(name, function, len(parameters))
+        return function
+    return register
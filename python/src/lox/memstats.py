@@ -0,0 +1,195 @@
+'''
+Memory accounting for --memstats. While started, the constructors of the
+objects a script's memory mostly goes to count every instance created:
+
+    Token        scanned while parsing, kept when the AST refers to them
+    Expr, Stmt   the AST, per node type, including what the Optimizer
+                 and the cache build
+    Frame        the tree-walker's local scopes, one per call and block
+    Namespace    the tree-walker's globals
+    LoxFunction  closures, one per function declaration executed
+    LoxInstance  instances of Lox classes
+
+At each phase boundary Lox.run calls phase, which collects garbage and
+walks the objects the gc tracks to count the instances still live and
+their bytes: the object itself, its __dict__ and the list or dict of
+values it owns. tracemalloc adds the traced memory, its peak during the
+phase, and the source files that allocated the most since the previous
+boundary.
+
+Counting and tracing make everything several times slower, so the
+numbers are about memory, not time.
+'''
+from __future__ import annotations
+import gc
+import os
+import sys
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from lox.abcs.expr import Expr
+from lox.abcs.stmt import Stmt
+from lox.callables.lox_class import LoxInstance
+from lox.callables.lox_function import LoxFunction
+from lox.frame import Frame
+from lox.namespace import Namespace
+from lox.token.token import Token
+
+EXPR_CLASSES = tuple(sorted(Expr.__subclasses__(), key=lambda node: node.tag))
+STMT_CLASSES = tuple(sorted(Stmt.__subclasses__(), key=lambda node: node.tag))
+RUNTIME_CLASSES = (Frame, Namespace, LoxFunction, LoxInstance)
+TRACKED_CLASSES = (Token, *EXPR_CLASSES, *STMT_CLASSES, *RUNTIME_CLASSES)
+
+# Containers owned by an instance, counted in its bytes.
+OWNED = {
+    Frame: ('slots',),
+    Namespace: ('values',),
+    LoxInstance: ('values', 'bound_methods'),
+}
+
+TOP_FILES = 3  # Allocating files listed per phase.
+
+@dataclass
+class Phase:
+    name: str
+    created: Counter[type]
+    live: Counter[type]
+    live_bytes: Counter[type]
+    traced: int
+    peak: int
+    top_files: list[tracemalloc.StatisticDiff]
+
+class MemStats:
+    def __init__(self):
+        self.created: Counter[type] = Counter()
+        self.phases: list[Phase] = []
+        # The constructor each class had before start, None if inherited.
+        self.originals: dict[type, Any] = {}
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.was_tracing = False  # Left on at stop if someone else started it.
+
+    def start(self) -> None:
+        for cls in TRACKED_CLASSES:
+            # A NamedTuple is built by __new__ and has no __init__ of its own.
+            name = '__new__' if cls is Token else '__init__'
+            self.originals[cls] = cls.__dict__.get(name)
+            counting = self.counting(cls, getattr(cls, name))
+            setattr(cls, name, staticmethod(counting) if name == '__new__' else counting)
+
+        self.was_tracing = tracemalloc.is_tracing()
+        if not self.was_tracing:
+            tracemalloc.start()
+        self.snapshot = self.take_snapshot()
+
+    def stop(self) -> None:
+        if not self.was_tracing:
+            tracemalloc.stop()
+        for cls, original in self.originals.items():
+            name = '__new__' if cls is Token else '__init__'
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        self.originals.clear()
+
+    def __enter__(self) -> MemStats:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def counting(self, cls: type, constructor: Any) -> Any:
+        created = self.created
+
+        def counted(*arguments: Any, **keywords: Any) -> Any:
+            created[cls] += 1
+            return constructor(*arguments, **keywords)
+        return counted
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def phase(self, name: str) -> None:
+        '''
+        Records the counts and memory at the end of the phase name.
+        '''
+        gc.collect()
+        live: Counter[type] = Counter()
+        live_bytes: Counter[type] = Counter()
+        for obj in gc.get_objects():
+            cls = type(obj)
+            if cls in self.originals:
+                live[cls] += 1
+                live_bytes[cls] += self.footprint(obj)
+
+        traced, peak = tracemalloc.get_traced_memory()
+        snapshot = self.take_snapshot()
+        top_files = [
+            diff for diff in snapshot.compare_to(self.snapshot, 'filename')
+            if diff.size_diff > 0
+        ][:TOP_FILES]
+        self.phases.append(
+            Phase(name, self.created.copy(), live, live_bytes, traced, peak, top_files)
+        )
+        self.snapshot = snapshot
+        tracemalloc.reset_peak()
+
+    @staticmethod
+    def footprint(obj: Any) -> int:
+        size = sys.getsizeof(obj)
+        if hasattr(obj, '__dict__'):
+            size += sys.getsizeof(obj.__dict__)
+        for name in OWNED.get(type(obj), ()):
+            value = getattr(obj, name)
+            if value is not None:
+                size += sys.getsizeof(value)
+        return size
+
+    def report(self) -> str:
+        lines = []
+        for phase in self.phases:
+            lines.append(
+                f'after {phase.name}: {phase.traced:,} bytes traced, '
+                f'{phase.peak:,} peak during the phase'
+            )
+            for diff in phase.top_files:
+                filename = os.path.basename(diff.traceback[0].filename)
+                lines.append(f'  {diff.size_diff:>+14,} bytes  {filename}')
+            lines.append(f'  {"":<18}{"created":>12}{"live":>12}{"live bytes":>14}')
+            lines.extend(self.rows(phase, 'Token', (Token,)))
+            lines.extend(self.rows(phase, 'Expr', EXPR_CLASSES, by_class=True))
+            lines.extend(self.rows(phase, 'Stmt', STMT_CLASSES, by_class=True))
+            for cls in RUNTIME_CLASSES:
+                lines.extend(self.rows(phase, cls.__name__, (cls,)))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def rows(
+        phase: Phase,
+        label: str,
+        classes: tuple[type, ...],
+        by_class: bool = False,
+    ) -> list[str]:
+        '''
+        A row of totals for classes, followed by a row per class that has
+        any instances if by_class.
+        '''
+        def row(label: str, classes: tuple[type, ...]) -> str:
+            created = sum(phase.created[cls] for cls in classes)
+            live = sum(phase.live[cls] for cls in classes)
+            live_bytes = sum(phase.live_bytes[cls] for cls in classes)
+            return f'  {label:<18}{created:>12,}{live:>12,}{live_bytes:>14,}'
+
+        rows = [row(label, classes)]
+        if by_class:
+            rows.extend(
+                row('  ' + cls.__name__, (cls,)) for cls in classes
+                if phase.created[cls] or phase.live[cls]
+            )
+        return rows
@@ -0,0 +1,581 @@
+from __future__ import annotations
+import operator
+from dataclasses import dataclass, field
+from typing import Any, Callable, TYPE_CHECKING
+
+from lox.abcs.expr import (
+    Expr,
+    Binary,
+    Grouping,
+    Logical,
+    Unary,
+    Literal,
+    Variable,
+    Assign,
+    Call,
+    Get,
+    Set,
+    This,
+)
+from lox.abcs.stmt import (
+    Stmt,
+    Print,
+    Function,
+    Return,
+    If,
+    While,
+    Expression,
+    Var,
+    Block,
+    Break,
+    Class
+)
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+if TYPE_CHECKING: from lox.interpreter import Interpreter
+
+# Same operations as Interpreter.visit_binary_expr.
+BINARY_OPERATIONS: dict[TokenType, Callable[[Any, Any], Any]] = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.BANG_EQUAL: operator.ne,
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.MINUS: operator.sub,
+    TokenType.SLASH: operator.truediv,
+    TokenType.STAR: operator.mul,
+    TokenType.PLUS: operator.add,
+}
+
+# Variables that aren't declared by a var statement: parameters, functions,
+# classes and 'this'. They are never constant.
+NOT_VAR = None
+
+# Functions with more nodes in their returned expression aren't inlined.
+INLINE_LIMIT = 24
+
+@dataclass
+class Inlinable:
+    '''
+    A top-level function whose body is just `return <expression>;`.
+    '''
+    params: list[str]
+    body: Expr
+    uses: dict[str, int] = field(default_factory=dict)  # Reads per parameter.
+    globals: set[str] = field(default_factory=set)  # Other names read.
+    calls: bool = False  # Whether the body can run other code.
+    # What the body does in evaluation order: the name of a parameter for
+    # a read of it, None for a node that can raise. Reads in the right
+    # operand of an and or or only go in conditional.
+    order: list[str | None] = field(default_factory=list)
+    conditional: set[str] = field(default_factory=set)
+
+class Optimizer(Stmt.Visitor[Stmt | None], Expr.Visitor[Expr]):
+    """
+    Rewrites resolved statements before they are executed, by any backend.
+
+    Level 1 folds operators on literals into a Literal, drops groupings
+    and replaces an If on a constant condition with the branch it takes.
+    Level 2 also replaces reads of var variables that are initialized to
+    a constant and never assigned with that constant. Level 3 also
+    inlines calls to small top-level functions that just return an
+    expression, see inline.
+
+    Nodes are changed in place, so the Resolver's entries stay valid for
+    everything that's kept. Folding leaves anything that would fail at
+    runtime, like 1 / 0, to fail at runtime.
+    """
+
+    def __init__(
+        self,
+        interpreter: Interpreter,
+        level: int = 0,
+        whole_program: bool = True,
+    ):
+        self.interpreter = interpreter
+        self.level = level
+        # Whether the statements are all the code there'll be. Otherwise
+        # later code might assign globals, so they can't be constant.
+        self.whole_program = whole_program
+
+        self.scopes: list[dict[str, Var | None]] = []
+        # Found by collect, before rewriting.
+        self.assigned: set[Var] = set()
+        self.global_declarations: dict[str, int] = {}
+        self.assigned_globals: set[str] = set()
+        # Values of constant variables declared so far.
+        self.constants: dict[Var, Any] = {}
+        self.global_constants: dict[str, Any] = {}
+        # Functions declared so far that calls can be replaced by.
+        self.inlinable: dict[str, Inlinable] = {}
+        self.inlining: set[str] = set()  # Against mutual recursion.
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        if self.level < 1:
+            return statements
+
+        if self.level >= 2:
+            self.assigned.clear()
+            self.global_declarations.clear()
+            self.assigned_globals.clear()
+            for statement in statements:
+                self.collect(statement)
+
+        self.constants.clear()
+        self.global_constants.clear()
+        self.inlinable.clear()
+        return self.statements(statements)
+
+    def statements(self, statements: list[Stmt]) -> list[Stmt]:
+        optimized = [statement.accept(self) for statement in statements]
+        return [statement for statement in optimized if statement is not None]
+
+    def statement(self, stmt: Stmt) -> Stmt:
+        '''
+        For the places that need a statement, like the body of a loop.
+        '''
+        optimized = stmt.accept(self)
+        if optimized is not None:
+            return optimized
+
+        block = Block([])
+        self.interpreter.resolve_frame(block, 0)
+        return block
+
+    # Scopes, mirroring the Resolver's.
+
+    def declare(self, name: Token, declaration: Var | None) -> None:
+        if not self.scopes:
+            return  # Globals are looked up by name.
+
+        scope = self.scopes[-1]
+        previous = scope.get(name.lexeme, NOT_VAR)
+        if name.lexeme in scope:
+            # Redeclaring reuses the variable, so the two values mix.
+            for var in (previous, declaration):
+                if var is not None:
+                    self.assigned.add(var)
+        scope[name.lexeme] = declaration
+
+    def lookup(self, name: str) -> tuple[bool, Var | None]:
+        '''
+        Whether the name is a local, and its declaration if it's a var.
+        '''
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return True, scope[name]
+        return False, NOT_VAR
+
+    def collect(self, node: Stmt | Expr) -> None:
+        '''
+        Records every declaration and assignment, to know which variables
+        are never assigned before rewriting anything.
+        '''
+        match node:
+            case Var(name, initializer):
+                self.collect(initializer)
+                self.collect_declaration(name, node)
+            case Function(name):
+                self.collect_declaration(name, NOT_VAR)
+                self.collect_function(node)
+            case Class(name, methods):
+                self.collect_declaration(name, NOT_VAR)
+                self.scopes.append({'this': NOT_VAR})
+                for method in methods:
+                    self.collect_function(method)
+                self.scopes.pop()
+            case Block(statements):
+                self.scopes.append({})
+                for statement in statements:
+                    self.collect(statement)
+                self.scopes.pop()
+            case Assign(name, value):
+                self.collect(value)
+                is_local, declaration = self.lookup(name.lexeme)
+                if not is_local:
+                    self.assigned_globals.add(name.lexeme)
+                elif declaration is not None:
+                    self.assigned.add(declaration)
+            case _:
+                for attribute in node.__match_args__:
+                    value = getattr(node, attribute)
+                    for child in value if isinstance(value, list) else [value]:
+                        if isinstance(child, (Stmt, Expr)):
+                            self.collect(child)
+
+    def collect_declaration(self, name: Token, declaration: Var | None) -> None:
+        if not self.scopes:
+            count = self.global_declarations.get(name.lexeme, 0)
+            self.global_declarations[name.lexeme] = count + 1
+        self.declare(name, declaration)
+
+    def collect_function(self, function: Function) -> None:
+        self.scopes.append({})
+        for param in function.params:
+            self.declare(param, NOT_VAR)
+        for statement in function.body:
+            self.collect(statement)
+        self.scopes.pop()
+
+    def function(self, function: Function) -> None:
+        self.scopes.append({})
+        for param in function.params:
+            self.declare(param, NOT_VAR)
+        function.body = self.statements(function.body)
+        self.scopes.pop()
+
+    # Statements.
+
+    def visit_block_stmt(self, stmt: Block) -> Stmt | None:
+        self.scopes.append({})
+        stmt.statements = self.statements(stmt.statements)
+        self.scopes.pop()
+        return stmt
+
+    def visit_class_stmt(self, stmt: Class) -> Stmt | None:
+        self.declare(stmt.name, NOT_VAR)
+        self.scopes.append({'this': NOT_VAR})
+        for method in stmt.methods:
+            self.function(method)
+        self.scopes.pop()
+        return stmt
+
+    def visit_expression_stmt(self, stmt: Expression) -> Stmt | None:
+        stmt.expression = stmt.expression.accept(self)
+        return stmt
+
+    def visit_function_stmt(self, stmt: Function) -> Stmt | None:
+        self.declare(stmt.name, NOT_VAR)
+        self.function(stmt)
+
+        if self.level >= 3 and not self.scopes:
+            inlinable = self.inlinable_function(stmt)
+            if inlinable is not None:
+                self.inlinable[stmt.name.lexeme] = inlinable
+        return stmt
+
+    def visit_if_stmt(self, stmt: If) -> Stmt | None:
+        stmt.condition = stmt.condition.accept(self)
+
+        if isinstance(stmt.condition, Literal):
+            # Same truthiness as Interpreter.visit_if_stmt.
+            if stmt.condition.value:
+                return stmt.then_branch.accept(self)
+            if stmt.else_branch is not None:
+                return stmt.else_branch.accept(self)
+            return None
+
+        stmt.then_branch = self.statement(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = stmt.else_branch.accept(self)
+        return stmt
+
+    def visit_print_stmt(self, stmt: Print) -> Stmt | None:
+        stmt.expression = stmt.expression.accept(self)
+        return stmt
+
+    def visit_return_stmt(self, stmt: Return) -> Stmt | None:
+        if stmt.value is not None:
+            stmt.value = stmt.value.accept(self)
+
+            tail_calls = self.interpreter.tail_calls
+            if stmt in tail_calls and tail_calls[stmt] is not stmt.value:
+                del tail_calls[stmt]  # The call was inlined.
+        return stmt
+
+    def visit_break_stmt(self, stmt: Break) -> Stmt | None:
+        return stmt
+
+    def visit_var_stmt(self, stmt: Var) -> Stmt | None:
+        stmt.initializer = stmt.initializer.accept(self)
+        self.declare(stmt.name, stmt)
+
+        # Not nil, since reading a variable that holds nil raises.
+        if (
+            self.level >= 2
+            and isinstance(stmt.initializer, Literal)
+            and stmt.initializer.value is not None
+        ):
+            value = stmt.initializer.value
+            name = stmt.name.lexeme
+            if self.scopes:
+                if stmt not in self.assigned:
+                    self.constants[stmt] = value
+            elif (
+                self.whole_program
+                and self.global_declarations.get(name) == 1
+                and name not in self.assigned_globals
+            ):
+                # Only code after the declaration sees the constant, code
+                # before it might run before the variable is defined.
+                self.global_constants[name] = value
+
+        return stmt
+
+    def visit_while_stmt(self, stmt: While) -> Stmt | None:
+        stmt.condition = stmt.condition.accept(self)
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    # Expressions.
+
+    def visit_assign_expr(self, expr: Assign) -> Expr:
+        expr.value = expr.value.accept(self)
+        return expr
+
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+
+        if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+            operation = BINARY_OPERATIONS[expr.operator.tokentype]
+            try:
+                return Literal(operation(expr.left.value, expr.right.value))
+            except (TypeError, ArithmeticError):
+                pass  # Raised at runtime instead.
+        return expr
+
+    def visit_call_expr(self, expr: Call) -> Expr:
+        expr.callee = expr.callee.accept(self)
+        expr.arguments = [argument.accept(self) for argument in expr.arguments]
+
+        if self.level >= 3 and isinstance(expr.callee, Variable):
+            inlined = self.inline(expr, expr.callee.name)
+            if inlined is not None:
+                return inlined
+        return expr
+
+    def visit_get_expr(self, expr: Get) -> Expr:
+        expr.obj = expr.obj.accept(self)
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        # Groupings only matter to the parser.
+        return expr.expression.accept(self)
+
+    def visit_literal_expr(self, expr: Literal) -> Expr:
+        return expr
+
+    def visit_logical_expr(self, expr: Logical) -> Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        return expr
+
+    def visit_set_expr(self, expr: Set) -> Expr:
+        expr.obj = expr.obj.accept(self)
+        expr.value = expr.value.accept(self)
+        return expr
+
+    def visit_this_expr(self, expr: This) -> Expr:
+        return expr
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        expr.right = expr.right.accept(self)
+
+        if isinstance(expr.right, Literal):
+            value = expr.right.value
+            if expr.operator.tokentype == TokenType.BANG:
+                # Interpreter.is_truthy only considers true to be truthy.
+                return Literal(value is not True)
+            try:
+                return Literal(-value)
+            except TypeError:
+                pass
+        return expr
+
+    def visit_variable_expr(self, expr: Variable) -> Expr:
+        if self.level < 2:
+            return expr
+
+        is_local, declaration = self.lookup(expr.name.lexeme)
+        if is_local:
+            if declaration in self.constants:
+                return Literal(self.constants[declaration])
+        elif expr.name.lexeme in self.global_constants:
+            return Literal(self.global_constants[expr.name.lexeme])
+        return expr
+
+    # Inlining.
+
+    def inlinable_function(self, stmt: Function) -> Inlinable | None:
+        name = stmt.name.lexeme
+        if (
+            not self.whole_program
+            or self.global_declarations.get(name) != 1
+            or name in self.assigned_globals
+        ):
+            return None  # The name might not always be this function.
+
+        match stmt.body:
+            case [Return(_, value)] if value is not None:
+                params = [param.lexeme for param in stmt.params]
+                inlinable = Inlinable(params, value, dict.fromkeys(params, 0))
+                size = self.inspect(value, inlinable)
+                if size is not None and size <= INLINE_LIMIT:
+                    return inlinable
+        return None
+
+    def inspect(
+        self,
+        expr: Expr,
+        inlinable: Inlinable,
+        conditional: bool = False,
+    ) -> int | None:
+        '''
+        Fills in what inlinable reads and calls, and returns the number of
+        nodes in expr. None if it has anything that can't be inlined, like
+        an assignment. conditional is whether expr may not be evaluated.
+        '''
+        match expr:
+            case Literal():
+                return 1
+            case Variable(name):
+                if name.lexeme in inlinable.uses:
+                    inlinable.uses[name.lexeme] += 1
+                    if conditional:
+                        inlinable.conditional.add(name.lexeme)
+                    else:
+                        inlinable.order.append(name.lexeme)
+                else:
+                    inlinable.globals.add(name.lexeme)
+                return 1
+            case Logical(left, _, right):
+                left_size = self.inspect(left, inlinable, conditional)
+                right_size = self.inspect(right, inlinable, True)
+                if left_size is None or right_size is None:
+                    return None
+                return 1 + left_size + right_size
+            case Binary(left, _, right):
+                children = [left, right]
+            case Unary(_, right):
+                children = [right]
+            case Grouping(expression):
+                children = [expression]
+            case Get(obj):
+                children = [obj]
+            case Call(callee, arguments):
+                inlinable.calls = True
+                children = [callee, *arguments]
+            case _:
+                return None
+
+        size = 1
+        for child in children:
+            child_size = self.inspect(child, inlinable, conditional)
+            if child_size is None:
+                return None
+            size += child_size
+        if not isinstance(expr, Grouping):
+            inlinable.order.append(None)  # Evaluated after its operands.
+        return size
+
+    def inline(self, expr: Call, name: Token) -> Expr | None:
+        '''
+        Replaces a call of an inlinable function with its returned
+        expression, with the arguments in place of the parameters. That's
+        only done when nobody can tell the difference: every argument is
+        evaluated exactly once, in the order of the call and before
+        anything in the body that can raise, or it's a literal, or a
+        variable read more than once with nothing in between that could
+        assign it. An argument the body may not evaluate, in the right
+        operand of an and or or, has to be a literal. The names the body
+        reads mustn't be shadowed where it's inlined.
+        '''
+        inlinable = self.inlinable.get(name.lexeme)
+        if (
+            inlinable is None
+            or name.lexeme in self.inlining
+            or self.lookup(name.lexeme)[0]
+            or len(expr.arguments) != len(inlinable.params)
+            or any(self.lookup(read)[0] for read in inlinable.globals)
+        ):
+            return None
+
+        in_order = []  # The parameters that must be read in call order.
+        for param, argument in zip(inlinable.params, expr.arguments):
+            uses = inlinable.uses[param]
+            if isinstance(argument, Literal):
+                # Reading a parameter that holds nil raises, nil doesn't.
+                if argument.value is None and uses:
+                    return None
+                continue
+            if inlinable.calls or uses == 0 or param in inlinable.conditional:
+                return None
+            if not isinstance(argument, (Variable, This)):
+                if uses > 1 or not self.pure(argument):
+                    return None
+                in_order.append(param)
+
+        if in_order:
+            # Up to the last of them, the body may only read parameters.
+            last = max(inlinable.order.index(param) for param in in_order)
+            prefix = inlinable.order[:last + 1]
+            if None in prefix or [read for read in prefix if read in in_order] != in_order:
+                return None
+
+        arguments = dict(zip(inlinable.params, expr.arguments))
+        inlined = self.substitute(inlinable.body, arguments)
+
+        # Optimized again, e.g. to fold constant arguments into the body.
+        self.inlining.add(name.lexeme)
+        try:
+            return inlined.accept(self)
+        finally:
+            self.inlining.discard(name.lexeme)
+
+    def pure(self, expr: Expr) -> bool:
+        '''
+        Whether evaluating expr can't run any code or change anything.
+        It may still raise, unless it's a Literal, Variable or This.
+        '''
+        match expr:
+            case Literal() | Variable() | This():
+                return True
+            case Binary(left, _, right) | Logical(left, _, right):
+                return self.pure(left) and self.pure(right)
+            case Unary(_, right):
+                return self.pure(right)
+            case Grouping(expression):
+                return self.pure(expression)
+            case Get(obj):
+                return self.pure(obj)
+        return False
+
+    def substitute(self, expr: Expr, arguments: dict[str, Expr]) -> Expr:
+        '''
+        A copy of expr with the parameters replaced. Every node is new, as
+        the copies are resolved and cached separately from the original.
+        '''
+        match expr:
+            case Literal():
+                return expr
+            case Variable(name):
+                if name.lexeme in arguments:
+                    return arguments[name.lexeme]
+                return Variable(name)  # A global, see inline.
+            case Binary(left, operator, right):
+                return Binary(
+                    self.substitute(left, arguments),
+                    operator,
+                    self.substitute(right, arguments),
+                )
+            case Logical(left, operator, right):
+                return Logical(
+                    self.substitute(left, arguments),
+                    operator,
+                    self.substitute(right, arguments),
+                )
+            case Unary(operator, right):
+                return Unary(operator, self.substitute(right, arguments))
+            case Grouping(expression):
+                return self.substitute(expression, arguments)
+            case Get(obj, name):
+                return Get(self.substitute(obj, arguments), name)
+            case Call(callee, call_arguments, paren):
+                return Call(
+                    self.substitute(callee, arguments),
+                    [self.substitute(argument, arguments) for argument in call_arguments],
+                    paren,
+                )
+        raise ValueError(f'Can\'t inline {expr!r}')  # Ruled out by inspect.
@@ -1,3 +1,5 @@
+from typing import Iterable, Iterator
+
 from lox.token.token import Token
 from lox.enums.tokentype import TokenType
 from lox.abcs.expr import (
@@ -30,9 +32,12 @@ from lox.abcs.stmt import (
 from lox.exceptions.errors import LoxSyntaxError, LoxArgumentError
 
 class Parser:
-    def __init__(self, tokens: list[Token]):
-        self.tokens = tokens
-        self.current = 0
+    def __init__(self, tokens: Iterable[Token]):
+        # Only the current and previous token are ever looked at, so the
+        # tokens can come straight from a scanner generator.
+        self.tokens = iter(tokens)
+        self.current: Token = next(self.tokens)
+        self.last: Token | None = None
 
     def expression(self) -> Expr:
         return self.assignment()
@@ -457,7 +462,8 @@ class Parser:
 
     def advance(self) -> Token:
         if not self.isatend():
-            self.current += 1
+            self.last = self.current
+            self.current = next(self.tokens)
 
         return self.previous()
 
@@ -465,14 +471,17 @@ class Parser:
         return self.peek().tokentype == TokenType.EOF
 
     def peek(self) -> Token:
-        return self.tokens[self.current]
+        return self.current
 
     def previous(self) -> Token:
-        return self.tokens[self.current - 1]
+        return self.last
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
+        return list(self.declarations())
+
+    def declarations(self) -> Iterator[Stmt]:
+        '''
+        Parses one top-level declaration at a time, as they are needed.
+        '''
         while not self.isatend():
-            statements.append(self.declaration())
-        
-        return statements
\ No newline at end of file
+            yield self.declaration()
\ No newline at end of file
@@ -0,0 +1,240 @@
+'''
+Profiler for Lox functions, on the tree-walker. Interpreter(profiler=...)
+makes LoxFunction.run, LoxClass.call and the natives report every call
+here, so the times are per Lox function rather than per visit method as
+with cProfile.
+
+Functions are identified by name and declaration line, like fib:3, and
+classes and natives by name. Two outputs:
+
+    report  a table of calls, self and cumulative time per function,
+            sorted by self time
+    folded  one line per call stack with its self time in microseconds,
+            'main;fib:3;fib:3 1234', the input of flamegraph.pl, inferno
+            and speedscope
+
+A tail call replaces the caller in the stack, as it does when running.
+'''
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+from lox.abcs.lox_callable import LoxCallable
+from lox.abcs.stmt import Function
+from lox.lox_globals.registry import NativeFunction
+if TYPE_CHECKING:
+    from lox.interpreter import Interpreter
+    from lox.frame import Frame
+    from lox.callables.lox_function import LoxFunction
+    from lox.callables.lox_class import LoxClass
+
+ROOT = 'main'  # The script's top level, at the bottom of every stack.
+
+@dataclass
+class FunctionStats:
+    calls: int = 0
+    self_time: float = 0.0
+    # Not counting the time of recursive calls twice.
+    cumulative_time: float = 0.0
+
+class CallNode:
+    '''
+    A call stack, as a path from the root of a tree of callers.
+    '''
+    __slots__ = ('label', 'parent', 'children', 'self_time')
+
+    def __init__(self, label: str, parent: CallNode | None):
+        self.label = label
+        self.parent = parent
+        self.children: dict[str, CallNode] = {}
+        self.self_time = 0.0
+
+    def child(self, label: str) -> CallNode:
+        node = self.children.get(label)
+        if node is None:
+            node = self.children[label] = CallNode(label, self)
+        return node
+
+class Activation:
+    '''
+    A call that hasn't returned yet.
+    '''
+    __slots__ = ('label', 'node', 'start', 'children_time')
+
+    def __init__(self, label: str, node: CallNode, start: float):
+        self.label = label
+        self.node = node
+        self.start = start
+        self.children_time = 0.0
+
+class Profiler:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stats: dict[str, FunctionStats] = {}
+        self.root = CallNode(ROOT, None)
+        self.stack: list[Activation] = []
+        self.active: dict[str, int] = {}  # Calls of each label on the stack.
+        self.labels: dict[Function, str] = {}
+        self.start = clock()
+
+    def label(self, declaration: Function) -> str:
+        label = self.labels.get(declaration)
+        if label is None:
+            name = declaration.name
+            label = self.labels[declaration] = f'{name.lexeme}:{name.line}'
+        return label
+
+    def enter(self, label: str) -> None:
+        parent = self.stack[-1].node if self.stack else self.root
+        self.stack.append(Activation(label, parent.child(label), self.clock()))
+        self.active[label] = self.active.get(label, 0) + 1
+
+    def exit(self) -> None:
+        activation = self.stack.pop()
+        elapsed = self.clock() - activation.start
+        own_time = elapsed - activation.children_time
+
+        stats = self.stats.get(activation.label)
+        if stats is None:
+            stats = self.stats[activation.label] = FunctionStats()
+        stats.calls += 1
+        stats.self_time += own_time
+        activation.node.self_time += own_time
+
+        active = self.active[activation.label] - 1
+        self.active[activation.label] = active
+        if active == 0:
+            stats.cumulative_time += elapsed
+
+        if self.stack:
+            self.stack[-1].children_time += elapsed
+
+    def tail_call(self, function: LoxFunction) -> None:
+        '''
+        The running function is done, and the function it returned a call
+        of takes its place.
+        '''
+        self.exit()
+        self.enter(self.label(function.declaration))
+
+    # Hooks.
+
+    def run_function(
+        self,
+        function: LoxFunction,
+        interpreter: Interpreter,
+        closure: Frame | None,
+        arguments: list[Any],
+    ) -> Any:
+        self.enter(self.label(function.declaration))
+        try:
+            return function.execute(interpreter, closure, arguments)
+        finally:
+            self.exit()
+
+    def call_class(
+        self,
+        klass: LoxClass,
+        interpreter: Interpreter,
+        arguments: list[Any],
+    ) -> Any:
+        self.enter(klass.name)
+        try:
+            return klass.instantiate(interpreter, arguments)
+        finally:
+            self.exit()
+
+    def native(self, native: NativeFunction) -> NativeFunction:
+        '''
+        The native with its calls timed, for the interpreter's globals.
+        '''
+        function = native.function
+        label = native.name
+
+        def timed(*arguments: Any) -> Any:
+            self.enter(label)
+            try:
+                return function(*arguments)
+            finally:
+                self.exit()
+        return NativeFunction(native.name, timed, native.parameters)
+
+    def callable(self, label: str, callee: LoxCallable) -> LoxCallable:
+        return ProfiledCallable(self, label, callee)
+
+    # Output.
+
+    def report(self) -> str:
+        total = self.clock() - self.start
+        lines = [
+            f'{"calls":>10} {"self s":>10} {"self %":>7} {"cumul s":>10}  function',
+        ]
+        ordered = sorted(
+            self.stats.items(),
+            key=lambda item: item[1].self_time,
+            reverse=True,
+        )
+        for label, stats in ordered:
+            share = 100 * stats.self_time / total if total else 0.0
+            lines.append(
+                f'{stats.calls:>10} {stats.self_time:>10.4f} {share:>6.1f}% '
+                f'{stats.cumulative_time:>10.4f}  {label}'
+            )
+        lines.append(f'{total:.4f}s in total')
+        return '\n'.join(lines)
+
+    def folded(self) -> list[str]:
+        '''
+        The folded stacks, with the top level's own time under main.
+        '''
+        self.root.self_time = max(
+            0.0,
+            self.clock() - self.start
+            - sum(self.cumulative(child) for child in self.root.children.values()),
+        )
+
+        lines = []
+        pending = [(self.root, ROOT)]
+        while pending:
+            node, path = pending.pop()
+            microseconds = round(node.self_time * 1_000_000)
+            if microseconds > 0:
+                lines.append(f'{path} {microseconds}')
+            for label, child in node.children.items():
+                pending.append((child, f'{path};{label}'))
+        return sorted(lines)
+
+    def cumulative(self, node: CallNode) -> float:
+        return node.self_time + sum(
+            self.cumulative(child) for child in node.children.values()
+        )
+
+class ProfiledCallable(LoxCallable):
+    '''
+    Times the calls of a native that isn't a NativeFunction, like memo
+    or the methods of arrays, lists and maps.
+    '''
+    __slots__ = ('profiler', 'label', 'callee')
+
+    def __init__(self, profiler: Profiler, label: str, callee: LoxCallable):
+        self.profiler = profiler
+        self.label = label
+        self.callee = callee
+
+    def arity(self) -> int:
+        return self.callee.arity()
+
+    def call(
+        self,
+        interpreter: Interpreter,
+        arguments: list[Any]
+    ) -> Any:
+        self.profiler.enter(self.label)
+        try:
+            return self.callee.call(interpreter, arguments)
+        finally:
+            self.profiler.exit()
+
+    def __str__(self):
+        return str(self.callee)
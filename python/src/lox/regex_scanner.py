@@ -0,0 +1,97 @@
+import re
+from typing import Iterator
+
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+from lox.scanner import Scanner
+
+OPERATORS: dict[str, TokenType] = {
+    '(': TokenType.LEFT_PAREN,
+    ')': TokenType.RIGHT_PAREN,
+    '{': TokenType.LEFT_BRACE,
+    '}': TokenType.RIGHT_BRACE,
+    ',': TokenType.COMMA,
+    '.': TokenType.DOT,
+    '-': TokenType.MINUS,
+    '+': TokenType.PLUS,
+    ';': TokenType.SEMICOLON,
+    '*': TokenType.STAR,
+    '/': TokenType.SLASH,
+    '!': TokenType.BANG,
+    '!=': TokenType.BANG_EQUAL,
+    '=': TokenType.EQUAL,
+    '==': TokenType.EQUAL_EQUAL,
+    '<': TokenType.LESS,
+    '<=': TokenType.LESS_EQUAL,
+    '>': TokenType.GREATER,
+    '>=': TokenType.GREATER_EQUAL,
+}
+
+# One alternative per kind of lexeme, tried in order. Each mirrors what
+# Scanner does character by character, quirks included. Blanks before a
+# lexeme are part of its match, which saves a match per run of them.
+TOKEN_PATTERN = re.compile(
+    r'''
+    [ \t\r]*
+    (?:
+      (?P<IDENTIFIER>[^\W\d_][^\W_]*)  # Starts with a letter, then isalnum.
+    | (?P<NEWLINE>\n)
+    | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;*])
+    | (?P<NUMBER>\d+(?:\.\d+)?)
+    | (?P<STRING>"[^"]*"?)  # Unterminated strings run to the end.
+    | (?P<COMMENT>//[^\n]*)
+    # Scanner.multiline_comment stops at a '*' or before a '/', and only
+    # skips the two characters if they are '*/'.
+    | (?P<BLOCK_COMMENT>/\*(?:[^*](?!/))*(?:\*/)?)
+    | (?P<SLASH>/)
+    | (?P<UNEXPECTED>.)  # Ignored, like in Scanner.
+    )
+    ''',
+    re.VERBOSE | re.DOTALL,
+)
+
+class RegexScanner:
+    '''
+    Produces the same tokens as Scanner, but matches whole lexemes with a
+    single compiled pattern instead of going through advance and peek for
+    every character. Tokens are generated lazily, so the parser can start
+    before the whole source is scanned.
+    '''
+
+    keywords: dict[str, TokenType] = Scanner.keywords
+
+    def __init__(self, source: str):
+        self.source: str = source
+        self.line = 1
+
+    def scan_tokens(self) -> list[Token]:
+        return list(self.tokens())
+
+    def tokens(self) -> Iterator[Token]:
+        keywords = self.keywords
+        identifier = TokenType.IDENTIFIER
+        line = self.line
+
+        for match in TOKEN_PATTERN.finditer(self.source):
+            kind = match.lastgroup
+            text = match.group(kind)
+
+            if kind == 'IDENTIFIER':
+                yield Token(keywords.get(text, identifier), text, None, line)
+            elif kind == 'NEWLINE':
+                line += 1
+            elif kind == 'OPERATOR':
+                yield Token(OPERATORS[text], text, None, line)
+            elif kind == 'NUMBER':
+                yield Token(TokenType.NUMBER, text, float(text), line)
+            elif kind == 'STRING':
+                line += text.count('\n')
+                if len(text) > 1 and text[-1] == '"':
+                    yield Token(TokenType.STRING, text, text[1:-1], line)
+            elif kind == 'BLOCK_COMMENT':
+                line += text.count('\n')
+            elif kind == 'SLASH':
+                yield Token(TokenType.SLASH, text, None, line)
+
+        self.line = line
+        yield Token(TokenType.EOF, '', None, line)
@@ -1,3 +1,5 @@
+from dataclasses import dataclass, field
+
 from lox.abcs.expr import (
     Expr,
     Binary,
@@ -32,7 +34,32 @@ from lox.abcs.stmt import Break
 from lox.enums.functiontype import FunctionType
 from lox.abcs.stmt import Class
 
-scope = dict[str, bool]
+class Scope(dict[str, bool]):
+    '''
+    Maps names to whether they have been defined yet. Also hands out the
+    slot each name gets in the runtime Frame, in declaration order, and
+    keeps what purity inference needs to know about the names.
+    '''
+    def __init__(self):
+        super().__init__()
+        self.slots: dict[str, int] = {}
+        self.functions: dict[str, Function] = {}  # Names declared by fun.
+        self.assigned: set[str] = set()  # Names assigned or redeclared.
+
+@dataclass
+class Effects:
+    '''
+    What resolving the body of a function found out about its purity. Calls
+    and reads of outer variables are only judged once the scopes they refer
+    to are complete, by Resolver.infer_purity.
+    '''
+    function: Function
+    depth: int  # Number of scopes outside the function.
+    reason: str | None = None  # Why it's impure, the first one found.
+    calls: list[tuple[Scope, str]] = field(default_factory=list)
+    reads: list[tuple[Scope, str]] = field(default_factory=list)
+    # Each call makes a new closure, which must not carry state either.
+    nested: list[Function] = field(default_factory=list)
 
 class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
     """
@@ -42,8 +69,15 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
 
     def __init__(self, interpreter: Interpreter):
         self.interpreter = interpreter
-        self.scopes: list[scope] = []  # Stack of scopes.
+        self.scopes: list[Scope] = []  # Stack of scopes.
         self.current_function: FunctionType = FunctionType.NONE
+        self.function_count = 0  # Functions and methods resolved so far.
+
+        # Only for purity inference, the runtime handles globals itself.
+        self.globals = Scope()
+        self.effects: list[Effects] = []  # Stack of functions being resolved.
+        self.resolved: list[Effects] = []  # In the order they were finished.
+        self.inferred = 0  # How many of resolved have had their purity set.
 
     def resolve(self, *stmts: Stmt | Expr) -> None:
         for statement in stmts:
@@ -56,27 +90,126 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
     ) -> None:
         enclosing_function = self.current_function
         self.current_function = functiontype
+        self.function_count += 1
+        self.effects.append(Effects(function, len(self.scopes)))
 
         self.begin_scope()
         for param in function.params:
             self.declare(param)
             self.define(param)
         self.resolve(*function.body)
-        self.end_scope()
+        self.end_scope(function)
 
+        self.resolved.append(self.effects.pop())
         self.current_function = enclosing_function
 
-    def begin_scope(self) -> None:
-        self.scopes.append({})
+    def infer_purity(self) -> None:
+        '''
+        Sets Function.pure for the functions resolved since the last call.
+        A pure function doesn't print, doesn't assign or read variables that
+        are assigned outside its own scope, doesn't touch fields, and only
+        calls pure functions. So its result depends on nothing but its
+        arguments, and calls to it can be memoized, folded or reordered.
+
+        Call this once the enclosing scopes are complete, after resolving
+        the whole program. Code resolved later, as in the REPL, can still
+        assign a global that an earlier function was found pure reading.
+        '''
+        pending = self.resolved[self.inferred:]
+        self.inferred = len(self.resolved)
+
+        for effects in pending:
+            if effects.reason is None:
+                for scope, name in effects.reads:
+                    if name in scope.assigned:
+                        effects.reason = f'reads {name}, which is assigned'
+                        break
+            if effects.reason is None:
+                for scope, name in effects.calls:
+                    if name in scope.assigned or name not in scope.functions:
+                        effects.reason = f'calls {name}, which is not a function'
+                        break
+            effects.function.pure = effects.reason is None
+
+        # Starting from all of them pure, so recursion doesn't stand in
+        # the way, until no call to an impure function is left.
+        changed = True
+        while changed:
+            changed = False
+            for effects in pending:
+                if effects.function.pure:
+                    effects.reason = self.impure_dependency(effects)
+                    if effects.reason is not None:
+                        effects.function.pure = False
+                        changed = True
+
+    def impure_dependency(self, effects: Effects) -> str | None:
+        for scope, name in effects.calls:
+            if not scope.functions[name].pure:
+                return f'calls {name}, which is impure'
+        for function in effects.nested:
+            if not function.pure:
+                return f'declares {function.name.lexeme}, which is impure'
+        return None
 
-    def end_scope(self) -> None:
-        self.scopes.pop()
+    def purity_report(self) -> list[str]:
+        '''
+        A line per function and method resolved so far, in source order.
+        '''
+        lines = []
+        for effects in sorted(self.resolved, key=lambda effects: effects.function.name.line):
+            function = effects.function
+            if function.pure is None:
+                status = 'not inferred'
+            elif function.pure:
+                status = 'pure'
+            else:
+                status = f'impure, {effects.reason}'
+            lines.append(f'[line {function.name.line}] {function.name.lexeme}: {status}')
+        return lines
+
+    def impure(self, reason: str) -> None:
+        '''
+        Marks the function being resolved impure, if there is one.
+        '''
+        if self.effects and self.effects[-1].reason is None:
+            self.effects[-1].reason = reason
+
+    def outside(self, index: int | None) -> bool:
+        '''
+        Whether the scope at index, None for globals, is outside the
+        function being resolved.
+        '''
+        return bool(self.effects) and (index is None or index < self.effects[-1].depth)
+
+    def scope_at(self, index: int | None) -> Scope:
+        return self.globals if index is None else self.scopes[index]
 
-    def declare(self, name: Token) -> None:
+    def begin_scope(self) -> None:
+        self.scopes.append(Scope())
+
+    def end_scope(self, owner: Block | Function | None = None) -> None:
+        '''
+        Pops the scope, telling the interpreter how many slots the
+        frame of the owning block or function needs.
+        '''
+        scope = self.scopes.pop()
+        if owner is not None:
+            self.interpreter.resolve_frame(owner, len(scope.slots))
+
+    def declare(self, name: Token) -> int | None:
+        '''
+        Returns the slot of the variable, or None for globals.
+        '''
         if not self.scopes:
-            return
+            if name.lexeme in self.globals:
+                self.globals.assigned.add(name.lexeme)
+            self.globals[name.lexeme] = True
+            return None
 
         scope = self.scopes[-1]  # Peeking!
+        if name.lexeme in scope:
+            scope.assigned.add(name.lexeme)
 
         if name.lexeme in self.scopes:
             raise LoxException(
@@ -84,6 +217,8 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
             )
 
         scope[name.lexeme] = False
+        # Redeclaring a name in the same scope reuses its slot.
+        return scope.slots.setdefault(name.lexeme, len(scope.slots))
 
     def define(self, name: Token) -> None:
         if not self.scopes:
@@ -92,26 +227,43 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
         scope = self.scopes[-1]
         scope[name.lexeme] = True
 
-    def resolve_local(self, expr: Expr, name: Token) -> None:
+    def find(self, name: Token) -> int | None:
+        '''
+        Returns the index of the scope the name is in, or None for globals.
+        '''
         for i in range(len(self.scopes) - 1, -1, -1):
             if name.lexeme in self.scopes[i]:
-                self.interpreter.resolve(
-                    expr,
-                    len(self.scopes) - 1 - i,
-                )
-                return
+                return i
+        return None
+
+    def resolve_local(self, expr: Expr, name: Token) -> int | None:
+        i = self.find(name)
+        if i is not None:
+            self.interpreter.resolve(
+                expr,
+                len(self.scopes) - 1 - i,
+                self.scopes[i].slots[name.lexeme],
+            )
+        return i
+
+    def declare_local(self, stmt: Stmt, name: Token) -> None:
+        slot = self.declare(name)
+        if slot is not None:
+            self.interpreter.resolve_declaration(stmt, slot)
 
     def visit_block_stmt(self, stmt: Block) -> None:
         self.begin_scope()
         self.resolve(*stmt.statements)
-        self.end_scope()
+        self.end_scope(stmt)
 
     def visit_class_stmt(self, stmt: Class) -> None:
-        self.declare(stmt.name)
+        self.declare_local(stmt, stmt.name)
         self.define(stmt.name)
 
+        # Bound methods get a frame of their own, holding just 'this'.
         self.begin_scope()
         self.scopes[-1]["this"] = True
+        self.scopes[-1].slots["this"] = 0
     
         for method in stmt.methods:
             if method.name.lexeme == "init":
@@ -126,8 +278,12 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
         self.resolve(stmt.expression)
 
     def visit_function_stmt(self, stmt: Function) -> None:
-        self.declare(stmt.name)
+        self.declare_local(stmt, stmt.name)
         self.define(stmt.name)
+        scope = self.scopes[-1] if self.scopes else self.globals
+        scope.functions[stmt.name.lexeme] = stmt
+        if self.effects:
+            self.effects[-1].nested.append(stmt)
 
         self.resolve_function(stmt, FunctionType.FUNCTION)
     
@@ -139,6 +295,7 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
             self.resolve(stmt.else_branch)
 
     def visit_print_stmt(self, stmt: Print) -> None:
+        self.impure('prints')
         self.resolve(stmt.expression)
 
     # TODO: Add equivalent for break statements.
@@ -154,11 +311,16 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
                 )
             self.resolve(stmt.value)
 
+            # Nothing is left to do in the function after the call, so
+            # the call can take the place of the function's own.
+            if isinstance(stmt.value, Call):
+                self.interpreter.resolve_tail_call(stmt)
+
     def visit_break_stmt(self, stmt: Break) -> None:
         return None
 
     def visit_var_stmt(self, stmt: Var) -> None:
-        self.declare(stmt.name)
+        self.declare_local(stmt, stmt.name)
         if stmt.initializer != None:
             self.resolve(stmt.initializer)
         self.define(stmt.name)
@@ -169,17 +331,30 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
 
     def visit_assign_expr(self, expr: Assign) -> None:
         self.resolve(expr.value)
-        self.resolve_local(expr, expr.name)
-        return
+        index = self.resolve_local(expr, expr.name)
+
+        self.scope_at(index).assigned.add(expr.name.lexeme)
+        if self.outside(index):
+            self.impure(f'assigns {expr.name.lexeme}')
 
     def visit_binary_expr(self, expr: Binary) -> None:
         self.resolve(expr.left, expr.right)
 
     def visit_call_expr(self, expr: Call) -> None:
+        match expr.callee:
+            case Variable(name) if self.effects:
+                scope = self.scope_at(self.find(name))
+                self.effects[-1].calls.append((scope, name.lexeme))
+            case Get(_, name):
+                self.impure(f'calls method {name.lexeme}')
+            case _:
+                self.impure('calls a computed function')
+
         self.resolve(expr.callee)
         self.resolve(*expr.arguments)
 
     def visit_get_expr(self, expr: Get) -> None:
+        self.impure(f'reads field {expr.name.lexeme}')
         self.resolve(expr.obj)
 
     def visit_grouping_expr(self, expr: Grouping) -> None:
@@ -192,6 +367,7 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
         self.resolve(expr.left, expr.right)
 
     def visit_set_expr(self, expr: Set) -> None:
+        self.impure(f'sets field {expr.name.lexeme}')
         self.resolve(expr.value)
         self.resolve(expr.obj)
 
@@ -214,4 +390,6 @@ class Resolver(Stmt.Visitor[None], Expr.Visitor[None]):
                 """
             )
 
-        self.resolve_local(expr, expr.name)
+        index = self.resolve_local(expr, expr.name)
+        if self.outside(index):
+            self.effects[-1].reads.append((self.scope_at(index), expr.name.lexeme))
@@ -0,0 +1,97 @@
+'''
+Sampling profiler for the tree-walker. A SIGPROF timer interrupts the
+running script every interval seconds of CPU time, and the handler looks
+down the Python stack for the innermost node the Interpreter is visiting,
+the stmt or expr argument of its visit methods. The line of that node's
+first Token gets a hit.
+
+Nothing runs between samples, so unlike the Profiler it's cheap enough
+to leave on: about a percent at the default interval. Unix only, as it
+needs signal.setitimer.
+'''
+from __future__ import annotations
+import signal
+from collections import Counter
+from types import FrameType
+from typing import Any
+
+from lox.abcs.expr import Expr
+from lox.abcs.stmt import Stmt
+from lox.token.token import Token
+
+NODE_NAMES = ('expr', 'stmt')  # What the Interpreter calls its nodes.
+
+class Sampler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.hits: Counter[int] = Counter()  # Per line.
+        self.samples = 0
+        self.lines: dict[Expr | Stmt, int | None] = {}  # Cache of line_of.
+        self.previous_handler: Any = None
+
+    def start(self) -> None:
+        self.previous_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def __enter__(self) -> Sampler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def sample(self, signum: int, frame: FrameType | None) -> None:
+        self.samples += 1
+        while frame is not None:
+            names = frame.f_code.co_varnames
+            if 'expr' in names or 'stmt' in names:
+                for name in NODE_NAMES:
+                    node = frame.f_locals.get(name)
+                    if isinstance(node, (Expr, Stmt)):
+                        line = self.line_of(node)
+                        if line is not None:
+                            self.hits[line] += 1
+                            return
+            frame = frame.f_back
+
+    def line_of(self, node: Expr | Stmt) -> int | None:
+        '''
+        The line of the first Token in node, None if it has none, like a
+        Literal.
+        '''
+        if node in self.lines:
+            return self.lines[node]
+
+        line = None
+        pending: list[Any] = [node]
+        while pending and line is None:
+            value = pending.pop()
+            if isinstance(value, Token):
+                line = value.line
+            elif isinstance(value, (Expr, Stmt)):
+                pending.extend(getattr(value, name) for name in reversed(value.__match_args__))
+            elif isinstance(value, list):
+                pending.extend(reversed(value))
+
+        self.lines[node] = line
+        return line
+
+    def report(self, source: str | None = None) -> str:
+        '''
+        The lines that got hits, most first, with their source if given.
+        '''
+        source_lines = [] if source is None else source.splitlines()
+        attributed = sum(self.hits.values())
+        lines = [f'{"line":>6} {"hits":>8} {"%":>6}  source']
+        for line, hits in self.hits.most_common():
+            text = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ''
+            lines.append(f'{line:>6} {hits:>8} {100 * hits / attributed:>5.1f}%  {text}')
+        lines.append(
+            f'{self.samples} samples every {self.interval * 1000:g}ms, '
+            f'{self.samples - attributed} outside the script'
+        )
+        return '\n'.join(lines)
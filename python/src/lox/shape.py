@@ -0,0 +1,101 @@
+from __future__ import annotations
+import sys
+from typing import Any, TYPE_CHECKING
+
+from lox.exceptions.errors import LoxException
+if TYPE_CHECKING: from lox.callables.lox_class import LoxInstance
+
+class Shape:
+    '''
+    A hidden class: the field layout shared by all instances that got the
+    same fields in the same order. Maps field names to indices in
+    LoxInstance.values.
+
+    Every class has its own empty root shape and adding a field moves an
+    instance along a transition to the next shape. So instances that are
+    built the same way end up with the very same Shape object, and a shape
+    also tells which class its instances belong to.
+    '''
+    __slots__ = ('indices', 'transitions')
+
+    def __init__(self, indices: dict[str, int] | None = None):
+        self.indices: dict[str, int] = {} if indices is None else indices
+        self.transitions: dict[str, Shape] = {}
+
+    def with_field(self, name: str) -> Shape:
+        shape = self.transitions.get(name)
+        if shape is None:
+            shape = Shape({**self.indices, name: len(self.indices)})
+            self.transitions[name] = shape
+        return shape
+
+class PropertyCache:
+    '''
+    Inline cache of a single Get or Set site. It remembers the last shape
+    seen there and what the name meant for it: the index of a field, the
+    method it found, or the shape a Set moves the instance to. As long as
+    the site keeps seeing that shape, which is the common case, a property
+    access is an identity check and a list index.
+    '''
+    __slots__ = ('name', 'shape', 'index', 'method', 'next_shape')
+
+    def __init__(self, name: str):
+        self.name = sys.intern(name)
+        self.shape: Shape | None = None
+        self.index = 0
+        self.method: Any = None  # When the name isn't a field.
+        self.next_shape: Shape | None = None  # When Set adds the field.
+
+    def __str__(self) -> str:
+        return self.name  # Shows up as the operand in disassembly.
+
+    def lookup(self, instance: LoxInstance) -> bool:
+        '''
+        Caches what the name means for the instance's shape. Returns False
+        if it's neither a field nor a method.
+        '''
+        shape = instance.shape
+        index = shape.indices.get(self.name)
+        if index is not None:
+            self.shape, self.index, self.method = shape, index, None
+            return True
+
+        method = instance.klass.find_method(self.name)
+        if method is None:
+            return False
+
+        self.shape, self.method = shape, method
+        return True
+
+    def get(self, instance: LoxInstance) -> Any:
+        if instance.shape is not self.shape and not self.lookup(instance):
+            raise LoxException(f"Undefined attribute {self.name} on {instance}")
+
+        if self.method is None:
+            return instance.values[self.index]
+        return instance.bind(self.name, self.method)
+
+    def find_method(self, instance: LoxInstance) -> Any:
+        '''
+        The unbound method the name refers to, for call sites that invoke
+        it right away. None if it's a field, or undefined.
+        '''
+        if instance.shape is not self.shape and not self.lookup(instance):
+            return None
+        return self.method
+
+    def set(self, instance: LoxInstance, value: Any) -> None:
+        if instance.shape is not self.shape:
+            shape = instance.shape
+            index = shape.indices.get(self.name)
+            self.shape = shape
+            if index is None:
+                self.next_shape = shape.with_field(self.name)
+            else:
+                self.index, self.next_shape = index, None
+
+        if self.next_shape is None:
+            instance.values[self.index] = value
+        else:
+            instance.shape = self.next_shape
+            instance.values.append(value)
@@ -1,10 +1,11 @@
-from dataclasses import dataclass
-from typing import Any
+from typing import Any, NamedTuple
 
 from lox.enums.tokentype import TokenType
 
-@dataclass(frozen=True)
-class Token:
+# A NamedTuple rather than a frozen dataclass, since the scanner creates
+# one per lexeme and the dataclass __init__ is several times slower. It's
+# still immutable, hashable and compared by value.
+class Token(NamedTuple):
     tokentype: TokenType
     lexeme: str
     literal: Any
@@ -0,0 +1,394 @@
+from __future__ import annotations
+import math
+from typing import Any, Callable, TYPE_CHECKING
+
+from lox.abcs.expr import (
+    Expr,
+    Binary,
+    Grouping,
+    Logical,
+    Unary,
+    Literal,
+    Variable,
+    Assign,
+    Call,
+    Get,
+    Set,
+    This,
+)
+from lox.abcs.stmt import (
+    Stmt,
+    Print,
+    Function,
+    Return,
+    If,
+    While,
+    Expression,
+    Var,
+    Block,
+    Break,
+    Class
+)
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+from lox.namespace import Namespace
+from lox.frame import Frame
+from lox.callables.lox_class import LoxInstance
+from lox.callables.lox_function import LoxFunction
+from lox.enums.completion import Completion
+from lox.shape import PropertyCache
+from lox.abcs.native_object import NativeObject
+from lox.lox_globals.registry import NativeFunction
+from lox.exceptions.errors import LoxException, LoxNameError, LoxTypeError
+if TYPE_CHECKING: from lox.interpreter import Interpreter
+
+BINARY_OPERATORS: dict[TokenType, str] = {
+    TokenType.GREATER: '>',
+    TokenType.GREATER_EQUAL: '>=',
+    TokenType.LESS: '<',
+    TokenType.LESS_EQUAL: '<=',
+    TokenType.BANG_EQUAL: '!=',
+    TokenType.EQUAL_EQUAL: '==',
+    TokenType.MINUS: '-',
+    TokenType.SLASH: '/',
+    TokenType.STAR: '*',
+    TokenType.PLUS: '+',
+}
+
+class NotTranspilable(Exception):
+    '''
+    Raised for functions the transpiler can't handle. They keep running
+    in the tree-walker.
+    '''
+
+# Helpers available to the generated code. Lox identifiers can't contain
+# underscores, so the leading underscore keeps them apart from Lox names.
+
+def _call(interpreter: Interpreter, callee: Any, arguments: list[Any]) -> Any:
+    # Same checks as Interpreter.visit_call_expr.
+    if type(callee) is NativeFunction:
+        if len(arguments) != callee.parameters:
+            raise LoxTypeError(
+                f'Expected {callee.parameters} arguments but got {len(arguments)}'
+            )
+        return callee.function(*arguments)
+
+    if len(arguments) != callee.arity():
+        raise LoxTypeError(
+            f'Expected {callee.arity()} arguments but got {len(arguments)}'
+        )
+
+    try:
+        return callee.call(interpreter, arguments)
+    except TypeError:
+        raise LoxTypeError('Can only call functions and classes')
+
+def _tail_call(interpreter: Interpreter, callee: Any, arguments: list[Any]) -> Any:
+    # Same as Interpreter.tail_call, LoxFunction.run makes the call.
+    if len(arguments) != callee.arity():
+        raise LoxTypeError(
+            f'Expected {callee.arity()} arguments but got {len(arguments)}'
+        )
+
+    if type(callee) is LoxFunction:
+        interpreter.pending_call = (callee, callee.closure, arguments)
+        return Completion.TAIL_CALL
+    return _call(interpreter, callee, arguments)
+
+def _get(obj: Any, cache: PropertyCache) -> Any:
+    if isinstance(obj, LoxInstance):
+        return cache.get(obj)
+    if isinstance(obj, NativeObject):
+        return obj.lookup(cache.name)
+    return None
+
+def _set(obj: Any, cache: PropertyCache, value: Any) -> Any:
+    if not isinstance(obj, LoxInstance):
+        raise LoxException("Only instances have fields!")
+    cache.set(obj, value)
+    return value
+
+def _assign_global(namespace: Namespace, name: str, value: Any) -> Any:
+    namespace.assign(name, value)
+    return value
+
+def _uninitialized(name: str) -> Any:
+    raise LoxNameError(f"Variable '{name}' not initialized")
+
+def _assign(frame: Frame, slot: int, value: Any) -> Any:
+    frame.slots[slot] = value
+    return value
+
+class Transpiler(Stmt.Visitor[None], Expr.Visitor[str]):
+    """
+    Turns Lox function declarations into Python source, which is then
+    compiled and run as regular CPython bytecode by LoxFunction.call.
+
+    Only leaf functions are handled, i.e. functions that don't declare
+    functions or classes of their own. Their locals can then simply be
+    Python locals, since nothing can capture them. Variables from
+    enclosing scopes are read through the closure Frame, at the distance
+    and slot the Resolver found, so closures and 'this' work as usual.
+    """
+
+    def __init__(self, interpreter: Interpreter, threshold: int = 2):
+        self.interpreter = interpreter
+        self.threshold = threshold  # Calls before a function counts as hot.
+        self.calls: dict[Function, int] = {}
+        self.compiled: dict[Function, Callable[..., Any] | None] = {}
+
+        # State for the function being transpiled.
+        self.lines: list[str] = []
+        self.indent = 0
+        self.scopes: list[dict[str, str]] = []  # Lox name to Python name.
+        self.local_count = 0
+        self.constants: list[Any] = []
+
+    def lookup(self, declaration: Function) -> Callable[..., Any] | None:
+        '''
+        Returns the Python version of the function, if it's hot and could
+        be transpiled. It's called as function(closure, *arguments), and
+        returns Completion.TAIL_CALL for a call LoxFunction.run should make.
+        '''
+        if declaration in self.compiled:
+            return self.compiled[declaration]
+
+        calls = self.calls.get(declaration, 0) + 1
+        self.calls[declaration] = calls
+        if calls < self.threshold:
+            return None
+
+        try:
+            function = self.transpile(declaration)
+        except NotTranspilable:
+            function = None
+
+        del self.calls[declaration]
+        self.compiled[declaration] = function
+        return function
+
+    def transpile(self, declaration: Function) -> Callable[..., Any]:
+        source = self.source(declaration)
+        filename = f'<lox fn {declaration.name.lexeme}>'
+        namespace = {
+            '_interpreter': self.interpreter,
+            '_globals': self.interpreter.lox_globals,
+            '_constants': self.constants,
+            '_call': _call,
+            '_tail_call': _tail_call,
+            '_get': _get,
+            '_set': _set,
+            '_assign': _assign,
+            '_assign_global': _assign_global,
+            '_uninitialized': _uninitialized,
+        }
+        exec(compile(source, filename, 'exec'), namespace)
+        return namespace['_function']
+
+    def source(self, declaration: Function) -> str:
+        self.lines = []
+        self.indent = 1
+        self.scopes = [{}]
+        self.local_count = 0
+        self.constants = []
+
+        params = [self.declare(param) for param in declaration.params]
+        self.lines.append(f"def _function(_closure, {', '.join(params)}):")
+        self.body(declaration.body)
+
+        return '\n'.join(self.lines) + '\n'
+
+    # Emitting.
+
+    def emit(self, line: str) -> None:
+        self.lines.append('    ' * self.indent + line)
+
+    def body(self, statements: list[Stmt]) -> None:
+        '''
+        Emits an indented Python block, which mustn't be empty.
+        '''
+        start = len(self.lines)
+        for statement in statements:
+            statement.accept(self)
+        if len(self.lines) == start:
+            self.emit('pass')
+
+    def nested(self, stmt: Stmt) -> None:
+        self.indent += 1
+        self.body([stmt])
+        self.indent -= 1
+
+    def constant(self, value: Any) -> str:
+        self.constants.append(value)
+        return f'_constants[{len(self.constants) - 1}]'
+
+    # Variables.
+
+    def declare(self, name: Token) -> str:
+        # The suffix keeps shadowed variables apart and Python keywords out.
+        python_name = name.lexeme if name.lexeme.isidentifier() else 'local'
+        python_name = f'{python_name}_{self.local_count}'
+        self.local_count += 1
+        self.scopes[-1][name.lexeme] = python_name
+        return python_name
+
+    def local(self, name: Token) -> str | None:
+        for scope in reversed(self.scopes):
+            if name.lexeme in scope:
+                return scope[name.lexeme]
+        return None
+
+    def enclosing(self, expr: Expr) -> tuple[str, int] | None:
+        '''
+        The Frame and slot of a variable from outside the function, or
+        None for globals.
+        '''
+        location = self.interpreter.locals.get(expr)
+        if location is None:
+            return None
+
+        # The Resolver counts the scopes inside the function as well,
+        # but those only exist as Python locals.
+        distance, slot = location
+        distance -= len(self.scopes)
+        if distance == 0:
+            return '_closure', slot
+        return f'_closure.ancestor({distance})', slot
+
+    def variable(self, name: Token, expr: Expr) -> str:
+        # Reading a local that holds nil raises, as in the Interpreter. The
+        # Namespace of the globals already does.
+        local = self.local(name)
+        if local is not None:
+            return f'({local} if {local} is not None else _uninitialized({name.lexeme!r}))'
+
+        location = self.enclosing(expr)
+        if location is None:
+            return f'_globals[{name.lexeme!r}]'
+
+        frame, slot = location
+        if name.lexeme == 'this':
+            return f'{frame}.slots[{slot}]'  # Never nil.
+        return (
+            f'(_value if (_value := {frame}.slots[{slot}]) is not None '
+            f'else _uninitialized({name.lexeme!r}))'
+        )
+
+    # Statements.
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        self.scopes.append({})
+        for statement in stmt.statements:
+            statement.accept(self)
+        self.scopes.pop()
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        raise NotTranspilable('Nested classes capture the locals')
+
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        self.emit(stmt.expression.accept(self))
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        raise NotTranspilable('Nested functions capture the locals')
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        self.emit(f'if {stmt.condition.accept(self)}:')
+        self.nested(stmt.then_branch)
+
+        if stmt.else_branch is not None:
+            self.emit('else:')
+            self.nested(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self.emit(f'print({stmt.expression.accept(self)})')
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        if stmt.value is None:
+            self.emit('return None')
+        elif stmt in self.interpreter.tail_calls:
+            call = stmt.value
+            arguments = ', '.join(argument.accept(self) for argument in call.arguments)
+            self.emit(f'return _tail_call(_interpreter, {call.callee.accept(self)}, [{arguments}])')
+        else:
+            self.emit(f'return {stmt.value.accept(self)}')
+
+    def visit_break_stmt(self, stmt: Break) -> None:
+        self.emit('break')
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        # The initializer is generated before the name is in scope.
+        value = stmt.initializer.accept(self)
+        self.emit(f'{self.declare(stmt.name)} = {value}')
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        self.emit(f'while {stmt.condition.accept(self)}:')
+        self.nested(stmt.body)
+
+    # Expressions.
+
+    def visit_assign_expr(self, expr: Assign) -> str:
+        value = expr.value.accept(self)
+
+        local = self.local(expr.name)
+        if local is not None:
+            return f'({local} := {value})'
+
+        location = self.enclosing(expr)
+        if location is None:
+            return f'_assign_global(_globals, {expr.name.lexeme!r}, {value})'
+
+        frame, slot = location
+        return f'_assign({frame}, {slot}, {value})'
+
+    def visit_binary_expr(self, expr: Binary) -> str:
+        operator = BINARY_OPERATORS[expr.operator.tokentype]
+        return f'({expr.left.accept(self)} {operator} {expr.right.accept(self)})'
+
+    def visit_call_expr(self, expr: Call) -> str:
+        arguments = ', '.join(argument.accept(self) for argument in expr.arguments)
+        return f'_call(_interpreter, {expr.callee.accept(self)}, [{arguments}])'
+
+    def visit_get_expr(self, expr: Get) -> str:
+        return f'_get({expr.obj.accept(self)}, {self.constant(expr.cache)})'
+
+    def visit_grouping_expr(self, expr: Grouping) -> str:
+        return expr.expression.accept(self)
+
+    def visit_literal_expr(self, expr: Literal) -> str:
+        value = expr.value
+        # The repr of inf and nan isn't Python, nor is that of anything but
+        # the literals the Parser makes.
+        if type(value) is float:
+            if not math.isfinite(value):
+                return self.constant(value)
+        elif type(value) not in (str, bool, type(None)):
+            return self.constant(value)
+        return repr(value)
+
+    def visit_logical_expr(self, expr: Logical) -> str:
+        # Same semantics as Interpreter.visit_logical_expr.
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+
+        if expr.operator.tokentype == TokenType.OR:
+            return f'(True if {left} else {right})'
+        return f'({right} if {left} else False)'
+
+    def visit_set_expr(self, expr: Set) -> str:
+        obj = expr.obj.accept(self)
+        value = expr.value.accept(self)
+        return f'_set({obj}, {self.constant(expr.cache)}, {value})'
+
+    def visit_this_expr(self, expr: This) -> str:
+        return self.variable(expr.keyword, expr)
+
+    def visit_unary_expr(self, expr: Unary) -> str:
+        right = expr.right.accept(self)
+
+        if expr.operator.tokentype == TokenType.MINUS:
+            return f'(-{right})'
+        # Interpreter.is_truthy only considers true to be truthy.
+        return f'({right} is not True)'
+
+    def visit_variable_expr(self, expr: Variable) -> str:
+        return self.variable(expr.name, expr)
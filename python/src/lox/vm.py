@@ -0,0 +1,417 @@
+from __future__ import annotations
+from typing import Any
+
+from lox.abcs.stmt import Stmt
+from lox.abcs.lox_callable import LoxCallable
+from lox.callables.lox_class import LoxClass, LoxInstance
+from lox.callables.vm_function import VMFunction, VMClosure, VMBoundMethod, Upvalue
+from lox.compiler import Compiler
+from lox.enums.opcode import OpCode
+from lox.lox_globals.memo import Memo
+from lox.lox_globals.registry import NATIVES, NativeFunction
+from lox.abcs.native_object import NativeObject
+from lox.exceptions.errors import LoxException, LoxNameError, LoxTypeError
+
+# Plain ints are a lot quicker to compare than enum members.
+OP_CONSTANT = OpCode.CONSTANT.value
+OP_NIL = OpCode.NIL.value
+OP_TRUE = OpCode.TRUE.value
+OP_FALSE = OpCode.FALSE.value
+OP_POP = OpCode.POP.value
+OP_GET_LOCAL = OpCode.GET_LOCAL.value
+OP_SET_LOCAL = OpCode.SET_LOCAL.value
+OP_GET_GLOBAL = OpCode.GET_GLOBAL.value
+OP_DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+OP_SET_GLOBAL = OpCode.SET_GLOBAL.value
+OP_GET_UPVALUE = OpCode.GET_UPVALUE.value
+OP_SET_UPVALUE = OpCode.SET_UPVALUE.value
+OP_GET_PROPERTY = OpCode.GET_PROPERTY.value
+OP_SET_PROPERTY = OpCode.SET_PROPERTY.value
+OP_EQUAL = OpCode.EQUAL.value
+OP_NOT_EQUAL = OpCode.NOT_EQUAL.value
+OP_GREATER = OpCode.GREATER.value
+OP_GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+OP_LESS = OpCode.LESS.value
+OP_LESS_EQUAL = OpCode.LESS_EQUAL.value
+OP_ADD = OpCode.ADD.value
+OP_SUBTRACT = OpCode.SUBTRACT.value
+OP_MULTIPLY = OpCode.MULTIPLY.value
+OP_DIVIDE = OpCode.DIVIDE.value
+OP_NOT = OpCode.NOT.value
+OP_NEGATE = OpCode.NEGATE.value
+OP_PRINT = OpCode.PRINT.value
+OP_JUMP = OpCode.JUMP.value
+OP_JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+OP_LOOP = OpCode.LOOP.value
+OP_CALL = OpCode.CALL.value
+OP_INVOKE = OpCode.INVOKE.value
+OP_CLOSURE = OpCode.CLOSURE.value
+OP_CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE.value
+OP_RETURN = OpCode.RETURN.value
+OP_CLASS = OpCode.CLASS.value
+OP_METHOD = OpCode.METHOD.value
+
+class CallFrame:
+    __slots__ = ('closure', 'ip', 'base')
+
+    def __init__(self, closure: VMClosure, base: int):
+        self.closure = closure
+        self.ip = 0  # Only up to date while another frame is running.
+        self.base = base  # Stack index of slot zero.
+
+class VM:
+    '''
+    Stack based virtual machine running the output of the Compiler.
+    Shares LoxClass, LoxInstance and the natives with the Interpreter,
+    only functions have a representation of their own.
+    '''
+
+    def __init__(self):
+        self.stack: list[Any] = []
+        self.frames: list[CallFrame] = []
+        self.globals: dict[str, Any] = {**NATIVES, 'memo': Memo()}
+        self.open_upvalues: dict[int, Upvalue] = {}  # Keyed by stack slot.
+        self.compiler = Compiler()
+
+    def interpret(self, statements: list[Stmt]) -> bool:
+        function = self.compiler.compile(statements)
+
+        try:
+            self.call(VMClosure(function, []), [])
+        except ZeroDivisionError:
+            print("Division by zero not allowed! Bad stuff might happen...")
+            return False
+        finally:
+            self.reset_stack()
+        return True
+
+    def reset_stack(self) -> None:
+        self.stack.clear()
+        self.frames.clear()
+        self.open_upvalues.clear()
+
+    def call(self, callee: Any, arguments: list[Any]) -> Any:
+        '''
+        Calls a Lox value from Python and runs the VM until it returns.
+        '''
+        self.stack.append(callee)
+        self.stack.extend(arguments)
+
+        depth = len(self.frames)
+        if self.call_value(callee, len(arguments)):
+            return self.run(depth)
+        return self.stack.pop()
+
+    def call_value(self, callee: Any, argc: int) -> bool:
+        '''
+        Sets up a call for everything but the plain closure fast path in
+        run. Returns whether a new frame was pushed, otherwise the result
+        has already replaced the callee and arguments on the stack.
+        '''
+        stack = self.stack
+
+        if isinstance(callee, VMClosure):
+            self.push_frame(callee, argc)
+            return True
+
+        if isinstance(callee, VMBoundMethod):
+            stack[-1 - argc] = callee.receiver
+            self.push_frame(callee.method, argc)
+            return True
+
+        if isinstance(callee, LoxClass):
+            stack[-1 - argc] = LoxInstance(callee)
+            initializer = callee.find_method('init')
+            if initializer is not None:
+                self.push_frame(initializer, argc)
+                return True
+            if argc != 0:
+                raise LoxTypeError(f'Expected 0 arguments but got {argc}')
+            return False
+
+        if isinstance(callee, LoxCallable):
+            if argc != callee.arity():
+                raise LoxTypeError(
+                    f'Expected {callee.arity()} arguments but got {argc}'
+                )
+            arguments = stack[len(stack) - argc:]
+            del stack[len(stack) - argc - 1:]
+            stack.append(callee.call(self, arguments))
+            return False
+
+        raise LoxTypeError('Can only call functions and classes')
+
+    def push_frame(self, closure: VMClosure, argc: int) -> None:
+        if argc != closure.function.arity:
+            raise LoxTypeError(
+                f'Expected {closure.function.arity} arguments but got {argc}'
+            )
+        self.frames.append(CallFrame(closure, len(self.stack) - argc - 1))
+
+    def capture_upvalue(self, slot: int) -> Upvalue:
+        upvalue = self.open_upvalues.get(slot)
+        if upvalue is None:
+            upvalue = Upvalue(self.stack, slot)
+            self.open_upvalues[slot] = upvalue
+        return upvalue
+
+    def close_upvalues(self, last: int) -> None:
+        '''
+        Closes every open upvalue pointing at or above the stack slot last.
+        '''
+        for slot in [slot for slot in self.open_upvalues if slot >= last]:
+            self.open_upvalues.pop(slot).close()
+
+    @staticmethod
+    def uninitialized(closure: VMClosure, offset: int) -> LoxNameError:
+        '''
+        The error for reading a variable that holds nil, as the tree-walker
+        raises, with the operand of the read at offset.
+        '''
+        name = closure.function.chunk.names.get(offset, '?')
+        return LoxNameError(f"Variable '{name}' not initialized")
+
+    def run(self, exit_depth: int) -> Any:
+        '''
+        Executes until the frame count drops back to exit_depth, and
+        returns the value returned by that last frame.
+        '''
+        stack = self.stack
+        frames = self.frames
+        lox_globals = self.globals
+
+        frame = frames[-1]
+        closure = frame.closure
+        code = closure.function.chunk.code
+        constants = closure.function.chunk.constants
+        upvalues = closure.upvalues
+        base = frame.base
+        ip = frame.ip
+
+        try:
+            while True:
+                op = code[ip]
+                ip += 1
+
+                if op == OP_GET_LOCAL:
+                    value = stack[base + code[ip]]
+                    if value is None:
+                        raise self.uninitialized(closure, ip)
+                    stack.append(value)
+                    ip += 1
+                elif op == OP_CONSTANT:
+                    stack.append(constants[code[ip]])
+                    ip += 1
+                elif op == OP_GET_GLOBAL:
+                    name = constants[code[ip]]
+                    ip += 1
+                    try:
+                        value = lox_globals[name]
+                    except KeyError:
+                        raise LoxNameError(f"Variable '{name}' not defined") from None
+                    if value is None:
+                        raise LoxNameError(f"Variable '{name}' not initialized")
+                    stack.append(value)
+                elif op == OP_POP:
+                    stack.pop()
+                elif op == OP_JUMP_IF_FALSE:
+                    if stack[-1]:
+                        ip += 1
+                    else:
+                        ip = code[ip]
+                elif op == OP_ADD:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] + right
+                elif op == OP_SUBTRACT:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] - right
+                elif op == OP_LESS:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] < right
+                elif op == OP_LESS_EQUAL:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] <= right
+                elif op == OP_CALL:
+                    argc = code[ip]
+                    ip += 1
+                    callee = stack[-1 - argc]
+                    frame.ip = ip
+
+                    if type(callee) is VMClosure:
+                        function = callee.function
+                        if argc != function.arity:
+                            raise LoxTypeError(
+                                f'Expected {function.arity} arguments but got {argc}'
+                            )
+                        frame = CallFrame(callee, len(stack) - argc - 1)
+                        frames.append(frame)
+                    elif type(callee) is NativeFunction:
+                        if argc != callee.parameters:
+                            raise LoxTypeError(
+                                f'Expected {callee.parameters} arguments but got {argc}'
+                            )
+                        result = callee.function(*stack[len(stack) - argc:])
+                        del stack[len(stack) - argc:]
+                        stack[-1] = result
+                        continue
+                    elif self.call_value(callee, argc):
+                        frame = frames[-1]
+                    else:
+                        continue
+
+                    closure = frame.closure
+                    code = closure.function.chunk.code
+                    constants = closure.function.chunk.constants
+                    upvalues = closure.upvalues
+                    base = frame.base
+                    ip = 0
+                elif op == OP_INVOKE:
+                    cache = constants[code[ip]]
+                    argc = code[ip + 1]
+                    ip += 2
+                    receiver = stack[-1 - argc]
+                    frame.ip = ip
+
+                    method = None
+                    if isinstance(receiver, LoxInstance):
+                        method = cache.find_method(receiver)
+                        if method is None:
+                            stack[-1 - argc] = cache.get(receiver)
+                    elif isinstance(receiver, NativeObject):
+                        stack[-1 - argc] = receiver.lookup(cache.name)
+                    else:
+                        stack[-1 - argc] = None  # Like OP_GET_PROPERTY.
+
+                    if method is not None:
+                        # The receiver stays in slot zero, as 'this'.
+                        self.push_frame(method, argc)
+                    elif not self.call_value(stack[-1 - argc], argc):
+                        continue
+
+                    frame = frames[-1]
+                    closure = frame.closure
+                    code = closure.function.chunk.code
+                    constants = closure.function.chunk.constants
+                    upvalues = closure.upvalues
+                    base = frame.base
+                    ip = 0
+                elif op == OP_RETURN:
+                    result = stack.pop()
+                    if self.open_upvalues:
+                        self.close_upvalues(base)
+                    frames.pop()
+                    del stack[base:]
+
+                    if len(frames) == exit_depth:
+                        return result
+                    stack.append(result)
+
+                    frame = frames[-1]
+                    closure = frame.closure
+                    code = closure.function.chunk.code
+                    constants = closure.function.chunk.constants
+                    upvalues = closure.upvalues
+                    base = frame.base
+                    ip = frame.ip
+                elif op == OP_SET_LOCAL:
+                    stack[base + code[ip]] = stack[-1]
+                    ip += 1
+                elif op == OP_GET_UPVALUE:
+                    upvalue = upvalues[code[ip]]
+                    value = upvalue.cell[upvalue.index]
+                    if value is None:
+                        raise self.uninitialized(closure, ip)
+                    stack.append(value)
+                    ip += 1
+                elif op == OP_SET_UPVALUE:
+                    upvalue = upvalues[code[ip]]
+                    upvalue.cell[upvalue.index] = stack[-1]
+                    ip += 1
+                elif op == OP_LOOP or op == OP_JUMP:
+                    ip = code[ip]
+                elif op == OP_MULTIPLY:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] * right
+                elif op == OP_DIVIDE:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] / right
+                elif op == OP_GREATER:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] > right
+                elif op == OP_GREATER_EQUAL:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] >= right
+                elif op == OP_EQUAL:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] == right
+                elif op == OP_NOT_EQUAL:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] != right
+                elif op == OP_SET_GLOBAL:
+                    name = constants[code[ip]]
+                    ip += 1
+                    if name not in lox_globals:
+                        raise LoxNameError(f"Variable '{name}' not defined")
+                    lox_globals[name] = stack[-1]
+                elif op == OP_DEFINE_GLOBAL:
+                    lox_globals[constants[code[ip]]] = stack.pop()
+                    ip += 1
+                elif op == OP_NIL:
+                    stack.append(None)
+                elif op == OP_TRUE:
+                    stack.append(True)
+                elif op == OP_FALSE:
+                    stack.append(False)
+                elif op == OP_NOT:
+                    # Interpreter.is_truthy only considers true to be truthy.
+                    stack[-1] = stack[-1] is not True
+                elif op == OP_NEGATE:
+                    stack[-1] = -stack[-1]
+                elif op == OP_PRINT:
+                    print(stack.pop())
+                elif op == OP_GET_PROPERTY:
+                    obj = stack[-1]
+                    if isinstance(obj, LoxInstance):
+                        stack[-1] = constants[code[ip]].get(obj)
+                    elif isinstance(obj, NativeObject):
+                        stack[-1] = obj.lookup(constants[code[ip]].name)
+                    else:
+                        stack[-1] = None
+                    ip += 1
+                elif op == OP_SET_PROPERTY:
+                    obj = stack[-2]
+                    if not isinstance(obj, LoxInstance):
+                        raise LoxException("Only instances have fields!")
+                    value = stack.pop()
+                    constants[code[ip]].set(obj, value)
+                    stack[-1] = value
+                    ip += 1
+                elif op == OP_CLOSURE:
+                    function: VMFunction = constants[code[ip]]
+                    ip += 1
+                    captured = []
+                    for _ in range(function.upvalue_count):
+                        is_local = code[ip]
+                        index = code[ip + 1]
+                        ip += 2
+                        if is_local:
+                            captured.append(self.capture_upvalue(base + index))
+                        else:
+                            captured.append(upvalues[index])
+                    stack.append(VMClosure(function, captured))
+                elif op == OP_CLOSE_UPVALUE:
+                    self.close_upvalues(len(stack) - 1)
+                    stack.pop()
+                elif op == OP_CLASS:
+                    stack.append(LoxClass(constants[code[ip]], {}))
+                    ip += 1
+                elif op == OP_METHOD:
+                    method = stack.pop()
+                    stack[-1].methods[constants[code[ip]]] = method
+                    ip += 1
+                else:
+                    raise LoxException(f'Unknown opcode {op}')
+        except LoxException as e:
+            line = closure.function.chunk.lines[max(ip - 1, 0)]
+            e.add_note(f'[line {line}] in {closure.function}')
+            raise
@@ -0,0 +1,48 @@
+'''
+Runs Lox source in-process on any backend and optimization level.
+'''
+import contextlib
+import io
+
+from lox.lox import Lox
+from lox.enums.backend import Backend
+
+# Every way of running a program, as the --backend and --transpile flags.
+CONFIGURATIONS = [
+    (Backend.TREE, False),
+    (Backend.TREE, True),
+    (Backend.VM, False),
+    (Backend.CLOSURE, False),
+]
+
+def run(
+    source: str,
+    backend: Backend = Backend.TREE,
+    transpile: bool = False,
+    optimization: int = 0,
+) -> str:
+    '''
+    The printed output. Errors are raised.
+    '''
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        Lox(backend, transpile, optimization=optimization).run(source)
+    return output.getvalue()
+
+def outcome(source: str, **options) -> tuple[str, str | None]:
+    '''
+    The printed output and the error that ended the program, if any, so
+    runs that fail can be compared as well.
+    '''
+    output = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(output):
+        try:
+            Lox(
+                options.get('backend', Backend.TREE),
+                options.get('transpile', False),
+                optimization=options.get('optimization', 0),
+            ).run(source)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+    return output.getvalue(), error
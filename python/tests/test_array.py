@@ -0,0 +1,63 @@
+import pytest
+
+from lox.exceptions.errors import LoxArgumentError, LoxException, LoxTypeError
+from lox.lox_globals import array
+from support import CONFIGURATIONS, run
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_methods(backend, transpile):
+    source = '''
+        var xs = Array(4);
+        for (var i = 0; i < xs.len(); i = i + 1) xs.set(i, i + 1);
+        print xs.get(3);
+        print xs.sum();
+        print xs.min();
+        print xs.max();
+        print xs.dot(xs);
+        print xs.slice(1, 3).sum();
+        print Array(3).fill(2).sum();
+    '''
+    assert run(source, backend, transpile) == '4.0\n10.0\n1.0\n4.0\n30.0\n5.0\n6.0\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_elementwise(backend, transpile):
+    source = '''
+        var xs = Array(3).fill(2);
+        xs.set(0, 1);
+        print (xs + xs).sum();
+        print (xs * 3).sum();
+        print (10 - xs).sum();
+        print (xs / 2).sum();
+        print (1 / xs).sum();
+        print (-xs).sum();
+    '''
+    assert run(source, backend, transpile) == '10.0\n15.0\n25.0\n2.5\n2.0\n-5.0\n'
+
+@pytest.mark.parametrize('source, error', [
+    ('Array(-1);', LoxArgumentError),
+    ('Array(1.5);', LoxArgumentError),
+    ('Array("3");', LoxTypeError),
+    ('Array(2).get(2);', LoxArgumentError),
+    ('Array(2).set(0, "x");', LoxTypeError),
+    ('Array(2).slice(1, 0);', LoxArgumentError),
+    ('Array(0).min();', LoxArgumentError),
+    ('Array(2) + Array(3);', LoxArgumentError),
+    ('Array(2) / 0;', LoxArgumentError),
+    ('Array(2).dot(1);', LoxTypeError),
+    ('Array(2).missing;', LoxException),
+])
+def test_errors(source, error):
+    with pytest.raises(error):
+        run(source)
+
+def test_numpy_gives_the_same_results(monkeypatch):
+    pytest.importorskip('numpy')
+    source = '''
+        var xs = Array(300);
+        for (var i = 0; i < 300; i = i + 1) xs.set(i, i / 7);
+        print ((xs * 3 - 1) / (xs + 1)).sum();
+        print (2 - xs).max();
+    '''
+    with_numpy = run(source)
+    monkeypatch.setattr(array, 'numpy', None)
+    assert run(source) == with_numpy
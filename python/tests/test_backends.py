@@ -0,0 +1,26 @@
+import pytest
+
+from lox.enums.backend import Backend
+from lox.exceptions.errors import LoxNameError
+from lox.lox import Lox
+from support import CONFIGURATIONS, run
+
+UNINITIALIZED = [
+    'var x; print x;',
+    '{ var x; print x; }',
+    'var x = 1; x = nil; print x;',
+    'fun f() { var x; return x; } print f();',
+    'fun f() { var x; fun g() { return x; } return g(); } print f();',
+]
+
+@pytest.mark.parametrize('source', UNINITIALIZED)
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_reading_nil_variable_raises(source, backend, transpile):
+    with pytest.raises(LoxNameError, match="Variable 'x' not initialized"):
+        run(source, backend, transpile)
+
+@pytest.mark.parametrize('backend', list(Backend))
+def test_only_the_selected_backend_is_built(backend):
+    lox = Lox(backend)
+    assert (lox.vm is not None) == (backend == Backend.VM)
+    assert (lox.closure_compiler is not None) == (backend == Backend.CLOSURE)
@@ -0,0 +1,96 @@
+import marshal
+import zlib
+
+import pytest
+
+from lox import cache
+from lox.lox import Lox
+from lox.abcs.stmt import Break
+from lox.interpreter import Interpreter
+from support import CONFIGURATIONS
+
+SOURCE = '''
+fun make(n) {
+    var total = 0;
+    fun add(x) { total = total + x; return total; }
+    for (var i = 0; i < n; i = i + 1) add(i);
+    return total;
+}
+class Point { init(x) { this.x = x; } twice() { return this.x * 2; } }
+print make(10);
+print Point(4).twice();
+'''
+OUTPUT = '45.0\n8.0\n'
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / 'program.lox'
+    path.write_text(SOURCE)
+    return path
+
+def no_front_end(self, source):
+    raise AssertionError('parsed although cached')
+
+def test_miss_writes_the_cache(script, capsys):
+    assert cache.load(str(script), SOURCE, Interpreter()) is None
+    Lox().run_file(str(script))
+    assert capsys.readouterr().out == OUTPUT
+    assert cache.cache_path(str(script)).exists()
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_hit_skips_the_front_end(script, capsys, monkeypatch, backend, transpile):
+    Lox().run_file(str(script))
+    capsys.readouterr()
+
+    monkeypatch.setattr(Lox, 'front_end', no_front_end)
+    Lox(backend, transpile).run_file(str(script))
+    assert capsys.readouterr().out == OUTPUT
+
+def test_changed_source_misses(script):
+    Lox().run_file(str(script))
+    assert cache.load(str(script), SOURCE + 'print 1;', Interpreter()) is None
+
+def test_resolutions_round_trip(script):
+    Lox().run_file(str(script))
+    statements = cache.load(str(script), SOURCE, Interpreter())
+    assert statements is not None
+    make = statements[0]
+    assert make.pure is False  # It declares add, which assigns total.
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:10],  # Truncated header.
+    lambda data: data[:-5],  # Truncated payload.
+    lambda data: b'XXXX' + data[4:],  # Magic.
+    lambda data: data[:4] + b'\xff\xff' + data[6:],  # Format version.
+    lambda data: data[:-1] + bytes([data[-1] ^ 0xff]),  # Checksum.
+])
+def test_corrupt_cache_is_replaced(script, capsys, corrupt):
+    Lox().run_file(str(script))
+    capsys.readouterr()
+    path = cache.cache_path(str(script))
+    path.write_bytes(corrupt(path.read_bytes()))
+
+    assert cache.load(str(script), SOURCE, Interpreter()) is None
+    Lox().run_file(str(script))
+    assert capsys.readouterr().out == OUTPUT
+    assert cache.load(str(script), SOURCE, Interpreter()) is not None
+
+@pytest.mark.parametrize('program', [
+    ('not', 'a program'),
+    # A purity flag on a statement without one.
+    ([], [(cache.STMT_KIND + Break.tag, (None, None, False, True))]),
+])
+def test_undecodable_payload_misses(script, program):
+    # A valid header around a payload that isn't a program.
+    payload = zlib.compress(marshal.dumps(program))
+    header = cache.HEADER.pack(
+        cache.MAGIC,
+        cache.FORMAT_VERSION,
+        cache.source_key(SOURCE),
+        zlib.crc32(payload),
+        len(payload),
+    )
+    path = cache.cache_path(str(script))
+    path.parent.mkdir()
+    path.write_bytes(header + payload)
+    assert cache.load(str(script), SOURCE, Interpreter()) is None
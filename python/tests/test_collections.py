@@ -0,0 +1,65 @@
+import pytest
+
+from lox.exceptions.errors import LoxArgumentError, LoxException, LoxTypeError
+from support import CONFIGURATIONS, run
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_list(backend, transpile):
+    source = '''
+        var xs = List();
+        for (var i = 0; i < 3; i = i + 1) xs.append(i * 10);
+        xs.set(0, "first");
+        print xs;
+        print xs.len();
+        print xs.pop();
+        print xs.get(1);
+        print xs.len();
+    '''
+    assert run(source, backend, transpile) == '[first, 10.0, 20.0]\n3.0\n20.0\n10.0\n2.0\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_map(backend, transpile):
+    source = '''
+        var m = Map();
+        m.set("a", 1);
+        m.set(1, "one");
+        m.set(true, "yes");
+        m.set(nil, "nothing");
+        print m.get(1);
+        print m.get(true);
+        print m.get(nil);
+        print m.get("missing");
+        print m.has("a");
+        print m.remove("a");
+        print m.has("a");
+        print m.keys();
+        print m.len();
+    '''
+    assert run(source, backend, transpile) == (
+        'one\nyes\nnothing\nNone\nTrue\n1.0\nFalse\n[1.0, True, None]\n3.0\n'
+    )
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_instances_are_keys_by_identity(backend, transpile):
+    source = '''
+        class Point {}
+        var a = Point();
+        var b = Point();
+        var m = Map();
+        m.set(a, "a");
+        m.set(b, "b");
+        print m.get(a) + m.get(b);
+    '''
+    assert run(source, backend, transpile) == 'ab\n'
+
+@pytest.mark.parametrize('source, error', [
+    ('List().pop();', LoxArgumentError),
+    ('List().get(0);', LoxArgumentError),
+    ('List().get("0");', LoxTypeError),
+    ('class A {} Map().set(A, 1);', LoxTypeError),
+    ('Map().missing();', LoxException),
+    ('List(1);', LoxException),
+])
+def test_errors(source, error):
+    with pytest.raises(error):
+        run(source)
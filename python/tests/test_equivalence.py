@@ -0,0 +1,166 @@
+'''
+Every backend at every optimization level has to run the same programs
+the same way as the tree-walker at -O 0.
+'''
+from pathlib import Path
+
+import pytest
+
+from support import CONFIGURATIONS, outcome
+
+SCRIPTS = sorted((Path(__file__).resolve().parents[1] / 'lox_scripts').glob('*.lox'))
+LEVELS = [0, 1, 2, 3]
+
+EDGE_CASES = {
+    'short circuit': '''
+        fun loud(x) { print x; return x; }
+        print loud(false) and loud("skipped");
+        print loud("left") and loud("right");
+        print loud(false) or loud("fallback");
+        print loud("first") or loud("skipped");
+        print loud(false) or loud(false) or loud("last");
+    ''',
+    'constant folding': '''
+        print 1 + 2 * 3 - 4 / 8;
+        print "a" + "b";
+        print !nil == true;
+        if (1 < 2) print "yes"; else print "no";
+        while (false) print "never";
+    ''',
+    'propagation': '''
+        var k = 2;
+        var changed = 1;
+        changed = changed + 1;
+        fun f() { return k * changed; }
+        print f();
+    ''',
+    'inlining': '''
+        fun add(a, b) { return a + b; }
+        fun twice(x) { return x + x; }
+        var n = 1;
+        n = n + 1;
+        print add(n, n * 3);
+        print twice(n);
+        print twice(add(1, 2));
+    ''',
+    'non-finite': '''
+        fun big() { return ''' + '9' * 400 + '''; }
+        fun nan() { return ''' + '9' * 400 + ' - ' + '9' * 400 + '''; }
+        for (var i = 0; i < 3; i = i + 1) { print big(); print nan() == nan(); }
+    ''',
+    'closures': '''
+        fun counter() { var i = 0; fun inc() { i = i + 1; return i; } return inc; }
+        var c = counter();
+        c(); c();
+        print c();
+        var fs = List();
+        for (var i = 0; i < 3; i = i + 1) { var j = i; fun f() { return j; } fs.append(f); }
+        print fs.get(0)() + fs.get(2)();
+    ''',
+    'classes': '''
+        class Point {
+            init(x, y) { this.x = x; this.y = y; }
+            sum() { return this.x + this.y; }
+            scale(k) { this.x = this.x * k; this.y = this.y * k; return this; }
+        }
+        var p = Point(1, 2);
+        print p.sum();
+        p.x = 10;
+        print p.x;
+        print p.scale(2).sum();
+        var sum = p.sum;
+        p.y = 0;
+        print sum();
+        var q = p.init(3, 4);
+        print q == p;
+        print p.sum();
+        p.label = "p";
+        print p.label;
+    ''',
+    'fields across lines': '''
+        class Node {
+            init(value) {
+                this.value = value;
+                this.next = false;
+            }
+            link(next) {
+                this.next = next;
+                return next;
+            }
+        }
+        var head = Node(1);
+        head.link(Node(2)).link(Node(3));
+        var total = 0;
+        var node = head;
+        while (node) {
+            total = total + node.value;
+            node = node.next;
+        }
+        print total;
+        // One Get site seeing two shapes of the same class.
+        class Bag {}
+        var a = Bag(); a.x = 1; a.y = 2;
+        var b = Bag(); b.y = 3; b.x = 4;
+        var bags = List(); bags.append(a); bags.append(b); bags.append(a);
+        for (var i = 0; i < bags.len(); i = i + 1) print bags.get(i).x;
+    ''',
+    'tail calls': '''
+        fun loop(n, total) { if (n == 0) return total; return loop(n - 1, total + n); }
+        print loop(5000, 0);
+    ''',
+    'break': '''
+        var i = 0;
+        while (true) { i = i + 1; if (i > 10) break; }
+        for (var j = 0; j < 100; j = j + 1) { if (j == 3) break; print j; }
+        print i;
+    ''',
+    'natives': '''
+        var a = Array(4);
+        a.fill(2);
+        print (a * 3).sum();
+        var l = List();
+        l.append(1); l.append("two");
+        print l.len();
+        var m = Map();
+        m.set("k", l.pop());
+        print m.get("k");
+        print m.has("missing");
+    ''',
+    'uninitialized': 'var x; print x;',
+    'undefined': 'print missing;',
+    'bad operand': 'print -"text";',
+}
+
+PROGRAMS = {
+    **{path.name: path.read_text() for path in SCRIPTS},
+    **EDGE_CASES,
+}
+
+def comparable(result: tuple[str, str | None]) -> tuple[list[str], str | None]:
+    '''
+    The output without timings, which follow a print of clock, and the
+    type of the error.
+    '''
+    output, error = result
+    lines = output.splitlines()
+    lines = [
+        'TIME' if index > 0 and lines[index - 1].startswith('Time for') else line
+        for index, line in enumerate(lines)
+    ]
+    return lines, error and error.split(':')[0]
+
+@pytest.fixture(scope='module')
+def expected() -> dict[str, tuple[list[str], str | None]]:
+    return {name: comparable(outcome(source)) for name, source in PROGRAMS.items()}
+
+@pytest.mark.parametrize('name', PROGRAMS)
+@pytest.mark.parametrize('level', LEVELS)
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_same_outcome(expected, name, level, backend, transpile):
+    result = outcome(
+        PROGRAMS[name],
+        backend=backend,
+        transpile=transpile,
+        optimization=level,
+    )
+    assert comparable(result) == expected[name]
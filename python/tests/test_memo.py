@@ -0,0 +1,48 @@
+import pytest
+
+from support import CONFIGURATIONS, run
+
+FIB = '''
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+fib = memo(fib);
+'''
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_recursive_calls_are_cached(backend, transpile):
+    output = run(FIB + 'print fib(70); print fib;', backend, transpile)
+    assert output == (
+        '190392490709135.0\n'
+        '<memo fn, 71 cached, 68 hits, 71 misses>\n'
+    )
+
+def test_least_recently_used_is_evicted():
+    source = '''
+        var calls = 0;
+        fun f(x) { calls = calls + 1; return x; }
+        var g = memo(f);
+    ''' + 'for (var i = 0; i < 1025; i = i + 1) g(i);' + '''
+        g(1024);  // Still cached.
+        g(0);     // Evicted.
+        print calls;
+        print g;
+    '''
+    assert run(source) == '1026.0\n<memo fn, 1024 cached, 1 hits, 1026 misses>\n'
+
+def test_keys_include_types():
+    source = '''
+        fun f(x) { return x; }
+        var g = memo(f);
+        print g(1);
+        print g(true);
+    '''
+    assert run(source) == '1.0\nTrue\n'
+
+def test_unhashable_arguments_bypass_the_cache():
+    source = '''
+        class A {}
+        fun f(x) { return 1; }
+        var g = memo(f);
+        print g(A);
+        print g;
+    '''
+    assert run(source) == '1.0\n<memo fn, 0 cached, 0 hits, 0 misses>\n'
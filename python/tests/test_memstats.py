@@ -0,0 +1,89 @@
+import contextlib
+import io
+import tracemalloc
+
+import pytest
+
+from lox.lox import Lox
+from lox.memstats import TRACKED_CLASSES, MemStats
+from lox.abcs.expr import Binary
+from lox.abcs.stmt import Print
+from lox.callables.lox_class import LoxInstance
+from lox.callables.lox_function import LoxFunction
+from lox.frame import Frame
+from lox.token.token import Token
+
+SOURCE = '''
+class Point { init(x) { this.x = x; } }
+var points = List();
+for (var i = 0; i < 3; i = i + 1) points.append(Point(i));
+fun f() { return 1; }
+print f() + f();
+'''
+
+def constructors() -> dict[type, object]:
+    return {
+        cls: cls.__dict__.get('__new__' if cls is Token else '__init__')
+        for cls in TRACKED_CLASSES
+    }
+
+def test_constructors_are_restored():
+    before = constructors()
+    with MemStats():
+        assert constructors() != before
+    assert constructors() == before
+    assert not tracemalloc.is_tracing()
+
+def test_constructors_are_restored_after_an_error():
+    before = constructors()
+    with pytest.raises(ZeroDivisionError), MemStats():
+        1 / 0
+    assert constructors() == before
+
+def test_tracing_started_elsewhere_is_left_on():
+    tracemalloc.start()
+    try:
+        with MemStats():
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_counts_per_phase(capsys):
+    before = constructors()
+    lox = Lox(memstats=True)
+    # Live counts are of the whole process, other tests' objects included.
+    lox.memstats.phase('start')
+    lox.run(SOURCE)
+    lox.write_memstats()
+    assert constructors() == before
+
+    phases = {phase.name: phase for phase in lox.memstats.phases}
+    assert list(phases) == ['start', 'parse', 'resolve', 'optimize', 'interpret']
+    start = phases['start']
+
+    parse = phases['parse']
+    assert parse.created[Print] == 1
+    assert parse.created[Binary] == 3  # i < 3, i + 1 and f() + f().
+    assert parse.created[Token] > parse.live[Token] - start.live[Token] > 0
+    assert parse.created[LoxInstance] == 0
+
+    interpret = phases['interpret']
+    assert interpret.created[LoxInstance] == 3
+    assert interpret.live[LoxInstance] - start.live[LoxInstance] == 3  # Still in points.
+    assert interpret.live_bytes[LoxInstance] > 0
+    assert interpret.created[LoxFunction] == 2  # f and init, invoked without binding.
+    assert interpret.created[Frame] > 0
+    assert interpret.live[Frame] == start.live[Frame]
+    assert interpret.peak >= interpret.traced > 0
+
+    report = capsys.readouterr().err
+    assert 'after interpret:' in report
+    assert '  LoxInstance' in report
+
+def test_counts_without_memstats_are_not_kept():
+    lox = Lox()
+    with contextlib.redirect_stdout(io.StringIO()):
+        lox.run(SOURCE)
+    assert lox.memstats is None
+    lox.write_memstats()  # Nothing to do.
@@ -0,0 +1,61 @@
+import pytest
+
+from lox.lox import Lox
+from support import CONFIGURATIONS, run
+
+CLASS = '''
+class Counter {
+    init() { this.count = 0; }
+    add() { this.count = this.count + 1; return this.count; }
+    nothing() { return; }
+    early() { if (this.count == 0) return; return this.count; }
+}
+var c = Counter();
+'''
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_bound_methods_are_reused(backend, transpile):
+    source = CLASS + '''
+        print c.add == c.add;
+        var add = c.add;
+        add();
+        add();
+        print c.count;
+        print Counter().add == c.add;
+    '''
+    assert run(source, backend, transpile) == 'True\n2.0\nFalse\n'
+
+def test_one_bound_method_object_per_name():
+    lox = Lox()
+    lox.run(CLASS + 'var first = c.add; var second = c.add;')
+    instance = lox.interpreter.lox_globals['c']
+    assert lox.interpreter.lox_globals['first'] is lox.interpreter.lox_globals['second']
+    assert list(instance.bound_methods) == ['add']
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_fields_holding_functions(backend, transpile):
+    source = CLASS + '''
+        fun double(x) { return x * 2; }
+        c.f = double;
+        print c.f(21);
+        c.add = double;  // A field shadows the method.
+        print c.add(4);
+        print Counter().add();
+        class Holder { init(callback) { this.callback = callback; } run() { return this.callback(1); } }
+        print Holder(double).run();
+    '''
+    assert run(source, backend, transpile) == '42.0\n8.0\n1.0\n2.0\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_only_init_returns_this(backend, transpile):
+    source = CLASS + '''
+        print c.init() == c;
+        print c.nothing();
+        print c.early();
+        c.add();
+        print c.early();
+        class Empty { init() { return; } }
+        var e = Empty();
+        print e.init() == e;
+    '''
+    assert run(source, backend, transpile) == 'True\nNone\nNone\n1.0\nTrue\n'
@@ -0,0 +1,41 @@
+import pytest
+
+from lox.exceptions.errors import LoxTypeError
+from lox.lox_globals.registry import NATIVES, native
+from support import CONFIGURATIONS, run
+
+@pytest.fixture
+def hypot():
+    @native('hypot')
+    def hypot(x: float, y: float) -> float:
+        return (x * x + y * y) ** 0.5
+    yield hypot
+    del NATIVES['hypot']
+
+def test_arity_comes_from_the_signature(hypot):
+    assert NATIVES['hypot'].arity() == 2
+    assert NATIVES['clock'].arity() == 0
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_registered_natives_are_globals(hypot, backend, transpile):
+    source = '''
+        fun f(x) { return hypot(x, 4); }
+        for (var i = 0; i < 3; i = i + 1) print f(3);
+        print hypot;
+        print clock() > 0;
+    '''
+    assert run(source, backend, transpile) == '5.0\n5.0\n5.0\n<native fn>\nTrue\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_wrong_number_of_arguments(hypot, backend, transpile):
+    with pytest.raises(LoxTypeError, match='Expected 2 arguments but got 1'):
+        run('hypot(1);', backend, transpile)
+
+def test_registering_twice_fails(hypot):
+    with pytest.raises(ValueError):
+        native('hypot')(lambda: 0)
+
+def test_only_positional_parameters():
+    with pytest.raises(ValueError):
+        native('keywords')(lambda *, x: x)
+    assert 'keywords' not in NATIVES
@@ -0,0 +1,90 @@
+import pytest
+
+from lox.lox import Lox
+from lox.abcs.expr import Call
+from lox.abcs.stmt import Print
+from support import CONFIGURATIONS, outcome
+
+def optimized(source: str, level: int = 3) -> list:
+    lox = Lox(optimization=level)
+    return lox.optimizer.optimize(lox.front_end(source))
+
+def printed_calls(source: str) -> list[bool]:
+    '''
+    For every print statement, whether it still has a call after -O 3.
+    '''
+    return [
+        isinstance(statement.expression, Call)
+        for statement in optimized(source)
+        if isinstance(statement, Print)
+    ]
+
+FUNCTIONS = '''
+fun sub(a, b) { return a - b; }
+fun square(x) { return x * x; }
+fun flipped(x, y) { return y - x; }
+fun pick(c, x) { return c and x; }
+fun field(p, x) { return p.value + x; }
+fun identity(x) { return x; }
+fun first(x, y) { return x; }
+class Box { init(value) { this.value = value; } }
+var box = Box(1);
+var k = 3;
+k = k + 1;  // Not a constant, so the arguments aren't folded away.
+'''
+
+@pytest.mark.parametrize('call, inlined', [
+    ('sub(k * 2, k + 1)', True),  # Read once each, in call order.
+    ('sub(1, 2)', True),
+    ('square(k)', True),  # A variable can be read twice.
+    ('square(k + 1)', False),  # An expression can't.
+    ('flipped(k, k)', True),
+    ('flipped(k + 1, k * 2)', False),  # Read in the opposite order.
+    ('flipped(1, k * 2)', True),
+    ('pick(k, k)', False),  # x is only evaluated if c is true.
+    ('pick(k, 2)', True),
+    ('field(box, k + 1)', False),  # p.value can raise before x is read.
+    ('field(box, k)', True),
+    ('identity(nil)', False),  # Reading x raises, nil doesn't.
+    ('first(1, nil)', True),  # y is never read.
+])
+def test_inlining_rules(call, inlined):
+    assert printed_calls(FUNCTIONS + f'print {call};') == [not inlined]
+
+PROGRAMS = {
+    'conditional argument': '''
+        class P {}
+        var p = P();
+        fun pick(c, x) { return c and x; }
+        print pick(false, p.missing);
+    ''',
+    'argument order': '''
+        class P {}
+        var p = P();
+        fun f(x, y) { return y + x; }
+        print f(-nil, p.missing);
+    ''',
+    'nil argument': '''
+        fun identity(x) { return x; }
+        print identity(nil);
+    ''',
+    'raises before the argument': '''
+        class P {}
+        var p = P();
+        fun f(q, x) { return q.missing + x; }
+        print f(p, -nil);
+    ''',
+    'inlined': FUNCTIONS + '''
+        print sub(k * 2, k + 1);
+        print square(k);
+        print flipped(1, k * 2);
+        print field(box, k);
+    ''',
+}
+
+@pytest.mark.parametrize('name', PROGRAMS)
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_inlining_keeps_behavior(name, backend, transpile):
+    source = PROGRAMS[name]
+    expected = outcome(source, backend=backend, transpile=transpile)
+    assert outcome(source, backend=backend, transpile=transpile, optimization=3) == expected
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import itertools
+import re
+
+from lox.lox import Lox
+from lox.profiler import Profiler
+
+FIB = '''
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+class Box { init(value) { this.value = value; } }
+fun loop(n) { if (n == 0) return Box(n); return loop(n - 1); }
+print fib(10);
+loop(3);
+var xs = List();
+xs.append(clock());
+'''
+
+def profiled(source: str) -> Lox:
+    lox = Lox(profile=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        lox.run(source)
+    return lox
+
+def test_call_counts():
+    stats = profiled(FIB).profiler.stats
+    assert stats['fib:2'].calls == 177
+    assert stats['loop:7'].calls == 4  # Tail calls count as calls.
+    assert stats['Box'].calls == 1
+    assert stats['List'].calls == 1
+    assert stats['clock'].calls == 1
+    assert stats['List.append'].calls == 1
+    assert stats['init:6'].calls == 1
+
+def test_folded_stacks():
+    lines = profiled(FIB).profiler.folded()
+    assert all(re.fullmatch(r'main(;[^; ]+)* \d+', line) for line in lines)
+    stacks = {line.rsplit(' ', 1)[0] for line in lines}
+    assert 'main;fib:2;fib:2' in stacks
+    # A tail call replaces its caller, so loop never nests.
+    assert not any('loop:7;loop:7' in stack for stack in stacks)
+
+def test_self_and_cumulative_times():
+    ticks = itertools.count()
+    profiler = Profiler(clock=lambda: float(next(ticks)))
+    profiler.enter('outer')   # 1
+    profiler.enter('inner')   # 2
+    profiler.exit()           # 3
+    profiler.enter('outer')   # 4, recursive
+    profiler.exit()           # 5
+    profiler.exit()           # 6
+
+    outer = profiler.stats['outer']
+    assert outer.calls == 2
+    assert outer.self_time == 4.0  # 3 of the first call and 1 of the recursive one.
+    assert outer.cumulative_time == 5.0  # The recursive call isn't counted twice.
+    assert profiler.stats['inner'].self_time == 1.0
+    assert sorted(profiler.folded()) == [
+        'main 2000000',  # 0 to 1, and 6 to 7 when folded reads the clock.
+        'main;outer 3000000',
+        'main;outer;inner 1000000',
+        'main;outer;outer 1000000',
+    ]
+
+def test_write_profile(tmp_path, capsys):
+    lox = profiled(FIB)
+    folded = tmp_path / 'fib.folded'
+    lox.write_profile(str(folded))
+    assert 'fib:2' in capsys.readouterr().err
+    # All but the top level's time, which grows until folded is called.
+    written = folded.read_text().splitlines()
+    assert [line for line in written if ';' in line] == [
+        line for line in lox.profiler.folded() if ';' in line
+    ]
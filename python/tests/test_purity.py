@@ -0,0 +1,60 @@
+import pytest
+
+from lox.lox import Lox
+
+def purity(source: str) -> dict[str, str]:
+    '''
+    The reported status of every function, by name.
+    '''
+    lox = Lox()
+    assert lox.front_end(source) is not None
+    report = {}
+    for line in lox.resolver.purity_report():
+        name, status = line.split('] ', 1)[1].split(': ', 1)
+        report[name] = status
+    return report
+
+@pytest.mark.parametrize('source, name, status', [
+    ('fun f(x) { return x * 2; }', 'f', 'pure'),
+    ('fun f(x) { print x; return x; }', 'f', 'impure, prints'),
+    ('var count = 0; fun f() { count = count + 1; }', 'f', 'impure, assigns count'),
+    ('fun outer() { var n = 0; fun inc() { n = n + 1; return n; } return inc; }',
+     'inc', 'impure, assigns n'),
+    ('class P {} fun f(p) { p.x = 1; return p; }', 'f', 'impure, sets field x'),
+    ('fun f() { return clock(); }', 'f', 'impure, calls clock, which is not a function'),
+    ('fun f() { var xs = List(); return xs; }', 'f', 'impure, calls List, which is not a function'),
+    ('fun g() { print 1; } fun f() { g(); }', 'f', 'impure, calls g, which is impure'),
+    ('var k = 1; k = 2; fun f() { return k; }', 'f', 'impure, reads k, which is assigned'),
+])
+def test_reported_purity(source, name, status):
+    assert purity(source)[name] == status
+
+def test_mutual_recursion_is_pure():
+    report = purity('''
+        fun even(n) { if (n == 0) return true; return odd(n - 1); }
+        fun odd(n) { if (n == 0) return false; return even(n - 1); }
+    ''')
+    assert report == {'even': 'pure', 'odd': 'pure'}
+
+def test_impurity_spreads_through_recursion():
+    report = purity('''
+        fun a(n) { if (n == 0) return 0; return b(n - 1); }
+        fun b(n) { if (n == 0) { print n; return 0; } return a(n - 1); }
+        fun c(n) { return a(n); }
+    ''')
+    assert report == {
+        'a': 'impure, calls b, which is impure',
+        'b': 'impure, prints',
+        'c': 'impure, calls a, which is impure',
+    }
+
+def test_the_function_node_records_it():
+    lox = Lox()
+    statements = lox.front_end('fun f(x) { return x; } fun g(x) { print x; }')
+    assert [statement.pure for statement in statements] == [True, False]
+
+def test_purity_flag_prints_the_report(tmp_path, capsys):
+    script = tmp_path / 'program.lox'
+    script.write_text('fun f(x) {\n  return x;\n}\nfun g() { print 1; }\nprint "not run";\n')
+    Lox().report_purity(str(script))
+    assert capsys.readouterr().out == '[line 1] f: pure\n[line 4] g: impure, prints\n'
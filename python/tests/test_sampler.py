@@ -0,0 +1,68 @@
+import contextlib
+import io
+import signal
+
+import pytest
+
+from lox.lox import Lox
+from lox.sampler import Sampler
+from lox.abcs.expr import Binary, Literal
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(signal, 'setitimer'), reason='needs signal.setitimer'
+)
+
+BUSY = '''
+var total = 0;
+for (var i = 0; i < 200000; i = i + 1) {
+    total = total + i;
+}
+print total;
+'''
+
+def test_hits_land_on_the_loop():
+    lox = Lox(sample_interval=0.0005)
+    with contextlib.redirect_stdout(io.StringIO()):
+        lox.run(BUSY)
+    hits = lox.sampler.hits
+    assert lox.sampler.samples > 0
+    assert sum(hits.values()) > 0
+    assert set(hits) <= {2, 3, 4, 6}
+    assert hits.most_common(1)[0][0] in (3, 4)
+
+def test_handler_and_timer_are_restored():
+    def previous(signum, frame):
+        pass
+
+    original = signal.signal(signal.SIGPROF, previous)
+    try:
+        with Sampler(0.001) as sampler:
+            assert signal.getsignal(signal.SIGPROF) == sampler.sample
+        assert signal.getsignal(signal.SIGPROF) is previous
+        assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+
+        with pytest.raises(ZeroDivisionError), Sampler(0.001):
+            1 / 0
+        assert signal.getsignal(signal.SIGPROF) is previous
+        assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+    finally:
+        signal.signal(signal.SIGPROF, original)
+
+def test_line_of_the_first_token():
+    sampler = Sampler()
+    plus = Token(TokenType.PLUS, '+', None, 7)
+    assert sampler.line_of(Binary(Literal(1.0), plus, Literal(2.0))) == 7
+    assert sampler.line_of(Literal(1.0)) is None
+
+def test_report():
+    sampler = Sampler(0.001)
+    sampler.samples = 5
+    sampler.hits.update({2: 3, 1: 1})
+    assert sampler.report('var a = 1;\n  a = a + 1;\n').splitlines() == [
+        '  line     hits      %  source',
+        '     2        3  75.0%  a = a + 1;',
+        '     1        1  25.0%  var a = 1;',
+        '5 samples every 1ms, 1 outside the script',
+    ]
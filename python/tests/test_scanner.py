@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from lox.scanner import Scanner
+from lox.regex_scanner import RegexScanner
+
+ROOT = Path(__file__).resolve().parents[1]
+FILES = sorted([*(ROOT / 'lox_scripts').glob('*.lox'), *(ROOT / 'benchmarks' / 'programs').glob('*.lox')])
+
+SOURCES = {
+    **{path.name: path.read_text() for path in FILES},
+    'operators': '!= == <= >= < > ! = + - * / , . ; ( ) { }',
+    'numbers': '0 12 3.25 4. .5 007',
+    'strings': '"" "one" "multi\nline" "unterminated',
+    'comments': '// all of it\nprint 1; // trailing\n/ 2',
+    'keywords': 'and class else false for fun if nil or print return super this true var while break',
+    'identifiers': '_x x1 andy orchid classy',
+    'lines': '\n\n1\n\n2',
+    'unexpected characters': 'a @ b # 1',
+}
+
+@pytest.mark.parametrize('name', SOURCES)
+def test_same_tokens_as_scanner(name):
+    source = SOURCES[name]
+    assert list(RegexScanner(source).tokens()) == Scanner(source).scan_tokens()
@@ -0,0 +1,75 @@
+import pytest
+
+from lox.callables.lox_class import LoxClass, LoxInstance
+from lox.exceptions.errors import LoxException
+from lox.shape import PropertyCache, Shape
+from lox.token.token import Token
+from lox.enums.tokentype import TokenType
+
+def instance(klass: LoxClass, **fields) -> LoxInstance:
+    obj = LoxInstance(klass)
+    for name, value in fields.items():
+        PropertyCache(name).set(obj, value)
+    return obj
+
+def test_transitions_are_shared():
+    root = Shape()
+    xy = root.with_field('x').with_field('y')
+    assert root.with_field('x') is root.with_field('x')
+    assert root.with_field('x').with_field('y') is xy
+    assert xy.indices == {'x': 0, 'y': 1}
+    assert root.with_field('y').with_field('x') is not xy
+    assert root.indices == {}
+
+def test_instances_built_alike_share_a_shape():
+    point = LoxClass('Point', {})
+    a = instance(point, x=1, y=2)
+    b = instance(point, x=3, y=4)
+    c = instance(point, y=5, x=6)
+    assert a.shape is b.shape
+    assert c.shape is not a.shape
+    assert instance(LoxClass('Other', {}), x=1, y=2).shape is not a.shape
+
+def test_get_follows_the_shape_it_sees():
+    point = LoxClass('Point', {})
+    xy = instance(point, x=1, y=2)
+    yx = instance(point, y=3, x=4)
+    cache = PropertyCache('x')
+
+    assert cache.get(xy) == 1
+    assert (cache.shape, cache.index) == (xy.shape, 0)
+    assert cache.get(xy) == 1  # Hit.
+    assert cache.get(yx) == 4  # Miss, the site moves to the other shape.
+    assert (cache.shape, cache.index) == (yx.shape, 1)
+    assert cache.get(xy) == 1
+
+def test_set_adds_then_overwrites():
+    point = LoxClass('Point', {})
+    obj = LoxInstance(point)
+    cache = PropertyCache('x')
+
+    cache.set(obj, 1)  # Adds x.
+    assert obj.shape is point.shape.with_field('x')
+    assert obj.values == [1]
+
+    other = LoxInstance(point)
+    cache.set(other, 2)  # Another instance at the empty shape, cached transition.
+    assert other.shape is obj.shape
+
+    cache.set(obj, 3)  # Now x exists.
+    assert obj.values == [3]
+    assert cache.next_shape is None
+
+def test_set_on_one_site_is_read_on_another():
+    # Every Get and Set node has its own cache, and they used to key
+    # fields by the token, line included.
+    obj = LoxInstance(LoxClass('Point', {}))
+    PropertyCache('x').set(obj, 1)
+    assert PropertyCache('x').get(obj) == 1
+    assert obj.get(Token(TokenType.IDENTIFIER, 'x', None, 2)) == 1
+
+def test_missing_names():
+    obj = LoxInstance(LoxClass('Point', {}))
+    with pytest.raises(LoxException, match='Undefined attribute missing'):
+        PropertyCache('missing').get(obj)
+    assert PropertyCache('missing').find_method(obj) is None
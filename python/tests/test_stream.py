@@ -0,0 +1,69 @@
+import contextlib
+import io
+from pathlib import Path
+
+import pytest
+
+from lox.lox import Lox
+from lox.exceptions.errors import LoxSyntaxError
+from support import CONFIGURATIONS
+
+SCRIPTS = sorted((Path(__file__).resolve().parents[1] / 'lox_scripts').glob('*.lox'))
+PROGRAMS = {
+    **{path.name: path.read_text() for path in SCRIPTS if 'clock' not in path.read_text()},
+    'mixed': '''
+        var total = 0;
+        for (var i = 0; i < 5; i = i + 1) total = total + i;
+        print total;
+        fun add(a, b) { return a + b; }
+        class Pair { init(a, b) { this.a = a; this.b = b; } sum() { return add(this.a, this.b); } }
+        { var p = Pair(total, 1); print p.sum(); }
+        print add("a", "b");
+    ''',
+}
+
+def run(source: str, **options) -> tuple[Lox, str]:
+    lox = Lox(**options)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        lox.run(source)
+    return lox, output.getvalue()
+
+@pytest.mark.parametrize('name', PROGRAMS)
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_same_output_as_whole_program(name, backend, transpile):
+    source = PROGRAMS[name]
+    _, expected = run(source, backend=backend, transpile=transpile)
+    _, streamed = run(source, backend=backend, transpile=transpile, stream=True)
+    assert streamed == expected
+
+def test_output_before_a_syntax_error_is_printed():
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), pytest.raises(LoxSyntaxError):
+        Lox(stream=True).run('print 1; print 2; print ;')
+    assert output.getvalue() == '1.0\n2.0\n'
+
+def test_runtime_error_stops_the_run():
+    _, output = run('print 1; print 1 / 0; print 2;', stream=True)
+    assert output == '1.0\nDivision by zero not allowed! Bad stuff might happen...\n'
+
+def test_resolutions_are_released_without_functions():
+    lox, output = run('var a = 1; { var b = a; print b; } while (a < 3) a = a + 1;', stream=True)
+    assert output == '1.0\n'
+    assert lox.interpreter.mark() == (0, 0, 0, 0)
+
+def test_resolutions_are_kept_for_functions():
+    lox, output = run('''
+        fun f(x) { var y = x; return y; }
+        { var b = 2; print f(b); }
+    ''', stream=True)
+    assert output == '2.0\n'
+    locals_count, declarations, frame_sizes, _ = lox.interpreter.mark()
+    # The reads of x and y, y's slot and f's frame, not the block's.
+    assert (locals_count, declarations, frame_sizes) == (2, 1, 1)
+
+    # f still runs with the block's entries gone.
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        lox.run('print f(1);')
+    assert output.getvalue() == '1.0\n'
@@ -0,0 +1,49 @@
+import pytest
+
+from support import CONFIGURATIONS, run
+
+# Far deeper than the Python stack allows without tail calls.
+DEPTH = 20000
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_accumulator_recursion(backend, transpile):
+    source = f'''
+        fun count(n, total) {{ if (n == 0) return total; return count(n - 1, total + 1); }}
+        print count({DEPTH}, 0);
+    '''
+    assert run(source, backend, transpile) == f'{DEPTH}.0\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_mutual_recursion(backend, transpile):
+    source = f'''
+        fun even(n) {{ if (n == 0) return true; return odd(n - 1); }}
+        fun odd(n) {{ if (n == 0) return false; return even(n - 1); }}
+        print even({DEPTH});
+        print odd({DEPTH});
+    '''
+    assert run(source, backend, transpile) == 'True\nFalse\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_method_tail_calls(backend, transpile):
+    source = f'''
+        class Counter {{
+            init() {{ this.count = 0; }}
+            loop(n) {{ if (n == 0) return this.count; this.count = this.count + 1; return this.loop(n - 1); }}
+        }}
+        print Counter().loop({DEPTH});
+    '''
+    assert run(source, backend, transpile) == f'{DEPTH}.0\n'
+
+@pytest.mark.parametrize('backend, transpile', CONFIGURATIONS)
+def test_returned_calls_of_other_callables(backend, transpile):
+    source = '''
+        class Box { init(value) { this.value = value; } }
+        fun box(value) { return Box(value); }
+        fun size() { var xs = List(); xs.append(1); return xs.len(); }
+        fun closure() { var x = "captured"; fun get() { return x; } return get; }
+        fun call() { return closure()(); }
+        print box(3).value;
+        print size();
+        print call();
+    '''
+    assert run(source, backend, transpile) == '3.0\n1.0\ncaptured\n'
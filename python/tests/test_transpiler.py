@@ -0,0 +1,18 @@
+import pytest
+
+from support import run
+
+BIG = '9' * 400  # Scanned as inf.
+LARGE = '1' + '0' * 200
+
+@pytest.mark.parametrize('source, optimization', [
+    (f'fun g() {{ return {BIG}; }}', 0),
+    (f'fun g() {{ return -{BIG}; }}', 0),
+    (f'fun g() {{ return {BIG} - {BIG}; }}', 2),  # Folded to nan.
+    (f'fun g() {{ return {LARGE} * {LARGE}; }}', 2),  # Overflows to inf.
+])
+def test_non_finite_literals(source, optimization):
+    # Called often enough to be transpiled.
+    program = source + ' for (var i = 0; i < 5; i = i + 1) print g();'
+    expected = run(program, optimization=optimization)
+    assert run(program, transpile=True, optimization=optimization) == expected
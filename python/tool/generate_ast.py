@@ -0,0 +1,263 @@
+'''
+Generates the syntax tree node classes in src/lox/abcs, like
+java/tool/GenerateAst.java does for the Java implementation.
+
+Nodes are plain classes with __slots__, so they don't carry a __dict__
+each. Every class has a tag, its position in the definitions, which
+the .loxc cache stores as the node's kind.
+
+Fields are the constructor arguments, listed in __match_args__. Some
+nodes also get runtime slots that backends use to cache things per node,
+such as the inline caches of property accesses.
+
+Usage: python tool/generate_ast.py <output directory>
+'''
+import sys
+from pathlib import Path
+
+# (class name, docstring, [(field, type, comment)]), in visitor order.
+NodeType = tuple[str, str | None, list[tuple[str, str, str | None]]]
+
+EXPR_TYPES: list[NodeType] = [
+    ('Binary', 'Represents a binary operation expression.', [
+        ('left', 'Expr', None),
+        ('operator', 'Token', None),
+        ('right', 'Expr', None),
+    ]),
+    ('Call', None, [
+        ('callee', 'Expr', None),
+        ('arguments', 'list[Expr]', None),
+        ('paren', 'Token', 'To report potential runtime errors.'),
+    ]),
+    ('Get', None, [
+        ('obj', 'Expr', None),
+        ('name', 'Token', None),
+    ]),
+    ('Grouping', 'Represents a parenthesized expression.', [
+        ('expression', 'Expr', None),
+    ]),
+    ('Literal', 'Represents a literal value expression.', [
+        ('value', 'Any', None),
+    ]),
+    ('Logical', 'Represents a logical and/or expression.', [
+        ('left', 'Expr', None),
+        ('operator', 'Token', None),
+        ('right', 'Expr', None),
+    ]),
+    ('Set', None, [
+        ('obj', 'Expr', None),
+        ('name', 'Token', None),
+        ('value', 'Expr', None),
+    ]),
+    ('This', None, [
+        ('keyword', 'Token', None),
+    ]),
+    ('Unary', 'Represents a unary operation expression.', [
+        ('operator', 'Token', None),
+        ('right', 'Expr', None),
+    ]),
+    ('Variable', 'Represents a variable expression.', [
+        ('name', 'Token', None),
+    ]),
+    ('Assign', 'Represents an assignment expression.', [
+        ('name', 'Token', None),
+        ('value', 'Expr', None),
+    ]),
+]
+
+# Slots that aren't part of the syntax: (slot, type, initial value).
+RUNTIME_SLOTS: dict[str, list[tuple[str, str, str]]] = {
+    'Get': [('cache', 'PropertyCache', 'PropertyCache(name.lexeme)')],
+    'Set': [('cache', 'PropertyCache', 'PropertyCache(name.lexeme)')],
+    # Set by the Resolver, None until it has analyzed the function.
+    'Function': [('pure', 'bool | None', 'None')],
+}
+
+STMT_TYPES: list[NodeType] = [
+    ('Expression', None, [
+        ('expression', 'Expr', None),
+    ]),
+    ('Print', None, [
+        ('expression', 'Expr', None),
+    ]),
+    ('Function', None, [
+        ('name', 'Token', None),
+        ('params', 'list[Token]', None),
+        ('body', 'list[Stmt]', None),
+    ]),
+    ('Return', None, [
+        ('keyword', 'Token', None),
+        ('value', 'Expr | None', None),
+    ]),
+    ('If', None, [
+        ('condition', 'Expr', None),
+        ('then_branch', 'Stmt', None),
+        ('else_branch', 'Stmt | None', 'else statements are optional, ya know!'),
+    ]),
+    ('While', None, [
+        ('condition', 'Expr', None),
+        ('body', 'Stmt', None),
+    ]),
+    ('Break', None, []),
+    ('Var', None, [
+        ('name', 'Token', None),
+        ('initializer', 'Expr', None),
+    ]),
+    ('Block', None, [
+        ('statements', 'list[Stmt]', None),
+    ]),
+    ('Class', None, [
+        ('name', 'Token', None),
+        ('methods', 'list[Function]', None),
+    ]),
+]
+
+def snake_case(name: str) -> str:
+    return ''.join(
+        f'_{char.lower()}' if char.isupper() and i > 0 else char.lower()
+        for i, char in enumerate(name)
+    )
+
+def visit_method(base_name: str, type_name: str) -> str:
+    return f'visit_{snake_case(type_name)}_{base_name.lower()}'
+
+def define_ast(
+    output_dir: Path,
+    base_name: str,
+    types: list[NodeType],
+    imports: list[str],
+    noun: str,
+) -> None:
+    lines = [
+        '# Generated by tool/generate_ast.py, edit the definitions there instead.',
+        'from __future__ import annotations',
+        'from abc import ABC, abstractmethod',
+        'from typing import Any, ClassVar',
+        '',
+        *imports,
+        '',
+    ]
+
+    define_base(lines, base_name, types, noun)
+
+    for tag, node_type in enumerate(types):
+        define_type(lines, base_name, tag, node_type)
+
+    path = output_dir / f'{base_name.lower()}.py'
+    path.write_text('\n'.join(lines) + '\n')
+
+def define_base(
+    lines: list[str],
+    base_name: str,
+    types: list[NodeType],
+    noun: str,
+) -> None:
+    lines.extend([
+        f'class {base_name}(ABC):',
+        f'    """Base class for all {noun} types in the Lox language."""',
+        '    __slots__ = ()',
+        '    tag: ClassVar[int]  # Position in the definitions, stored by the cache.',
+        '    __match_args__: ClassVar[tuple[str, ...]]  # The fields.',
+        '',
+        '    @abstractmethod',
+        '    def accept[T](self, visitor: Visitor[T]) -> T:',
+        f'        """Accept a visitor to process this {noun}.',
+        '        ',
+        '        Args:',
+        f'            visitor: The visitor to process this {noun}.',
+        '        ',
+        '        Returns:',
+        "            The result of the visitor's processing.",
+        '        """',
+        '        pass',
+        '',
+        '    def __repr__(self) -> str:',
+        "        fields = ', '.join(",
+        "            f'{name}={getattr(self, name)!r}' for name in self.__match_args__",
+        '        )',
+        "        return f'{type(self).__name__}({fields})'",
+        '',
+        '    class Visitor[T](ABC):',
+    ])
+
+    parameter = base_name.lower()
+    for i, (type_name, _, _) in enumerate(types):
+        description = f'{snake_case(type_name).replace("_", " ")} {noun}'
+        article = 'an' if description[0] in 'aeiou' else 'a'
+        lines.extend([
+            '        @abstractmethod',
+            f'        def {visit_method(base_name, type_name)}(self, {parameter}: {type_name}) -> T:',
+            f'            """Process {article} {description}.',
+            '            ',
+            '            Args:',
+            f'                {parameter}: The {description} to process.',
+            '            """',
+            '            pass',
+        ])
+        if i < len(types) - 1:
+            lines.append('')
+
+    lines.extend(['', ''])
+
+def names_tuple(names: list[str]) -> str:
+    if len(names) == 1:
+        return f"('{names[0]}',)"
+    return '(' + ', '.join(f"'{name}'" for name in names) + ')'
+
+def define_type(
+    lines: list[str],
+    base_name: str,
+    tag: int,
+    node_type: NodeType,
+) -> None:
+    type_name, docstring, fields = node_type
+
+    lines.extend(['', f'class {type_name}({base_name}):'])
+    if docstring is not None:
+        lines.append(f'    """{docstring}"""')
+
+    runtime_slots = RUNTIME_SLOTS.get(type_name, [])
+    field_names = [name for name, _, _ in fields]
+    lines.append(f'    __slots__ = {names_tuple(field_names + [name for name, _, _ in runtime_slots])}')
+    lines.append(f'    __match_args__ = {names_tuple(field_names)}')
+    lines.append(f'    tag = {tag}')
+    lines.append('')
+
+    if fields:
+        parameters = ', '.join(f'{name}: {field_type}' for name, field_type, _ in fields)
+        lines.append(f'    def __init__(self, {parameters}):')
+        for name, _, comment in fields:
+            suffix = f'  # {comment}' if comment else ''
+            lines.append(f'        self.{name} = {name}{suffix}')
+        for name, slot_type, initial in runtime_slots:
+            lines.append(f'        self.{name}: {slot_type} = {initial}')
+        lines.append('')
+
+    lines.extend([
+        f'    def accept[T](self, visitor: {base_name}.Visitor[T]) -> T:',
+        f'        return visitor.{visit_method(base_name, type_name)}(self)',
+    ])
+
+def main(argv: list[str]) -> None:
+    if len(argv) != 2:
+        print('Usage: generate_ast <output directory>', file=sys.stderr)
+        sys.exit(64)
+
+    output_dir = Path(argv[1])
+    define_ast(
+        output_dir,
+        'Expr',
+        EXPR_TYPES,
+        ['from lox.token.token import Token', 'from lox.shape import PropertyCache'],
+        'expression',
+    )
+    define_ast(
+        output_dir,
+        'Stmt',
+        STMT_TYPES,
+        ['from lox.token.token import Token', 'from lox.abcs.expr import Expr'],
+        'statement',
+    )
+
+if __name__ == '__main__':
+    main(sys.argv)